@@ -0,0 +1 @@
+"""Offline benchmarks: local stand-ins for external APIs and drivers that exercise the real agent code."""
@@ -0,0 +1,160 @@
+import asyncio
+import json
+import random
+from aiohttp import web
+from src.ratelimit import estimate_tokens
+
+# Default scripted tool calls: a user message containing the keyword triggers these calls
+DEFAULT_TOOL_PLAN = {
+    "time": [{"name": "get_current_time", "args": {}}],
+}
+
+def _last_user_text(contents):
+    for message in reversed(contents):
+        if message.get("role") == "user":
+            return " ".join(p.get("text", "") for p in message.get("parts", []) if p.get("text"))
+    return ""
+
+class FakeGCAServer:
+    """A local Code Assist endpoint (loadCodeAssist, generateContent, streamGenerateContent).
+
+    Replies echo the latest user message. A user message containing a keyword from
+    `tool_plan` first gets the scripted function calls, then a text answer once the function
+    responses come back. `latency` (+/- `jitter`) delays every model reply and `rate_429`
+    is the probability of answering with a RESOURCE_EXHAUSTED error instead.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, rate_429=0.0, tool_plan=None, chunk_size=16,
+                 chunk_delay=0.0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_429 = rate_429
+        self.tool_plan = DEFAULT_TOOL_PLAN if tool_plan is None else tool_plan
+        self.chunk_size = chunk_size
+        self.chunk_delay = chunk_delay
+        self.random = random.Random(seed)
+        self.stats = {"requests": 0, "stream_requests": 0, "onboard_requests": 0,
+                      "injected_429": 0, "tool_turns": 0, "tokens_in": 0, "tokens_out": 0}
+        self._runner = None
+        self.url = None
+
+    def app(self):
+        app = web.Application()
+        app.router.add_post("/v1internal:loadCodeAssist", self._load_code_assist)
+        app.router.add_post("/v1internal:generateContent", self._generate)
+        app.router.add_post("/v1internal:streamGenerateContent", self._stream)
+        app.router.add_route("HEAD", "/", self._head)
+        return app
+
+    async def start(self, host="127.0.0.1", port=0):
+        self._runner = web.AppRunner(self.app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://{host}:{port}/v1internal"
+        return self.url
+
+    async def close(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _head(self, request):
+        return web.Response()
+
+    async def _load_code_assist(self, request):
+        self.stats["onboard_requests"] += 1
+        return web.json_response({"cloudaicompanionProject": "fake-project"})
+
+    async def _delay(self):
+        delay = self.latency + self.random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def _quota_error(self):
+        self.stats["injected_429"] += 1
+        body = {"error": {"code": 429, "status": "RESOURCE_EXHAUSTED", "message": "Fake quota exhausted.",
+                          "details": [{"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": "1s"}]}}
+        return web.json_response(body, status=429)
+
+    def _reply_parts(self, request_body):
+        """Decide the model's parts for this turn from the conversation so far."""
+        contents = request_body.get("request", {}).get("contents", [])
+        self.stats["tokens_in"] += estimate_tokens(request_body.get("request", {}))
+        last = contents[-1] if contents else {}
+        answering_tools = last.get("role") == "function"
+        text = _last_user_text(contents)
+        has_tools = bool(request_body.get("request", {}).get("tools"))
+
+        if has_tools and not answering_tools:
+            for keyword, calls in self.tool_plan.items():
+                if keyword in text.lower():
+                    self.stats["tool_turns"] += 1
+                    return [{"functionCall": call} for call in calls]
+
+        reply = f"Echo: {text[:200]}" if text else "Echo."
+        if answering_tools:
+            reply = f"Tools answered. {reply}"
+        self.stats["tokens_out"] += estimate_tokens(reply)
+        return [{"text": reply}]
+
+    def _envelope(self, parts):
+        return {"response": {"candidates": [{"content": {"role": "model", "parts": parts}}],
+                             "usageMetadata": {"promptTokenCount": self.stats["tokens_in"]}}}
+
+    async def _generate(self, request):
+        self.stats["requests"] += 1
+        body = await request.json()
+        await self._delay()
+        if self.random.random() < self.rate_429:
+            return self._quota_error()
+        return web.json_response(self._envelope(self._reply_parts(body)))
+
+    async def _stream(self, request):
+        self.stats["requests"] += 1
+        self.stats["stream_requests"] += 1
+        body = await request.json()
+        await self._delay()
+        if self.random.random() < self.rate_429:
+            return self._quota_error()
+
+        parts = self._reply_parts(body)
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        for part in parts:
+            if "text" in part:
+                text = part["text"]
+                for i in range(0, len(text), self.chunk_size):
+                    chunk = self._envelope([{"text": text[i:i + self.chunk_size]}])
+                    await response.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                    if self.chunk_delay:
+                        await asyncio.sleep(self.chunk_delay)
+            else:
+                await response.write(f"data: {json.dumps(self._envelope([part]))}\n\n".encode("utf-8"))
+        await response.write_eof()
+        return response
+
+async def serve(host, port, **options):
+    server = FakeGCAServer(**options)
+    url = await server.start(host, port)
+    print(f"Fake GCA server listening at {url} (set GCA_BASE_URL to use it)")
+    try:
+        while True:
+            await asyncio.sleep(3600)
+    finally:
+        await server.close()
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Run a local fake Code Assist server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, latency=args.latency, jitter=args.jitter, rate_429=args.rate_429))
+    except KeyboardInterrupt:
+        pass
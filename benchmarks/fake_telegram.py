@@ -0,0 +1,127 @@
+import asyncio
+import time
+from aiohttp import web
+
+BOT_ID = 1000
+
+class FakeTelegramServer:
+    """A local stand-in for the Bot API: getMe, getUpdates (long polling), sendMessage and
+    editMessageText, plus the housekeeping calls python-telegram-bot makes on startup.
+
+    Tests and load generators inject user messages with push_message(); every outgoing bot
+    message or edit is passed to `on_bot_message(chat_id, text, edited)`.
+    """
+
+    def __init__(self, token="fake-token", on_bot_message=None):
+        self.token = token
+        self.on_bot_message = on_bot_message
+        self.updates = []
+        self.next_update_id = 1
+        self.next_message_id = 1
+        self.stats = {"getUpdates": 0, "sendMessage": 0, "editMessageText": 0}
+        self._new_update = asyncio.Event()
+        self._draining = False
+        self._runner = None
+        self.base_url = None
+
+    def app(self):
+        app = web.Application()
+        app.router.add_route("*", "/bot{token}/{method}", self._dispatch)
+        return app
+
+    async def start(self, host="127.0.0.1", port=0):
+        self._runner = web.AppRunner(self.app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://{host}:{port}/bot" # Value for TELEGRAM_BASE_URL
+        return self.base_url
+
+    def drain(self):
+        """Answer long polls immediately from now on, so the client can shut down quickly."""
+        self._draining = True
+        self._new_update.set()
+
+    async def close(self):
+        self.drain()
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def _message(self, chat_id, text, from_user):
+        message = {
+            "message_id": self.next_message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private", "first_name": f"user{chat_id}"},
+            "from": from_user,
+            "text": text,
+        }
+        self.next_message_id += 1
+        return message
+
+    def push_message(self, user_id, text):
+        """Queue an incoming private message from `user_id` (its chat id is the user id)."""
+        user = {"id": user_id, "is_bot": False, "first_name": f"user{user_id}"}
+        self.updates.append({"update_id": self.next_update_id, "message": self._message(user_id, text, user)})
+        self.next_update_id += 1
+        self._new_update.set()
+
+    async def _params(self, request):
+        params = dict(request.query)
+        if request.can_read_body:
+            if request.content_type == "application/json":
+                params.update(await request.json())
+            else:
+                params.update(await request.post())
+        return params
+
+    async def _dispatch(self, request):
+        if request.match_info["token"] != self.token:
+            return web.json_response({"ok": False, "error_code": 401, "description": "Unauthorized"}, status=401)
+        method = request.match_info["method"]
+        params = await self._params(request)
+        handler = getattr(self, f"_api_{method}", None)
+        if handler is None:
+            return web.json_response({"ok": True, "result": True}) # deleteWebhook, setMyCommands, ...
+        return web.json_response({"ok": True, "result": await handler(params)})
+
+    async def _api_getMe(self, params):
+        return {"id": BOT_ID, "is_bot": True, "first_name": "Jovibe", "username": "jovibe_fake_bot",
+                "can_join_groups": True, "can_read_all_group_messages": False, "supports_inline_queries": False}
+
+    async def _api_getUpdates(self, params):
+        self.stats["getUpdates"] += 1
+        offset = int(params.get("offset") or 0)
+        timeout = float(params.get("timeout") or 0)
+        # Confirmed updates are dropped, as the real API does
+        self.updates = [u for u in self.updates if u["update_id"] >= offset]
+        if not self.updates and timeout and not self._draining:
+            self._new_update.clear()
+            try:
+                await asyncio.wait_for(self._new_update.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        limit = int(params.get("limit") or 100)
+        return self.updates[:limit]
+
+    def _bot_user(self):
+        return {"id": BOT_ID, "is_bot": True, "first_name": "Jovibe"}
+
+    async def _api_sendMessage(self, params):
+        self.stats["sendMessage"] += 1
+        chat_id = int(params["chat_id"])
+        message = self._message(chat_id, params.get("text", ""), self._bot_user())
+        if self.on_bot_message:
+            self.on_bot_message(chat_id, message["text"], False)
+        return message
+
+    async def _api_editMessageText(self, params):
+        self.stats["editMessageText"] += 1
+        chat_id = int(params["chat_id"])
+        message = self._message(chat_id, params.get("text", ""), self._bot_user())
+        message["message_id"] = int(params.get("message_id") or 0)
+        message["edit_date"] = int(time.time())
+        if self.on_bot_message:
+            self.on_bot_message(chat_id, message["text"], True)
+        return message
@@ -0,0 +1,201 @@
+import os
+import tempfile
+
+if __name__ == "__main__" and "JOVIBE_HOME" not in os.environ:
+    # Keep load-test conversations out of the real memory database
+    os.environ["JOVIBE_HOME"] = tempfile.mkdtemp(prefix="jovibe-loadtest-")
+
+import argparse  # noqa: E402
+import asyncio  # noqa: E402
+import json  # noqa: E402
+import random  # noqa: E402
+import time  # noqa: E402
+from collections import deque  # noqa: E402
+from benchmarks.fake_gca import FakeGCAServer  # noqa: E402
+from benchmarks.fake_telegram import FakeTelegramServer  # noqa: E402
+from benchmarks.replay import build_brain, percentile  # noqa: E402
+from src.adapters.telegram_adapter import TelegramAdapter  # noqa: E402
+from src.memory.manager import SoulManager  # noqa: E402
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes a task that asked to sleep `interval` seconds."""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.samples = []
+        self._task = None
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(time.perf_counter() - started - self.interval)
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+class TimedSoul(SoulManager):
+    """SoulManager that records how long each SQLite call blocks and whether the DB was locked."""
+
+    def __init__(self, db=None):
+        super().__init__(db=db)
+        self.db_times = {"history": [], "log": []}
+        self.db_errors = 0
+
+    async def _timed(self, kind, func, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        except Exception as e:
+            if "locked" in str(e).lower():
+                self.db_errors += 1
+            raise
+        finally:
+            self.db_times[kind].append(time.perf_counter() - started)
+
+    async def get_recent_history_turns(self, *args, **kwargs):
+        return await self._timed("history", super().get_recent_history_turns, *args, **kwargs)
+
+    async def log_interaction(self, *args, **kwargs):
+        return await self._timed("log", super().log_interaction, *args, **kwargs)
+
+class ReplyTracker:
+    """Matches bot replies to the user messages that caused them, per chat, in order."""
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self.pending = {} # chat_id -> deque of {"sent", "first"}
+        self.latencies = []
+        self.first_reply = []
+        self.expected = 0
+        self.done = asyncio.Event()
+
+    def sent(self, chat_id):
+        self.pending.setdefault(chat_id, deque()).append({"sent": time.perf_counter(), "first": None})
+        self.expected += 1
+
+    def on_bot_message(self, chat_id, text, edited):
+        queue = self.pending.get(chat_id)
+        if not queue:
+            return # Overflow parts of a long reply
+        now = time.perf_counter()
+        entry = queue[0]
+        if entry["first"] is None:
+            entry["first"] = now
+            self.first_reply.append(now - entry["sent"])
+        if not text.endswith(self.cursor): # Streaming frames carry the cursor; the final text does not
+            queue.popleft()
+            self.latencies.append(now - entry["sent"])
+            if len(self.latencies) >= self.expected:
+                self.done.set()
+
+def _summary(values):
+    return {
+        "p50": round(percentile(values, 50), 4),
+        "p95": round(percentile(values, 95), 4),
+        "p99": round(percentile(values, 99), 4),
+        "max": round(max(values, default=0.0), 4),
+    }
+
+async def loadtest(users=10, messages=5, rate=0.5, latency=0.2, jitter=0.0, rate_429=0.0, workers=4,
+                   timeout=120.0, tool_every=3, seed=1, db=None):
+    """Simulate `users` Telegram users each sending `messages` messages at ~`rate` per second.
+
+    `db` is the memory Database to log into (default: the one under JOVIBE_HOME).
+    """
+    rng = random.Random(seed)
+    gca = FakeGCAServer(latency=latency, jitter=jitter, rate_429=rate_429, seed=seed)
+    gca_url = await gca.start()
+    brain = build_brain(gca_url, workers)
+    soul = TimedSoul(db=db)
+    adapter = TelegramAdapter(brain, soul, token="fake-token")
+    tracker = ReplyTracker(adapter.stream_cursor)
+    telegram = FakeTelegramServer(token="fake-token", on_bot_message=tracker.on_bot_message)
+    adapter.base_url = await telegram.start()
+
+    lag = LoopLagMonitor()
+    adapter_task = asyncio.create_task(adapter.run())
+    started = None
+    try:
+        # Wait for the adapter to start polling
+        for _ in range(200):
+            if telegram.stats["getUpdates"]:
+                break
+            await asyncio.sleep(0.05)
+        lag.start()
+        started = time.perf_counter()
+
+        async def user(user_id):
+            for n in range(messages):
+                await asyncio.sleep(rng.expovariate(rate) if rate > 0 else 0)
+                text = f"what time is it? ({n})" if tool_every and n % tool_every == tool_every - 1 else f"hello #{n}"
+                tracker.sent(user_id)
+                telegram.push_message(user_id, text)
+
+        await asyncio.gather(*(user(10_000 + i) for i in range(users)))
+        try:
+            await asyncio.wait_for(tracker.done.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+    finally:
+        wall = time.perf_counter() - started if started else 0.0
+        await lag.stop()
+        telegram.drain()
+        adapter_task.cancel()
+        try:
+            await adapter_task
+        except (asyncio.CancelledError, Exception):
+            pass
+        await brain.close()
+        await soul.close()
+        await telegram.close()
+        await gca.close()
+
+    return {
+        "users": users,
+        "messages_sent": tracker.expected,
+        "replies_completed": len(tracker.latencies),
+        "timed_out": tracker.expected - len(tracker.latencies),
+        "wall_seconds": round(wall, 3),
+        "throughput_msgs_per_s": round(len(tracker.latencies) / wall, 2) if wall else 0.0,
+        "end_to_end": _summary(tracker.latencies),
+        "first_reply": _summary(tracker.first_reply),
+        "loop_lag": _summary(lag.samples),
+        "db_history": _summary(soul.db_times["history"]),
+        "db_log": _summary(soul.db_times["log"]),
+        "db_locked_errors": soul.db_errors,
+        "model_round_trips": gca.stats["requests"],
+        "telegram_sends": telegram.stats["sendMessage"],
+        "telegram_edits": telegram.stats["editMessageText"],
+        "scheduler": brain.scheduler.snapshot()["classes"]["interactive"],
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the Telegram adapter against local fake APIs.")
+    parser.add_argument("-u", "--users", type=int, default=10)
+    parser.add_argument("-m", "--messages", type=int, default=5, help="messages per user")
+    parser.add_argument("-r", "--rate", type=float, default=0.5, help="messages per second per user")
+    parser.add_argument("--latency", type=float, default=0.2, help="fake model latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--workers", type=int, default=4, help="scheduler slots")
+    parser.add_argument("--timeout", type=float, default=120.0, help="seconds to wait for outstanding replies")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    print(f"Memory database: {os.environ.get('JOVIBE_HOME')}")
+    report = asyncio.run(loadtest(
+        users=args.users, messages=args.messages, rate=args.rate, latency=args.latency, jitter=args.jitter,
+        rate_429=args.rate_429, workers=args.workers, timeout=args.timeout, seed=args.seed,
+    ))
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
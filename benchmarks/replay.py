@@ -0,0 +1,161 @@
+import argparse
+import asyncio
+import json
+import time
+from benchmarks.fake_gca import FakeGCAServer
+from src.llm import CodeAssistTransport, GeminiBrain
+from src.ratelimit import RateLimiter
+from src.scheduler import Scheduler
+
+DEFAULT_SYSTEM_PROMPT = "You are Jovibe, a helpful personal agent. Answer concisely."
+
+class StaticToken:
+    """Stands in for TokenManager: the fake server accepts any bearer token."""
+
+    async def token(self):
+        return "benchmark-token"
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+def build_brain(base_url, workers, rpm=100000, tpm=10 ** 9, response_cache=False):
+    """A real GeminiBrain whose GCA transport talks to a fake server at `base_url`."""
+    brain = GeminiBrain()
+    brain.limiter = RateLimiter(rpm=rpm, tpm=tpm)
+    brain.router.limiter = brain.limiter
+    brain.scheduler = Scheduler(concurrency=workers)
+    if not response_cache and brain.response_cache is not None:
+        brain.response_cache.close()
+        brain.response_cache = None
+    brain.token_manager = StaticToken()
+    brain.gca_transport = CodeAssistTransport(
+        brain.auth_manager, brain.http_pool, brain.limiter, brain.packer, brain.token_manager, base_url=base_url
+    )
+    brain.gca_transport.project_id = "fake-project" # Never overwrite the real cached project ID
+    return brain
+
+def load_conversations(path):
+    """Read conversations from JSONL.
+
+    Each line is {"turns": [...]} for a multi-turn conversation, {"messages": [...]} for one
+    request with explicit history, or any object with a "prompt", "text" or "body" field
+    (so a backlog such as requests.jsonl can be replayed as single-turn conversations).
+    """
+    conversations = []
+    with open(path, "r") as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            conv_id = str(record.get("id") or record.get("request_id") or number)
+            if "turns" in record:
+                turns = [{"role": "user", "parts": [{"text": t}]} for t in record["turns"]]
+                conversations.append((conv_id, turns, True))
+            elif "messages" in record:
+                conversations.append((conv_id, record["messages"], False))
+            else:
+                text = record.get("prompt") or record.get("text") or record.get("body") or ""
+                conversations.append((conv_id, [{"role": "user", "parts": [{"text": text}]}], True))
+    return conversations
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+async def _ask(brain, messages, system_prompt, tools, stream, user_id):
+    if stream:
+        return "".join([
+            delta async for delta in brain.stream_response(
+                messages, system_instruction=system_prompt, tools=tools, user_id=user_id
+            )
+        ])
+    return await brain.generate_response(messages, system_instruction=system_prompt, tools=tools, user_id=user_id)
+
+async def replay(conversations, concurrency=4, stream=False, tools=None, system_prompt=DEFAULT_SYSTEM_PROMPT,
+                 rpm=100000, tpm=10 ** 9, workers=None, response_cache=False, **server_options):
+    """Replay conversations against a fresh fake server and return a report dict."""
+    server = FakeGCAServer(**server_options)
+    url = await server.start()
+    brain = build_brain(url, workers or concurrency, rpm=rpm, tpm=tpm, response_cache=response_cache)
+
+    latencies = []
+    errors = 0
+    gate = asyncio.Semaphore(concurrency)
+
+    async def run_conversation(conv_id, turns, sequential):
+        nonlocal errors
+        async with gate:
+            history = []
+            pending = turns if sequential else [None]
+            for turn in pending:
+                messages = history + [turn] if turn is not None else turns
+                started = time.perf_counter()
+                response = await _ask(brain, messages, system_prompt, tools, stream, conv_id)
+                latencies.append(time.perf_counter() - started)
+                if not response or response.startswith(("Error", "Quota reached")):
+                    errors += 1
+                if turn is not None:
+                    history = messages + [{"role": "model", "parts": [{"text": response or ""}]}]
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(run_conversation(*conv) for conv in conversations))
+    finally:
+        wall = time.perf_counter() - started
+        await brain.close()
+        await server.close()
+
+    return {
+        "conversations": len(conversations),
+        "requests": len(latencies),
+        "errors": errors,
+        "wall_seconds": round(wall, 3),
+        "throughput_rps": round(len(latencies) / wall, 2) if wall else 0.0,
+        "latency_p50": round(percentile(latencies, 50), 4),
+        "latency_p90": round(percentile(latencies, 90), 4),
+        "latency_p99": round(percentile(latencies, 99), 4),
+        "latency_max": round(max(latencies, default=0.0), 4),
+        "model_round_trips": server.stats["requests"],
+        "tool_turns": server.stats["tool_turns"],
+        "injected_429": server.stats["injected_429"],
+        "tokens_sent": server.stats["tokens_in"],
+        "tokens_per_request": round(server.stats["tokens_in"] / max(1, len(latencies)), 1),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay recorded conversations against a local fake GCA server.")
+    parser.add_argument("conversations", help="JSONL file of conversations (e.g. requests.jsonl)")
+    parser.add_argument("-c", "--concurrency", type=int, default=4, help="conversations in flight at once")
+    parser.add_argument("--workers", type=int, help="scheduler slots (default: --concurrency)")
+    parser.add_argument("--repeat", type=int, default=1, help="replay the file this many times")
+    parser.add_argument("--stream", action="store_true", help="use stream_response instead of generate_response")
+    parser.add_argument("--no-tools", action="store_true", help="send requests without tool declarations")
+    parser.add_argument("--response-cache", action="store_true", help="keep the response cache enabled")
+    parser.add_argument("--latency", type=float, default=0.1, help="fake model latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--rate-429", type=float, default=0.0, help="probability of an injected 429")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    conversations = load_conversations(args.conversations) * args.repeat
+    report = asyncio.run(replay(
+        conversations, concurrency=args.concurrency, stream=args.stream, tools=[] if args.no_tools else None,
+        workers=args.workers, response_cache=args.response_cache, latency=args.latency, jitter=args.jitter,
+        rate_429=args.rate_429, seed=args.seed,
+    ))
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print("\nReplay report")
+    for key, value in report.items():
+        print(f"  {key:<20} {value}")
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,22 @@
+import time
 from abc import ABC, abstractmethod
+from src.config.settings import HISTORY_FETCH_LIMIT, STREAM_EDIT_INTERVAL
 from src.llm import GeminiBrain
 from src.memory.manager import SoulManager
+from src.metrics import FIRST_DELTA_SECONDS, MESSAGES, REQUEST_SECONDS, STAGE_SECONDS
+from src.ratelimit import estimate_tokens
+from src.tracing import span
 
 class BaseAdapter(ABC):
-    def __init__(self, brain: GeminiBrain, soul: SoulManager):
+    # Adapters that can edit a sent message set this and implement edit_message()
+    supports_streaming = False
+    stream_cursor = " ▌"
+
+    def __init__(self, brain: GeminiBrain, soul: SoulManager, memory=None):
         self.brain = brain
         self.soul = soul
+        self.memory = memory # Optional SemanticMemory: related memories are added to each question
+        self.stream_edit_interval = STREAM_EDIT_INTERVAL
 
     @abstractmethod
     async def run(self):
@@ -14,20 +25,98 @@ class BaseAdapter(ABC):
 
     @abstractmethod
     async def send_message(self, user_id, text):
-        """Send a message to a specific user on this platform."""
+        """Send a message to a specific user on this platform. Returns a handle usable by edit_message."""
         pass
 
+    async def edit_message(self, handle, text, final=True):
+        """Replace the text of a previously sent message (streaming adapters only).
+
+        Intermediate edits pass final=False and may be dropped; the final edit must land.
+        """
+        raise NotImplementedError
+
+    async def _stream_reply(self, user_id, messages, system_prompt, channel=None):
+        """Stream the model response into a single message, editing it at a bounded rate.
+
+        Returns (full_text, handle) where handle is the sent message, or None if nothing was sent.
+        """
+        handle = None
+        text = ""
+        shown = ""
+        last_edit = 0.0
+        started = time.perf_counter()
+        async for delta in self.brain.stream_response(messages, system_instruction=system_prompt, user_id=user_id):
+            if not text:
+                FIRST_DELTA_SECONDS.observe(time.perf_counter() - started, channel=channel or "unknown")
+            text += delta
+            # Never show a half-streamed STOP_AND_ASK marker; the final edit cleans it up
+            if "STOP_AND_ASK:" in text or not text.strip():
+                continue
+            now = time.monotonic()
+            if handle is None:
+                handle = await self.send_message(user_id, text + self.stream_cursor)
+                shown, last_edit = text, now
+            elif now - last_edit >= self.stream_edit_interval and text != shown:
+                await self.edit_message(handle, text + self.stream_cursor, final=False)
+                shown, last_edit = text, now
+        return text, handle
+
+    async def _deliver(self, user_id, handle, text):
+        """Finish a reply: edit the streamed message in place, or send a fresh one."""
+        if handle is not None:
+            await self.edit_message(handle, text)
+        else:
+            await self.send_message(user_id, text)
+
     async def handle_message(self, channel, user_id, text):
         """Common logic for handling messages from any channel."""
+        MESSAGES.inc(channel=channel)
+        received = time.perf_counter()
+        with span("handle_message", channel=channel, user_id=user_id):
+            await self._handle_message(channel, user_id, text)
+        REQUEST_SECONDS.observe(time.perf_counter() - received, channel=channel)
+
+    async def _handle_message(self, channel, user_id, text):
         try:
-            system_prompt = self.soul.get_system_prompt()
+            with STAGE_SECONDS.time(stage="system_prompt", channel=channel), span("get_system_prompt"):
+                system_prompt = self.soul.get_system_prompt()
             # Retrieve structured turns for native multi-turn support
-            history_turns = self.soul.get_recent_history_turns(user_id, limit=5)
+            with STAGE_SECONDS.time(stage="history", channel=channel), span("get_recent_history_turns"):
+                history_turns = await self.soul.get_recent_history_turns(user_id, limit=HISTORY_FETCH_LIMIT)
             
-            # Construct the final message list
-            messages = history_turns + [{"role": "user", "parts": [{"text": text}]}]
+            user_parts = [{"text": text}]
+            summary_turns = []
+            with STAGE_SECONDS.time(stage="summary", channel=channel), span("get_conversation_summary"):
+                summary = await self.soul.get_conversation_summary(user_id)
+            if summary:
+                # Older turns that aged out of the history window, compacted in the background.
+                # They go before the history, in the order they happened, as their own exchange.
+                summary_turns = [
+                    {"role": "user", "parts": [{"text": f"Summary of our earlier conversation:\n{summary}"}]},
+                    {"role": "model", "parts": [{"text": "Noted, I'll keep that in mind."}]},
+                ]
+            if self.memory is not None:
+                with STAGE_SECONDS.time(stage="recall", channel=channel), span("semantic_recall"):
+                    recalled = await self.memory.recall(user_id, text)
+                if recalled:
+                    # Sent with the question, not the system prompt, so the cached prompt prefix stays stable
+                    user_parts.insert(0, {"text": recalled})
+
+            # Construct the final message list, keeping as much history as the token budget allows
+            with STAGE_SECONDS.time(stage="pack", channel=channel), span("pack_context"):
+                messages = history_turns + [{"role": "user", "parts": user_parts}]
+                # The summary stands in for everything older, so the history is trimmed around it
+                reserve = estimate_tokens(system_prompt) + sum(self.brain.packer.count(m) for m in summary_turns)
+                messages = summary_turns + self.brain.packer.pack(messages, self.brain._current_model, reserve=reserve)
             
-            response = await self.brain.generate_response(messages, system_instruction=system_prompt)
+            handle = None
+            with STAGE_SECONDS.time(stage="generate", channel=channel), span("generate"):
+                if self.supports_streaming:
+                    response, handle = await self._stream_reply(user_id, messages, system_prompt, channel)
+                else:
+                    response = await self.brain.generate_response(
+                        messages, system_instruction=system_prompt, user_id=user_id
+                    )
             
             if not response:
                 print(f"Warning: Received empty response for user {user_id}")
@@ -37,15 +126,19 @@ class BaseAdapter(ABC):
             if "STOP_AND_ASK:" in response:
                 clean_question = response.split("STOP_AND_ASK:")[1].strip()
                 # Log the question as the response
-                self.soul.log_interaction(channel, user_id, text, f"[ASKED USER]: {clean_question}")
-                await self.send_message(user_id, clean_question)
+                with STAGE_SECONDS.time(stage="log", channel=channel), span("log_interaction"):
+                    await self.soul.log_interaction(channel, user_id, text, f"[ASKED USER]: {clean_question}")
+                with STAGE_SECONDS.time(stage="send", channel=channel), span("send_message"):
+                    await self._deliver(user_id, handle, clean_question)
                 return
 
             # Log interaction
-            self.soul.log_interaction(channel, user_id, text, response)
+            with STAGE_SECONDS.time(stage="log", channel=channel), span("log_interaction"):
+                await self.soul.log_interaction(channel, user_id, text, response)
             
             # Send response back to the platform
-            await self.send_message(user_id, response)
+            with STAGE_SECONDS.time(stage="send", channel=channel), span("send_message"):
+                await self._deliver(user_id, handle, response)
         except Exception as e:
             error_msg = f"Sorry, I encountered an internal error: {str(e)}"
             print(f"Error handling message from {user_id}: {e}")
@@ -4,7 +4,7 @@ from telegram import Update
 from telegram.ext import ApplicationBuilder, ContextTypes, MessageHandler, filters
 from telegram.error import NetworkError, TelegramError, TimedOut, RetryAfter
 from src.adapters.base import BaseAdapter
-from src.config.settings import TELEGRAM_TOKEN
+from src.config.settings import TELEGRAM_BASE_URL, TELEGRAM_TOKEN
 
 # Configure logging
 logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', level=logging.INFO)
@@ -14,20 +14,37 @@ logger = logging.getLogger(__name__)
 logging.getLogger("httpx").setLevel(logging.WARNING)
 logging.getLogger("telegram").setLevel(logging.WARNING)
 
+# Telegram rejects messages longer than this many characters
+MAX_MESSAGE_LENGTH = 4096
+
 class TelegramAdapter(BaseAdapter):
+    supports_streaming = True
+
+    def __init__(self, brain, soul, token=None, base_url=None, memory=None):
+        super().__init__(brain, soul, memory=memory)
+        self.token = token or TELEGRAM_TOKEN
+        self.base_url = base_url or TELEGRAM_BASE_URL
+        self.application = None
+        self._chats = {} # user_id -> chat_id of their latest message
+        self._user_locks = {} # user_id -> Lock keeping one user's messages in order
+
     async def run(self):
-        if not TELEGRAM_TOKEN:
+        if not self.token:
             print("Telegram token not set. Skipping Telegram adapter.")
             return
 
         application = (
             ApplicationBuilder()
-            .token(TELEGRAM_TOKEN)
+            .token(self.token)
+            .base_url(self.base_url)
+            # Different users' messages are handled in parallel; _on_message keeps each user in order
+            .concurrent_updates(True)
             .connect_timeout(30)
             .read_timeout(30)
             .write_timeout(30)
             .build()
         )
+        self.application = application
         
         # Add handlers
         msg_handler = MessageHandler(filters.TEXT & (~filters.COMMAND), self._on_message)
@@ -41,14 +58,20 @@ class TelegramAdapter(BaseAdapter):
             await application.initialize()
             await application.start()
             await application.updater.start_polling()
-            while True:
-                await asyncio.sleep(1)
+            try:
+                while True:
+                    await asyncio.sleep(1)
+            finally:
+                await application.updater.stop()
+                await application.stop()
 
     async def _on_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         user_id = str(update.effective_user.id)
         text = update.message.text
-        self._current_update = update # Keep for context
-        await self.handle_message("telegram", user_id, text)
+        self._chats[user_id] = update.effective_chat.id
+        lock = self._user_locks.setdefault(user_id, asyncio.Lock())
+        async with lock:
+            await self.handle_message("telegram", user_id, text)
 
     async def _on_error(self, update: object, context: ContextTypes.DEFAULT_TYPE):
         """Global error handler for the telegram application."""
@@ -57,15 +80,15 @@ class TelegramAdapter(BaseAdapter):
             print(f"Network error in Telegram update: {context.error}. Waiting for reconnection...")
 
     async def send_message(self, user_id, text, retries=3):
-        """Send a message with retry logic and error handling."""
-        if not (hasattr(self, "_current_update") and str(self._current_update.effective_user.id) == user_id):
+        """Send a message with retry logic and error handling. Returns the sent Message."""
+        chat_id = self._chats.get(user_id)
+        if chat_id is None or self.application is None:
             print(f"No active session for user {user_id}. Cannot send: {text}")
-            return
+            return None
 
         for attempt in range(retries):
             try:
-                await self._current_update.message.reply_text(text)
-                return # Success
+                return await self.application.bot.send_message(chat_id=chat_id, text=text)
             except RetryAfter as e:
                 print(f"Rate limited by Telegram. Waiting {e.retry_after}s...")
                 await asyncio.sleep(e.retry_after)
@@ -82,3 +105,33 @@ class TelegramAdapter(BaseAdapter):
             except Exception as e:
                 print(f"Unexpected error in send_message: {e}")
                 break
+
+    async def edit_message(self, handle, text, final=True, retries=3):
+        """Edit a sent message in place. Intermediate (non-final) edits are best-effort."""
+        text = text[:MAX_MESSAGE_LENGTH]
+        for attempt in range(retries if final else 1):
+            try:
+                await handle.edit_text(text)
+                return
+            except RetryAfter as e:
+                if not final:
+                    return # Skip this frame; the next edit carries the newer text anyway
+                print(f"Rate limited by Telegram. Waiting {e.retry_after}s...")
+                await asyncio.sleep(e.retry_after)
+            except (TimedOut, NetworkError) as e:
+                if final and attempt < retries - 1:
+                    await asyncio.sleep((attempt + 1) * 5)
+                else:
+                    print(f"Failed to edit message: {e}")
+            except TelegramError as e:
+                # Includes 'Message is not modified' when the final text equals the last frame
+                if "not modified" not in str(e):
+                    print(f"Critical Telegram error while editing: {e}")
+                return
+
+    async def _deliver(self, user_id, handle, text):
+        """Deliver the final text, spilling anything past Telegram's size limit into follow-ups."""
+        head, rest = text[:MAX_MESSAGE_LENGTH], text[MAX_MESSAGE_LENGTH:]
+        await super()._deliver(user_id, handle, head)
+        for i in range(0, len(rest), MAX_MESSAGE_LENGTH):
+            await self.send_message(user_id, rest[i:i + MAX_MESSAGE_LENGTH])
@@ -1,9 +1,22 @@
 import os
 import json
+import asyncio
+from datetime import datetime, timezone
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
-from src.config.settings import OAUTH_CLIENT_ID, OAUTH_CLIENT_SECRET, OAUTH_SCOPES, TOKEN_FILE
+from src.config.settings import (
+    OAUTH_CLIENT_ID, OAUTH_CLIENT_SECRET, OAUTH_SCOPES, TOKEN_FILE, TOKEN_REFRESH_MARGIN
+)
+
+def write_atomic(path, text):
+    """Write `text` to `path` via a temp file and rename, so readers never see a partial file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
 
 class AuthManager:
     def __init__(self):
@@ -59,12 +72,103 @@ class AuthManager:
                     self.credentials = flow.run_local_server(port=0, open_browser=False)
 
             # Save the credentials for the next run
-            with open(TOKEN_FILE, "w") as token:
-                token.write(self.credentials.to_json())
+            self.save()
 
         return self.credentials
 
+    def save(self):
+        """Persist the current credentials to TOKEN_FILE."""
+        if self.credentials:
+            write_atomic(TOKEN_FILE, self.credentials.to_json())
+
     def get_credentials(self):
         if not self.credentials:
             return self.authenticate()
         return self.credentials
+
+class TokenManager:
+    """Keeps the OAuth access token fresh without blocking the event loop.
+
+    Loading, refreshing and saving credentials are blocking HTTP/disk calls, so they run in a
+    worker thread. Concurrent callers share a single refresh, and a background task renews the
+    token `refresh_margin` seconds before it expires so requests rarely wait for one at all.
+    """
+
+    RETRY_AFTER = 30 # Seconds before the background task retries a failed refresh
+
+    def __init__(self, auth_manager, refresh_margin=TOKEN_REFRESH_MARGIN):
+        self.auth_manager = auth_manager
+        self.refresh_margin = refresh_margin
+        self._lock = asyncio.Lock()
+        self._task = None
+
+    def seconds_left(self, creds):
+        """Seconds until `creds` expire (None if the expiry is unknown)."""
+        if not creds.expiry:
+            return None
+        # google-auth stores expiry as a naive UTC datetime
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        return (creds.expiry - now).total_seconds()
+
+    def _needs_refresh(self, creds):
+        if not creds.valid:
+            return True
+        left = self.seconds_left(creds)
+        return left is not None and left < self.refresh_margin
+
+    async def credentials(self):
+        """Loaded credentials (reading token files or running the OAuth flow in a thread on first use)."""
+        if self.auth_manager.credentials is None:
+            async with self._lock:
+                if self.auth_manager.credentials is None:
+                    await asyncio.to_thread(self.auth_manager.get_credentials)
+        return self.auth_manager.credentials
+
+    async def token(self):
+        """Return a valid access token, refreshing it first if it is expired or about to expire."""
+        creds = await self.credentials()
+        if self._needs_refresh(creds):
+            await self.refresh()
+        return creds.token
+
+    async def refresh(self, force=False):
+        """Refresh the token in a worker thread; concurrent callers wait for the same refresh."""
+        creds = await self.credentials()
+        async with self._lock:
+            # Another caller may have refreshed while we waited for the lock
+            if not force and not self._needs_refresh(creds):
+                return creds
+            await asyncio.to_thread(creds.refresh, Request())
+            await asyncio.to_thread(self.auth_manager.save)
+            print("OAuth token refreshed.")
+        return creds
+
+    async def start(self):
+        """Load credentials and start renewing them in the background."""
+        await self.credentials()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def _refresh_loop(self):
+        while True:
+            creds = self.auth_manager.credentials
+            left = self.seconds_left(creds) if creds else None
+            if left is None:
+                delay = self.refresh_margin
+            else:
+                delay = max(0, left - self.refresh_margin)
+            await asyncio.sleep(delay)
+            try:
+                await self.refresh(force=True)
+            except Exception as e:
+                print(f"Background token refresh failed: {str(e)}. Retrying in {self.RETRY_AFTER}s...")
+                await asyncio.sleep(self.RETRY_AFTER)
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,83 @@
+import time
+from src.errors import CACHE, INVALID, QUOTA, REJECTED
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker for a single model.
+
+    While open, requests fail fast (the router skips the model) instead of sleeping in the
+    request path. When the open period ends, exactly one probe request is let through; its
+    outcome closes the breaker or re-opens it with a longer backoff.
+    """
+
+    def __init__(self, failure_threshold=3, base_open=30.0, max_open=600.0, rejected_open=7200.0):
+        self.failure_threshold = failure_threshold
+        self.base_open = base_open
+        self.max_open = max_open
+        self.rejected_open = rejected_open
+        self.state = CLOSED
+        self.failures = 0
+        self.trips = 0 # Consecutive times opened, drives the exponential backoff
+        self.open_until = 0.0
+        self.probe_in_flight = False
+
+    def _current_state(self, now):
+        if self.state == OPEN and now >= self.open_until:
+            return HALF_OPEN
+        return self.state
+
+    def available(self, now=None):
+        """Whether a request could be let through right now (does not claim the probe)."""
+        state = self._current_state(now or time.time())
+        return state == CLOSED or (state == HALF_OPEN and not self.probe_in_flight)
+
+    def allow(self, now=None):
+        """Claim permission to send a request; in half-open state only one caller wins."""
+        now = now or time.time()
+        state = self._current_state(now)
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and not self.probe_in_flight:
+            self.state = HALF_OPEN
+            self.probe_in_flight = True
+            return True
+        return False
+
+    def retry_in(self, now=None):
+        """Seconds until the breaker will let a probe through (0 if available now)."""
+        if self.available(now):
+            return 0.0
+        return max(0.0, self.open_until - (now or time.time()))
+
+    def record_success(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.probe_in_flight = False
+
+    def record_failure(self, error=None):
+        kind = getattr(error, "kind", None)
+        self.probe_in_flight = False
+        if kind in (CACHE, INVALID):
+            return # Our stale cache reference or a bad request, not a model failure
+        if kind == QUOTA:
+            self._open(error.retry_after or self.base_open)
+        elif kind == REJECTED:
+            self._open(self.rejected_open)
+        else:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self._open(min(self.max_open, self.base_open * (2 ** self.trips)))
+
+    def release(self):
+        """Give back a probe that ended without an outcome (e.g. a cancelled hedge)."""
+        self.probe_in_flight = False
+
+    def _open(self, seconds):
+        self.state = OPEN
+        self.trips += 1
+        self.failures = 0
+        self.open_until = max(self.open_until, time.time() + seconds)
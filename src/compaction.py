@@ -0,0 +1,97 @@
+import asyncio
+import time
+from src.config.settings import (
+    HISTORY_FETCH_LIMIT, SUMMARY_INTERVAL, SUMMARY_MAX_BATCH, SUMMARY_MAX_CHARS, SUMMARY_MAX_WAIT,
+    SUMMARY_MIN_BATCH,
+)
+from src.llm import GeminiBrain
+from src.memory.dal import get_summary, interactions_to_compact, users_to_compact
+from src.memory.manager import SoulManager
+from src.router import HEARTBEAT
+from src.scheduler import BACKGROUND
+
+class CompactionManager:
+    """Folds interactions that aged out of the recent window into a rolling per-user summary.
+
+    Runs at BACKGROUND priority, so queued interactive and proactive requests always get a
+    slot first, and with a `max_wait` deadline: if no slot frees up in time the scheduler sheds
+    the job and the pass stops until the next interval. Passes are also skipped while the
+    cheapest model is at its rate limit, so summaries only use spare quota. Each pass only
+    reads turns newer than the summary.
+    """
+
+    def __init__(self, brain: GeminiBrain, soul: SoulManager, interval=SUMMARY_INTERVAL,
+                 keep_recent=HISTORY_FETCH_LIMIT, min_batch=SUMMARY_MIN_BATCH, max_batch=SUMMARY_MAX_BATCH,
+                 max_wait=SUMMARY_MAX_WAIT):
+        self.brain = brain
+        self.soul = soul
+        self.interval = interval
+        self.keep_recent = keep_recent
+        self.min_batch = min_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+
+    async def start(self):
+        """Main compaction loop."""
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.compact()
+            except Exception as e:
+                print(f"Compaction pass failed: {str(e)}")
+
+    def _has_spare_quota(self):
+        model = self.brain.router.select(HEARTBEAT)
+        return model is not None and self.brain.limiter.delay(model) <= 0
+
+    async def compact(self):
+        """Update the summary of every user with enough aged-out turns. Returns users updated."""
+        users = await self.soul.db.run(users_to_compact, self.keep_recent, self.min_batch)
+        updated = 0
+        for user_id in users:
+            if not self._has_spare_quota():
+                print("Compaction: No spare model quota. Deferring to the next pass.")
+                break
+            result = await self.compact_user(user_id)
+            if result is False:
+                break # Shed or failed: the others would hit the same wall, retry next pass
+            if result:
+                updated += 1
+        return updated
+
+    async def compact_user(self, user_id):
+        """Fold the next batch of the user's aged-out turns into their summary.
+
+        Returns True if the summary was updated, False if the model call was shed or failed,
+        and None if too few turns have aged out yet.
+        """
+        summary, last_id = await self.soul.db.run(get_summary, user_id)
+        rows = await self.soul.db.run(interactions_to_compact, user_id, last_id, self.keep_recent, self.max_batch)
+        if len(rows) < self.min_batch:
+            return None
+
+        transcript = "\n".join(f"User: {prompt}\nAI: {response}" for _, prompt, response in rows)
+        prompt = f"""
+You maintain a running summary of a long conversation between a user and their assistant.
+
+# CURRENT SUMMARY
+{summary or "(none yet)"}
+
+# OLDER MESSAGES TO FOLD IN
+{transcript[-12000:]}
+
+Rewrite the summary so it also covers these messages. Keep durable facts, preferences, decisions
+and open tasks; drop small talk. Use terse bullet points, at most {SUMMARY_MAX_CHARS} characters.
+Reply with the summary only.
+"""
+        response = await self.brain.generate_response(
+            prompt, tools=[], cache=False, request_class=HEARTBEAT, priority=BACKGROUND,
+            deadline=time.monotonic() + self.max_wait,
+        )
+        if not response or response.startswith("Error:"):
+            print(f"Compaction for {user_id} skipped: {response}")
+            return False
+
+        await self.soul.save_conversation_summary(user_id, response.strip()[:SUMMARY_MAX_CHARS], rows[-1][0])
+        print(f"Compaction: Folded {len(rows)} interactions into the summary for {user_id}.")
+        return True
@@ -23,6 +23,7 @@ USER_FILE = JOVIBE_HOME / "user.md"
 HEARTBEAT_FILE = JOVIBE_HOME / "HEARTBEAT.md"
 DB_FILE = STORAGE_DIR / "jovibe.sqlite"
 TOKEN_FILE = STORAGE_DIR / "token.json"
+GCA_PROJECT_FILE = STORAGE_DIR / "gca_project.json" # Cached cloudaicompanionProject ID
 
 # Initialize default files if they don't exist in JOVIBE_HOME
 def _init_default_file(path, default_content=""):
@@ -48,6 +49,9 @@ load_dotenv()
 # Gemini Config
 GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-3-flash-preview")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+# Per-model quota ceilings the rate limiter paces requests against
+GEMINI_RPM = int(os.getenv("GEMINI_RPM", "10")) # Requests per minute
+GEMINI_TPM = int(os.getenv("GEMINI_TPM", "250000")) # Input tokens per minute
 
 # OAuth Constants (Ported from Gemini CLI)
 OAUTH_CLIENT_ID = os.getenv("GOOGLE_OAUTH_CLIENT_ID", "681255809395-oo8ft2oprdrnp9e3aqf6av3hmdib135j.apps.googleusercontent.com")
@@ -59,6 +63,109 @@ OAUTH_SCOPES = [
     "openid",
 ]
 
+# Code Assist endpoint (override to point the OAuth transport at a local fake server)
+GCA_BASE_URL = os.getenv("GCA_BASE_URL", "https://cloudcode-pa.googleapis.com/v1internal")
+
 # Channel Config
 TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
+# Bot API endpoint (override to point the adapter at a local stand-in for load tests)
+TELEGRAM_BASE_URL = os.getenv("TELEGRAM_BASE_URL", "https://api.telegram.org/bot")
 DISCORD_TOKEN = os.getenv("DISCORD_TOKEN")
+
+# Streaming Config
+# Minimum seconds between progressive message edits (Telegram rate-limits edits per chat)
+STREAM_EDIT_INTERVAL = float(os.getenv("STREAM_EDIT_INTERVAL", "1.5"))
+
+# Tool Execution Config
+TOOL_TIMEOUT = float(os.getenv("TOOL_TIMEOUT", "60")) # Per-call timeout in seconds
+TOOL_WORKERS = int(os.getenv("TOOL_WORKERS", "4")) # Threads available to synchronous skills
+SKILL_CACHE_SIZE = int(os.getenv("SKILL_CACHE_SIZE", "128")) # Cached results of read-only skills
+
+# Response Cache Config
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+RESPONSE_CACHE_FILE = STORAGE_DIR / "response_cache.sqlite"
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "256")) # In-memory entries
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", str(6 * 60 * 60))) # Seconds
+# Tool-enabled calls can have side effects, so they are only cached when explicitly allowed
+RESPONSE_CACHE_TOOL_CALLS = os.getenv("RESPONSE_CACHE_TOOL_CALLS", "false").lower() == "true"
+
+# Context Cache Config (server-side caching of the system prompt; API key client only)
+CONTEXT_CACHE_ENABLED = os.getenv("CONTEXT_CACHE_ENABLED", "true").lower() == "true"
+CONTEXT_CACHE_TTL = int(os.getenv("CONTEXT_CACHE_TTL", "3600")) # Seconds
+# Gemini rejects caches smaller than this, so shorter prompts are always sent inline
+CONTEXT_CACHE_MIN_TOKENS = int(os.getenv("CONTEXT_CACHE_MIN_TOKENS", "1024"))
+
+# Context Packing Config
+# Token budget for conversation contents (system prompt and tools are reserved out of it)
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "32000"))
+# Per-model overrides, e.g. "gemini-2.5-flash-lite=16000,gemini-2.5-pro=64000"
+CONTEXT_TOKEN_BUDGETS = {
+    name.strip(): int(value)
+    for name, value in (
+        item.split("=", 1) for item in os.getenv("CONTEXT_TOKEN_BUDGETS", "").split(",") if "=" in item
+    )
+}
+# How many past interactions the adapters load before packing them into the budget
+HISTORY_FETCH_LIMIT = int(os.getenv("HISTORY_FETCH_LIMIT", "20"))
+# Recent interactions kept in memory per user, and how many users' windows are kept
+HISTORY_CACHE_WINDOW = int(os.getenv("HISTORY_CACHE_WINDOW", str(HISTORY_FETCH_LIMIT)))
+HISTORY_CACHE_USERS = int(os.getenv("HISTORY_CACHE_USERS", "256"))
+
+# Model Routing Config
+# Seconds to wait on the chosen model before racing a duplicate request on the runner-up
+# (tool-free requests only). 0 disables hedging.
+HEDGE_AFTER = float(os.getenv("HEDGE_AFTER", "0"))
+
+# OAuth Token Config
+# Refresh the access token this many seconds before it expires, in the background
+TOKEN_REFRESH_MARGIN = float(os.getenv("TOKEN_REFRESH_MARGIN", "300"))
+
+# Scheduler Config
+# Model requests (each including its tool loop) allowed to run at once
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "4"))
+# Seconds a job may wait for a slot before it is shed, per priority class (0 waits forever)
+SCHEDULER_MAX_WAIT = {
+    "interactive": float(os.getenv("SCHEDULER_MAX_WAIT_INTERACTIVE", "120")),
+    "proactive": float(os.getenv("SCHEDULER_MAX_WAIT_PROACTIVE", "60")),
+    "background": float(os.getenv("SCHEDULER_MAX_WAIT_BACKGROUND", "0")),
+}
+
+# Metrics Config
+# Serve Prometheus-format metrics at http://METRICS_HOST:METRICS_PORT/metrics
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() == "true"
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9464"))
+
+# Tracing Config
+# Record per-request span waterfalls to TRACE_FILE; view with `python -m src.tracing`
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "false").lower() == "true"
+TRACE_FILE = STORAGE_DIR / "traces.jsonl"
+
+# SQLite Config
+SQLITE_CACHE_MB = int(os.getenv("SQLITE_CACHE_MB", "64")) # Page cache per connection
+SQLITE_MMAP_MB = int(os.getenv("SQLITE_MMAP_MB", "256")) # Memory-mapped I/O window
+
+# Interaction Log Config (write-behind batching)
+INTERACTION_BATCH_SIZE = int(os.getenv("INTERACTION_BATCH_SIZE", "32")) # Flush as soon as this many are queued
+INTERACTION_FLUSH_INTERVAL = float(os.getenv("INTERACTION_FLUSH_INTERVAL", "1.0")) # Seconds
+INTERACTION_MAX_PENDING = int(os.getenv("INTERACTION_MAX_PENDING", "10000")) # Oldest are dropped beyond this
+
+# Semantic Memory Config
+SEMANTIC_DIM = int(os.getenv("SEMANTIC_DIM", "256")) # Width of the offline hashing embedder
+SEMANTIC_DTYPE = os.getenv("SEMANTIC_DTYPE", "float16") # Stored vector precision: float16 or float32
+SEMANTIC_CHUNK_CHARS = int(os.getenv("SEMANTIC_CHUNK_CHARS", "800"))
+SEMANTIC_CHUNK_OVERLAP = int(os.getenv("SEMANTIC_CHUNK_OVERLAP", "100"))
+SEMANTIC_IVF_THRESHOLD = int(os.getenv("SEMANTIC_IVF_THRESHOLD", "20000")) # Chunks before the coarse index kicks in
+SEMANTIC_IVF_PROBES = int(os.getenv("SEMANTIC_IVF_PROBES", "8")) # Clusters scanned per query
+SEMANTIC_SYNC_INTERVAL = int(os.getenv("SEMANTIC_SYNC_INTERVAL", "60")) # Seconds between index refreshes
+SEMANTIC_RECALL = os.getenv("SEMANTIC_RECALL", "false").lower() == "true" # Inject related memories into prompts
+SEMANTIC_RECALL_K = int(os.getenv("SEMANTIC_RECALL_K", "3"))
+SEMANTIC_RECALL_MIN_SCORE = float(os.getenv("SEMANTIC_RECALL_MIN_SCORE", "0.35"))
+
+# Conversation Summary Config (older turns are compacted into a per-user summary)
+SUMMARY_ENABLED = os.getenv("SUMMARY_ENABLED", "true").lower() == "true"
+SUMMARY_INTERVAL = int(os.getenv("SUMMARY_INTERVAL", "1800")) # Seconds between compaction passes
+SUMMARY_MIN_BATCH = int(os.getenv("SUMMARY_MIN_BATCH", "10")) # Aged-out interactions needed to update a summary
+SUMMARY_MAX_BATCH = int(os.getenv("SUMMARY_MAX_BATCH", "50")) # Interactions folded in per model call
+SUMMARY_MAX_CHARS = int(os.getenv("SUMMARY_MAX_CHARS", "2000"))
+SUMMARY_MAX_WAIT = float(os.getenv("SUMMARY_MAX_WAIT", "30")) # Seconds queued for a slot before the job is shed
@@ -0,0 +1,109 @@
+import asyncio
+import hashlib
+import json
+import time
+from src.config.settings import CONTEXT_CACHE_MIN_TOKENS, CONTEXT_CACHE_TTL
+from src.ratelimit import estimate_tokens
+from src.response_cache import text_hash
+
+def context_hash(system_instruction, tools=None):
+    """Stable hash of the cacheable prefix (system prompt + tool declarations)."""
+    blob = json.dumps({"system": text_hash(system_instruction), "tools": tools or []}, sort_keys=True)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+def is_cache_error(error_msg):
+    """True if a request failed because its cached content is gone (expired or deleted server-side)."""
+    lowered = error_msg.lower()
+    return "cachedcontent" in lowered or "cached content" in lowered or "cached_content" in lowered
+
+class ContextCacheManager:
+    """Registers the system prompt and tool declarations with Gemini's cached-content API.
+
+    Caches are keyed per model by a hash of their content, so an unchanged prompt is uploaded
+    once and then referenced by name; a changed prompt replaces the old cache. Any failure
+    (unsupported model, prompt below the minimum size, network) returns None and callers send
+    the prompt inline as before. Only the native SDK client supports this; the GCA transport
+    always sends inline.
+    """
+
+    # Refresh the TTL this many seconds before the server would expire the cache
+    REFRESH_MARGIN = 300
+    # After a failed create, wait this long before trying the same content again
+    RETRY_AFTER = 600
+
+    def __init__(self, client, ttl=CONTEXT_CACHE_TTL, min_tokens=CONTEXT_CACHE_MIN_TOKENS):
+        self.client = client
+        self.ttl = int(ttl)
+        self.min_tokens = min_tokens
+        self._entries = {} # model -> {"hash", "name", "expires_at"}
+        self._failed = {} # (model, hash) -> retry_at
+        self._locks = {}
+
+    async def get(self, model, system_instruction, tools=None):
+        """Return the cached-content name to use for this prefix, or None to send it inline."""
+        if not self.client or not system_instruction:
+            return None
+        if estimate_tokens(system_instruction, tools) < self.min_tokens:
+            return None
+
+        digest = context_hash(system_instruction, tools)
+        if time.time() < self._failed.get((model, digest), 0):
+            return None
+
+        lock = self._locks.setdefault(model, asyncio.Lock())
+        async with lock:
+            entry = self._entries.get(model)
+            now = time.time()
+            if entry and entry["hash"] == digest:
+                if now < entry["expires_at"] - self.REFRESH_MARGIN:
+                    return entry["name"]
+                if now < entry["expires_at"] and await self._extend(entry):
+                    return entry["name"]
+            return await self._create(model, digest, system_instruction, tools)
+
+    async def _extend(self, entry):
+        try:
+            await self.client.aio.caches.update(name=entry["name"], config={"ttl": f"{self.ttl}s"})
+            entry["expires_at"] = time.time() + self.ttl
+            return True
+        except Exception as e:
+            print(f"Context cache refresh failed: {str(e)[:100]}")
+            return False
+
+    async def _create(self, model, digest, system_instruction, tools):
+        config = {
+            "system_instruction": system_instruction,
+            "ttl": f"{self.ttl}s",
+            "display_name": f"jovibe-{digest[:12]}",
+        }
+        if tools:
+            config["tools"] = tools
+        try:
+            cached = await self.client.aio.caches.create(model=model, config=config)
+        except Exception as e:
+            print(f"Context caching unavailable for {model}, sending prompt inline: {str(e)[:100]}")
+            self._failed[(model, digest)] = time.time() + self.RETRY_AFTER
+            return None
+
+        old = self._entries.get(model)
+        self._entries[model] = {"hash": digest, "name": cached.name, "expires_at": time.time() + self.ttl}
+        print(f"Registered context cache {cached.name} for {model}.")
+        if old and old["name"] != cached.name:
+            await self._delete(old["name"])
+        return cached.name
+
+    async def _delete(self, name):
+        try:
+            await self.client.aio.caches.delete(name=name)
+        except Exception as e:
+            print(f"Could not delete stale context cache {name}: {str(e)[:100]}")
+
+    def invalidate(self, model):
+        """Forget the cache for `model` (e.g. after the server reports it missing)."""
+        self._entries.pop(model, None)
+
+    async def close(self):
+        """Delete every cache we registered so they stop accruing storage cost."""
+        entries, self._entries = list(self._entries.values()), {}
+        for entry in entries:
+            await self._delete(entry["name"])
@@ -0,0 +1,100 @@
+from src.config.settings import CONTEXT_TOKEN_BUDGET, CONTEXT_TOKEN_BUDGETS
+from src.ratelimit import estimate_tokens
+
+def _role(message):
+    return message.get("role") if isinstance(message, dict) else getattr(message, "role", None)
+
+def _parts(message):
+    if isinstance(message, dict):
+        return message.get("parts", []) or []
+    return getattr(message, "parts", None) or []
+
+def _part_has(part, *keys):
+    if isinstance(part, dict):
+        return any(part.get(k) for k in keys)
+    return any(getattr(part, k, None) for k in keys)
+
+def is_function_call(message):
+    return any(_part_has(p, "functionCall", "function_call") for p in _parts(message))
+
+def is_function_response(message):
+    return any(_part_has(p, "functionResponse", "function_response") for p in _parts(message))
+
+class ContextPacker:
+    """Fits a conversation into a per-model token budget, newest messages first.
+
+    Messages are grouped so a model turn containing function calls always travels with the
+    function responses that answer it; dropping one half of that pair makes the API reject
+    the request. The latest user question is always kept.
+    """
+
+    MAX_CACHED = 4096
+
+    def __init__(self, budget=CONTEXT_TOKEN_BUDGET, budgets=None):
+        self.budget = budget
+        self.budgets = CONTEXT_TOKEN_BUDGETS if budgets is None else budgets
+        # id(message) -> (message, tokens); the message reference keeps the id from being reused
+        self._token_cache = {}
+
+    def budget_for(self, model):
+        return self.budgets.get(model, self.budget)
+
+    def count(self, message):
+        """Estimated tokens for one message, memoized for the lifetime of the message object."""
+        cached = self._token_cache.get(id(message))
+        if cached is not None and cached[0] is message:
+            return cached[1]
+        tokens = estimate_tokens(message)
+        if len(self._token_cache) >= self.MAX_CACHED:
+            self._token_cache.clear()
+        self._token_cache[id(message)] = (message, tokens)
+        return tokens
+
+    def _groups(self, messages):
+        """Split messages into atomic groups: call turns are joined with their responses."""
+        groups = []
+        for message in messages:
+            if groups and is_function_response(message) and is_function_call(groups[-1][-1]):
+                groups[-1].append(message)
+            else:
+                groups.append([message])
+        return groups
+
+    def pack(self, messages, model=None, budget=None, reserve=0):
+        """Return the newest messages that fit in the budget (minus `reserve` for system prompt/tools)."""
+        if not isinstance(messages, list):
+            return messages
+        budget = budget if budget is not None else self.budget_for(model)
+        groups = self._groups(messages)
+
+        # The newest plain user message is the question being answered; it is never dropped
+        pinned = len(groups) - 1
+        for index in range(len(groups) - 1, -1, -1):
+            first = groups[index][0]
+            if _role(first) == "user" and not is_function_response(first):
+                pinned = index
+                break
+
+        sizes = [sum(self.count(m) for m in group) for group in groups]
+        total = reserve + sizes[pinned]
+        selected = {pinned}
+        for index in range(len(groups) - 1, -1, -1):
+            if index == pinned:
+                continue
+            if total + sizes[index] > budget:
+                break
+            total += sizes[index]
+            selected.add(index)
+
+        if total > budget:
+            print(f"Warning: latest message alone exceeds the {budget}-token context budget.")
+
+        kept = [groups[i] for i in sorted(selected)]
+        # History must open with a user turn
+        while len(kept) > 1 and _role(kept[0][0]) != "user":
+            kept.pop(0)
+
+        packed = [m for group in kept for m in group]
+        if len(packed) < len(messages):
+            print(f"Packed context: kept {len(packed)}/{len(messages)} messages (~{total} tokens).")
+        return packed
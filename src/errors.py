@@ -0,0 +1,103 @@
+import asyncio
+import json
+import re
+import aiohttp
+from src.context_cache import is_cache_error
+from src.ratelimit import parse_retry_delay
+
+# Error kinds used by the brain and the circuit breakers
+QUOTA = "quota" # 429 / RESOURCE_EXHAUSTED: back off until the quota resets
+REJECTED = "rejected" # 404 / 403 on the model: this model will not serve us
+INVALID = "invalid" # Other 400/403: the request itself is bad, so no model would take it
+SERVER = "server" # 5xx / 408: transient provider trouble
+NETWORK = "network" # We could not reach the provider at all
+CACHE = "cache" # Our server-side context cache expired; not the model's fault
+UNKNOWN = "unknown"
+
+class LLMError(RuntimeError):
+    """A failed model request with its HTTP status and any retry hint the server sent."""
+
+    def __init__(self, message, status=None, reason=None, retry_after=None, kind=None):
+        super().__init__(message)
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+        self.kind = kind or _kind_for(status, reason, message)
+
+    @classmethod
+    def from_response(cls, status, body, prefix="GCA Error"):
+        """Build an error from an HTTP status and the JSON (or text) error body."""
+        reason, retry_after = _parse_error_body(body)
+        return cls(f"{prefix} {status}: {body}", status=status, reason=reason, retry_after=retry_after)
+
+class ToolTurnError(RuntimeError):
+    """A streaming request that failed after it had already run tool calls.
+
+    Replaying it on another model would run those tools (and their side effects) twice.
+    """
+
+    def __init__(self, error):
+        super().__init__(str(error))
+        self.error = error
+
+def _kind_for(status, reason, message):
+    if is_cache_error(message or ""):
+        return CACHE
+    if status == 429 or reason == "RESOURCE_EXHAUSTED":
+        return QUOTA
+    if status == 404 or reason == "NOT_FOUND":
+        return REJECTED
+    if status == 403 and "model" in (message or "").lower():
+        return REJECTED
+    if status in (400, 403):
+        return INVALID
+    if status == 408 or (status is not None and status >= 500):
+        return SERVER
+    return UNKNOWN
+
+def _retry_delay_from_details(details):
+    """Find RetryInfo.retryDelay or metadata.quotaResetDelay in a google.rpc error details list."""
+    for detail in details or []:
+        if not isinstance(detail, dict):
+            continue
+        delay = detail.get("retryDelay") or (detail.get("metadata") or {}).get("quotaResetDelay")
+        if delay:
+            match = re.match(r"([\d.]+)", str(delay))
+            if match:
+                return float(match.group(1))
+    return None
+
+def _parse_error_body(body):
+    """Return (reason, retry_after) from a Google API error body."""
+    payload = body
+    if isinstance(body, str):
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return None, parse_retry_delay(body)
+    if isinstance(payload, list) and payload:
+        payload = payload[0]
+    error = payload.get("error", payload) if isinstance(payload, dict) else {}
+    retry_after = _retry_delay_from_details(error.get("details"))
+    if retry_after is None:
+        retry_after = parse_retry_delay(json.dumps(error))
+    return error.get("status"), retry_after
+
+def classify_error(exc):
+    """Turn any exception from a model call into an LLMError with a kind and retry hint."""
+    exc = getattr(exc, "error", exc) # Unwrap ModelCallError / ToolTurnError
+    if isinstance(exc, LLMError):
+        return exc
+    try:
+        from google.genai import errors as genai_errors
+    except ImportError:
+        genai_errors = None
+    if genai_errors and isinstance(exc, genai_errors.APIError):
+        reason, retry_after = _parse_error_body(exc.details)
+        return LLMError(str(exc), status=exc.code, reason=exc.status or reason, retry_after=retry_after)
+    if isinstance(exc, (aiohttp.ClientError, asyncio.TimeoutError, ConnectionError)):
+        return LLMError(f"Network error: {str(exc)}", kind=NETWORK)
+    message = str(exc)
+    if "429" in message or "RESOURCE_EXHAUSTED" in message:
+        return LLMError(message, status=429, retry_after=parse_retry_delay(message))
+    return LLMError(message)
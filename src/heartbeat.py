@@ -1,10 +1,11 @@
 import asyncio
 import os
-import time
 from datetime import datetime
 from src.config.settings import HEARTBEAT_FILE
 from src.llm import GeminiBrain
 from src.memory.manager import SoulManager
+from src.router import HEARTBEAT
+from src.scheduler import PROACTIVE
 
 class HeartbeatManager:
     def __init__(self, brain: GeminiBrain, soul: SoulManager):
@@ -22,12 +23,15 @@ class HeartbeatManager:
 
     async def pulse(self):
         """Perform a single heartbeat check with optimized payload."""
-        # QUOTA PROTECTION: Check if models are currently cooling down
-        active_model = self.brain._current_model
-        if active_model in self.brain._cooldowns:
-            if time.time() < self.brain._cooldowns[active_model]:
-                print(f"Heartbeat: Model {active_model} is cooling down. Skipping pulse to save quota.")
-                return
+        # QUOTA PROTECTION: Skip the pulse if no model is available for background work
+        active_model = self.brain.router.select(HEARTBEAT)
+        if active_model is None:
+            print("Heartbeat: Every model circuit breaker is open. Skipping pulse to save quota.")
+            return
+        # Leave the current quota window to interactive users if it is already saturated
+        if self.brain.limiter.delay(active_model) > 0:
+            print(f"Heartbeat: Model {active_model} is at its rate limit. Skipping pulse.")
+            return
 
         print(f"[{datetime.now()}] Pulse initiated...")
         
@@ -57,7 +61,7 @@ Your goal is to decide if any of these specific tasks require immediate proactiv
 - Do not perform "general maintenance" or "status checks" unless specifically tasked.
 """
         # PASSING tools=[] to strictly forbid tool-calling during heartbeat
-        response = await self.brain.generate_response(prompt, tools=[])
+        response = await self.brain.generate_response(prompt, tools=[], request_class=HEARTBEAT, priority=PROACTIVE)
         
         if response.startswith("Error:"):
             print(f"Heartbeat pulse failed: {response}")
@@ -69,7 +73,7 @@ Your goal is to decide if any of these specific tasks require immediate proactiv
             print(f"Heartbeat action required: {response}")
             # Here we would parse the response and dispatch messages to adapters.
             # For now, we'll log it.
-            self.soul.log_interaction("heartbeat", "system", "TASK_CHECK", response)
+            await self.soul.log_interaction("heartbeat", "system", "TASK_CHECK", response)
 
     def _read_heartbeat_tasks(self):
         if os.path.exists(HEARTBEAT_FILE):
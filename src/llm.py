@@ -1,30 +1,73 @@
 import aiohttp
 import asyncio
+import json
 import os
 import uuid
 import time
-import re
+from urllib.parse import urlsplit
 from google import genai
-from google.auth.transport.requests import Request
-from src.auth import AuthManager
-from src.config.settings import GEMINI_MODEL, GEMINI_API_KEY
+from google.genai import types
+from src.auth import AuthManager, TokenManager, write_atomic
+from src.errors import CACHE, INVALID, NETWORK, QUOTA, REJECTED, LLMError, ToolTurnError, classify_error
+from src.metrics import MODEL_ERRORS, MODEL_REQUEST_SECONDS, MODEL_TURN_SECONDS, RESPONSE_CACHE
+from src.ratelimit import RateLimiter, estimate_tokens
+from src.response_cache import ResponseCache, request_fingerprint
+from src.config.settings import (
+    GEMINI_API_KEY, GCA_BASE_URL, GCA_PROJECT_FILE, RESPONSE_CACHE_ENABLED, RESPONSE_CACHE_TOOL_CALLS,
+    CONTEXT_CACHE_ENABLED
+)
+from src.context_cache import ContextCacheManager
+from src.context_packer import ContextPacker
+from src.router import HEARTBEAT, INTERACTIVE, ModelCallError, ModelRouter
+from src.scheduler import PROACTIVE, JobShed, Scheduler
+from src.tracing import span
 from src.skills.registry import SkillRegistry
+from src.utils.http_pool import get_http_pool
+from src.utils.singleflight import SingleFlight
 import src.skills  # noqa: F401 # Import the package to trigger __init__.py and load all skills
 
+def tool_response(result, cached=False):
+    """The functionResponse body for a tool result, flagging results served from the skill cache."""
+    response = {"result": str(result)[:3000]}
+    if cached:
+        response["cached"] = True
+    return response
+
 class CodeAssistTransport:
     """A custom transport to hit the Google Code Assist (GCA) 'free' endpoint."""
     
-    BASE_URL = "https://cloudcode-pa.googleapis.com/v1internal"
+    BASE_URL = GCA_BASE_URL
 
-    def __init__(self, auth_manager):
+    def __init__(self, auth_manager, http_pool=None, limiter=None, packer=None, token_manager=None, base_url=None):
         self.auth_manager = auth_manager
-        self.project_id = os.getenv("GOOGLE_CLOUD_PROJECT") or os.getenv("GOOGLE_CLOUD_PROJECT_ID")
+        self.base_url = (base_url or self.BASE_URL).rstrip("/")
+        self.token_manager = token_manager or TokenManager(auth_manager)
+        self.http_pool = http_pool or get_http_pool()
+        self.limiter = limiter or RateLimiter()
+        self.packer = packer or ContextPacker()
+        self.project_id = (
+            os.getenv("GOOGLE_CLOUD_PROJECT") or os.getenv("GOOGLE_CLOUD_PROJECT_ID") or self._load_project_id()
+        )
         self.session_id = str(uuid.uuid4())
         self.cli_version = "0.30.0-nightly.20260210.a2174751d"
 
+    def _load_project_id(self):
+        """Project ID discovered on a previous run, so onboarding can be skipped."""
+        try:
+            with open(GCA_PROJECT_FILE, "r") as f:
+                return json.load(f).get("cloudaicompanionProject")
+        except (OSError, ValueError):
+            return None
+
+    def _save_project_id(self, project_id):
+        try:
+            write_atomic(GCA_PROJECT_FILE, json.dumps({"cloudaicompanionProject": project_id}))
+        except OSError as e:
+            print(f"Could not cache GCA Project ID: {str(e)}")
+
     async def _onboard(self, token):
         """Discover the cloudaicompanionProject ID used by this account."""
-        url = f"{self.BASE_URL}:loadCodeAssist"
+        url = f"{self.base_url}:loadCodeAssist"
         payload = {
             "cloudaicompanionProject": self.project_id,
             "metadata": {
@@ -39,32 +82,89 @@ class CodeAssistTransport:
             "User-Agent": f"GeminiCLI/{self.cli_version}/gemini-3-flash-preview (linux; aarch64)"
         }
         
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.post(url, json=payload, headers=headers) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        discovered = data.get("cloudaicompanionProject")
+        session = self.http_pool.session()
+        try:
+            async with session.post(url, json=payload, headers=headers, timeout=aiohttp.ClientTimeout(total=30)) as resp:
+                if resp.status == 200:
+                    data = await resp.json()
+                    discovered = data.get("cloudaicompanionProject")
+                    if discovered:
+                        if isinstance(discovered, dict):
+                            discovered = discovered.get("id")
                         if discovered:
-                            if isinstance(discovered, dict):
-                                discovered = discovered.get("id")
-                            if discovered:
-                                print(f"Discovered GCA Project ID: {discovered}")
-                                self.project_id = discovered
-                                return discovered
-            except Exception as e:
-                print(f"Onboarding network error: {str(e)}")
+                            print(f"Discovered GCA Project ID: {discovered}")
+                            self.project_id = discovered
+                            self._save_project_id(discovered)
+                            return discovered
+        except Exception as e:
+            print(f"Onboarding network error: {str(e)}")
         return self.project_id
 
-    async def generate_content(self, model, prompt, system_instruction=None, tools=None):
-        """Send a request to the cloudcode-pa endpoint with recursive tool-calling support."""
-        creds = self.auth_manager.get_credentials()
-        if not creds.valid:
-            creds.refresh(Request())
-        
-        token = creds.token
+    async def _prepare(self):
+        """Return a valid OAuth token, onboarding the project on first use."""
+        token = await self.token_manager.token()
         if not self.project_id:
             await self._onboard(token)
+        return token
+
+    def _build_request(self, token, model, messages, system_instruction=None, tools=None):
+        """Build the GCA payload and headers for a single model turn."""
+        payload = {
+            "model": model,
+            "user_prompt_id": str(uuid.uuid4()),
+            "request": {
+                "contents": messages,
+                "generationConfig": {
+                    "temperature": 0.7,
+                    "maxOutputTokens": 4096
+                },
+                "session_id": self.session_id
+            }
+        }
+        
+        if self.project_id:
+            payload["project"] = self.project_id
+        if system_instruction:
+            payload["request"]["systemInstruction"] = {
+                "role": "system",
+                "parts": [{"text": system_instruction}]
+            }
+        
+        # Tools logic: only add if tools is provided and not empty
+        if tools:
+            gca_tools = []
+            for t in tools:
+                gca_tools.extend(t.get("function_declarations", []))
+            if gca_tools:
+                payload["request"]["tools"] = [{"function_declarations": gca_tools}]
+
+        headers = {
+            "Authorization": f"Bearer {token}",
+            "Content-Type": "application/json",
+            "User-Agent": f"GeminiCLI/{self.cli_version}/{model.replace('models/', '')} (linux; aarch64)"
+        }
+        return payload, headers
+
+    async def _execute_tool_calls(self, tool_calls):
+        """Run the model's function calls (reads concurrently, writes in order) and build the functionResponse parts."""
+        calls = [(tc.get("name"), tc.get("args", {})) for tc in tool_calls]
+        for name, args in calls:
+            print(f"Executing tool: {name}({args})")
+        results = await SkillRegistry().execute_many(calls, report_cache=True)
+        
+        return [
+            {
+                "functionResponse": {
+                    "name": name,
+                    "response": tool_response(result, cached)
+                }
+            }
+            for (name, _), (result, cached) in zip(calls, results)
+        ]
+
+    async def generate_content(self, model, prompt, system_instruction=None, tools=None):
+        """Send a request to the cloudcode-pa endpoint with recursive tool-calling support."""
+        token = await self._prepare()
         
         # Support list-based prompts (turns) or string prompts
         if isinstance(prompt, list):
@@ -73,104 +173,128 @@ class CodeAssistTransport:
             messages = [{"role": "user", "parts": [{"text": prompt}]}]
         
         for turn in range(10): # Increased recursion limit
-            # QUOTA PROTECTION: Truncate tool history if it gets too long
-            if len(messages) > 10:
-                # Keep the original prompt [0] and the 6 most recent messages
-                messages = [messages[0]] + messages[-6:]
-                print(f"Truncated tool history to stay under quota (Turn {turn})")
+            current_model = model
+            # QUOTA PROTECTION: Fit the conversation (with call/response pairs intact) into the token budget
+            reserve = estimate_tokens(system_instruction, tools)
+            messages = self.packer.pack(messages, current_model, reserve=reserve)
+            payload, headers = self._build_request(token, current_model, messages, system_instruction, tools)
+            await self.limiter.acquire(current_model, reserve + sum(self.packer.count(m) for m in messages))
 
-            current_model = os.getenv("GEMINI_MODEL", model)
-            
-            payload = {
-                "model": current_model,
-                "user_prompt_id": str(uuid.uuid4()),
-                "request": {
-                    "contents": messages,
-                    "generationConfig": {
-                        "temperature": 0.7,
-                        "maxOutputTokens": 4096
-                    },
-                    "session_id": self.session_id
-                }
-            }
-            
-            if self.project_id:
-                payload["project"] = self.project_id
-            if system_instruction:
-                payload["request"]["systemInstruction"] = {
-                    "role": "system",
-                    "parts": [{"text": system_instruction}]
-                }
-            
-            # Tools logic: only add if tools is provided and not empty
-            if tools:
-                gca_tools = []
-                for t in tools:
-                    gca_tools.extend(t.get("function_declarations", []))
-                if gca_tools:
-                    payload["request"]["tools"] = [{"function_declarations": gca_tools}]
-
-            headers = {
-                "Authorization": f"Bearer {token}",
-                "Content-Type": "application/json",
-                "User-Agent": f"GeminiCLI/{self.cli_version}/{current_model.replace('models/', '')} (linux; aarch64)"
-            }
-
-            async with aiohttp.ClientSession() as session:
-                endpoint = f"{self.BASE_URL}:generateContent"
-                try:
+            session = self.http_pool.session()
+            endpoint = f"{self.base_url}:generateContent"
+            try:
+                with MODEL_TURN_SECONDS.time(model=current_model), span("generate_content", model=current_model):
                     async with session.post(endpoint, json=payload, headers=headers) as resp:
+                        self.limiter.update_from_headers(current_model, resp.headers)
                         if resp.status != 200:
                             error_text = await resp.text()
-                            raise RuntimeError(f"GCA Error {resp.status}: {error_text}")
+                            raise LLMError.from_response(resp.status, error_text)
                         
                         data = await resp.json()
-                        res_data = data.get("response", {})
-                        candidates = res_data.get("candidates", [])
-                        if not candidates:
-                            # Instead of a hard error, try to return whatever text we have or fallback
-                            raise RuntimeError(f"Error: No candidates in GCA response. Prompt tokens: {res_data.get('usageMetadata', {}).get('promptTokenCount')}")
-                        
-                        candidate = candidates[0]
-                        content = candidate.get("content", {})
-                        parts = content.get("parts", [])
-                        messages.append(content)
-                        
-                        tool_calls = [p.get("functionCall") for p in parts if p.get("functionCall")]
-                        if not tool_calls:
-                            text_parts = [p.get("text") for p in parts if p.get("text")]
-                            return "".join(text_parts) if text_parts else "No text returned."
-                        
-                        # Only execute if tools were actually allowed
-                        if not tools:
-                            return "Error: AI attempted tool call but tools are disabled."
-
-                        registry = SkillRegistry()
-                        responses_parts = []
-                        for tc in tool_calls:
-                            name = tc.get("name")
-                            args = tc.get("args", {})
-                            print(f"Executing tool: {name}({args})")
-                            try:
-                                result = await registry.execute(name, args)
-                            except Exception as te:
-                                result = f"Tool Error: {str(te)}"
-                            
-                            responses_parts.append({
-                                "functionResponse": {
-                                    "name": name,
-                                    "response": {"result": str(result)[:3000]}
-                                }
-                            })
-                        
-                        messages.append({"role": "function", "parts": responses_parts})
-                        # QUOTA PROTECTION: 10 second delay between turns
-                        await asyncio.sleep(10.0)
-                except aiohttp.ClientError as ce:
-                    raise RuntimeError(f"Network error connecting to GCA: {str(ce)}")
+            except aiohttp.ClientError as ce:
+                raise LLMError(f"Network error connecting to GCA: {str(ce)}", kind=NETWORK)
+
+            res_data = data.get("response", {})
+            candidates = res_data.get("candidates", [])
+            if not candidates:
+                # Instead of a hard error, try to return whatever text we have or fallback
+                raise RuntimeError(f"Error: No candidates in GCA response. Prompt tokens: {res_data.get('usageMetadata', {}).get('promptTokenCount')}")
+            
+            candidate = candidates[0]
+            content = candidate.get("content", {})
+            parts = content.get("parts", [])
+            messages.append(content)
+            
+            tool_calls = [p.get("functionCall") for p in parts if p.get("functionCall")]
+            if not tool_calls:
+                text_parts = [p.get("text") for p in parts if p.get("text")]
+                return "".join(text_parts) if text_parts else "No text returned."
+            
+            # Only execute if tools were actually allowed
+            if not tools:
+                return "Error: AI attempted tool call but tools are disabled."
+
+            responses_parts = await self._execute_tool_calls(tool_calls)
+            messages.append({"role": "function", "parts": responses_parts})
         
         return "Error: Maximum tool-call recursion reached."
 
+    async def _iter_sse(self, resp):
+        """Yield the JSON payload of each server-sent event in a streaming response."""
+        data_lines = []
+        async for raw in resp.content:
+            line = raw.decode("utf-8").rstrip("\r\n")
+            if line.startswith("data:"):
+                data_lines.append(line[5:].strip())
+            elif not line and data_lines:
+                yield json.loads("\n".join(data_lines))
+                data_lines = []
+        if data_lines:
+            yield json.loads("\n".join(data_lines))
+
+    async def stream_content(self, model, prompt, system_instruction=None, tools=None):
+        """Stream text deltas from :streamGenerateContent, running tool calls between turns."""
+        token = await self._prepare()
+        
+        if isinstance(prompt, list):
+            messages = list(prompt)
+        else:
+            messages = [{"role": "user", "parts": [{"text": prompt}]}]
+        
+        tools_ran = False
+        try:
+            for turn in range(10):
+                current_model = model
+                reserve = estimate_tokens(system_instruction, tools)
+                messages = self.packer.pack(messages, current_model, reserve=reserve)
+                payload, headers = self._build_request(token, current_model, messages, system_instruction, tools)
+                await self.limiter.acquire(current_model, reserve + sum(self.packer.count(m) for m in messages))
+
+                session = self.http_pool.session()
+                endpoint = f"{self.base_url}:streamGenerateContent?alt=sse"
+                parts = []
+                try:
+                    with MODEL_TURN_SECONDS.time(model=current_model), span("generate_content", model=current_model):
+                        async with session.post(endpoint, json=payload, headers=headers) as resp:
+                            self.limiter.update_from_headers(current_model, resp.headers)
+                            if resp.status != 200:
+                                error_text = await resp.text()
+                                raise LLMError.from_response(resp.status, error_text)
+                    
+                            async for chunk in self._iter_sse(resp):
+                                candidates = chunk.get("response", {}).get("candidates", [])
+                                if not candidates:
+                                    continue
+                                for part in candidates[0].get("content", {}).get("parts", []):
+                                    if part.get("text"):
+                                        yield part["text"]
+                                    # Merge consecutive text deltas back into a single part for the history
+                                    if parts and set(part) == {"text"} and set(parts[-1]) == {"text"}:
+                                        parts[-1] = {"text": parts[-1]["text"] + part["text"]}
+                                    else:
+                                        parts.append(part)
+                except aiohttp.ClientError as ce:
+                    raise LLMError(f"Network error connecting to GCA: {str(ce)}", kind=NETWORK)
+
+                messages.append({"role": "model", "parts": parts})
+                tool_calls = [p.get("functionCall") for p in parts if p.get("functionCall")]
+                if not tool_calls:
+                    return
+            
+                if not tools:
+                    yield "Error: AI attempted tool call but tools are disabled."
+                    return
+
+                responses_parts = await self._execute_tool_calls(tool_calls)
+                tools_ran = True
+                messages.append({"role": "function", "parts": responses_parts})
+        except Exception as e:
+            if tools_ran:
+                raise ToolTurnError(e) from e
+            raise
+        
+        yield "Error: Maximum tool-call recursion reached."
+
 class GeminiBrain:
     MODEL_HIERARCHY = [
         "gemini-3-flash-preview",
@@ -182,14 +306,19 @@ class GeminiBrain:
 
     def __init__(self):
         self.auth_manager = AuthManager()
+        self.token_manager = TokenManager(self.auth_manager)
         self.client = None
         self.gca_transport = None
         self.registry = SkillRegistry()
-        self._current_model = os.getenv("GEMINI_MODEL", GEMINI_MODEL)
-        self._last_request_time = 0
-        self._throttle_delay = 10.0 # 10s delay between tasks
-        self._cooldowns = {} 
-        self._consecutive_failures = 0
+        self.http_pool = get_http_pool()
+        self.limiter = RateLimiter() # Shared quota pacing for every caller and tool turn
+        self.packer = ContextPacker()
+        self.router = ModelRouter(self.MODEL_HIERARCHY, self.limiter)
+        self.response_cache = ResponseCache() if RESPONSE_CACHE_ENABLED else None
+        self.context_cache = None
+        self.scheduler = Scheduler() # Priority and per-user fair admission for all model work
+        self._flights = SingleFlight() # Coalesces concurrent identical generate_response calls
+        self._current_model = self.router.preferred() # Model used by the most recent request
 
     def initialize(self):
         """Initialize the Gemini Client or GCA Transport."""
@@ -197,135 +326,244 @@ class GeminiBrain:
         if api_key:
             print("Initializing Gemini Client with API Key...")
             self.client = genai.Client(api_key=api_key)
+            if CONTEXT_CACHE_ENABLED:
+                self.context_cache = ContextCacheManager(self.client)
         else:
             print("Initializing GCA Transport with OAuth...")
-            self.gca_transport = CodeAssistTransport(self.auth_manager)
-
-    async def _throttle(self):
-        """Ensure independent requests don't happen too close together."""
-        now = time.time()
-        elapsed = now - self._last_request_time
-        if elapsed < self._throttle_delay:
-            wait = self._throttle_delay - elapsed
-            print(f"Throttling: Waiting {wait:.1f}s...")
-            await asyncio.sleep(wait)
-        self._last_request_time = time.time()
-
-    async def generate_response(self, prompt, system_instruction=None, retries=3, tools=None):
-        """Generate a response with circuit-breaker and intelligent fallback."""
+            self.gca_transport = CodeAssistTransport(
+                self.auth_manager, self.http_pool, self.limiter, self.packer, self.token_manager
+            )
+
+    async def start(self):
+        """Pre-warm pooled connections so the first user message skips TCP+TLS setup."""
+        if not self.client and not self.gca_transport:
+            self.initialize()
+        if self.gca_transport:
+            origin = urlsplit(self.gca_transport.base_url)
+            await self.http_pool.warm([f"{origin.scheme}://{origin.netloc}"])
+            try:
+                await self.token_manager.start()
+            except Exception as e:
+                print(f"Could not load OAuth credentials at startup: {str(e)}")
+
+    async def close(self):
+        """Release pooled HTTP connections and cache handles on shutdown."""
+        await self.token_manager.close()
+        await self.http_pool.close()
+        if self.response_cache:
+            self.response_cache.close()
+        if self.context_cache:
+            await self.context_cache.close()
+
+    async def _client_config(self, model, system_instruction, tools):
+        """Build the SDK request config, referencing a server-side context cache when available."""
+        if self.context_cache:
+            cached_name = await self.context_cache.get(model, system_instruction, tools)
+            if cached_name:
+                # System prompt and tool declarations already live in the cache
+                return {"cached_content": cached_name}
+        config = {"tools": tools} if tools else {}
+        if system_instruction:
+            config["system_instruction"] = system_instruction
+        return config
+
+    def _should_cache(self, tools, cache):
+        """Whether this request's response may be served from / stored in the response cache."""
+        if self.response_cache is None or cache is False:
+            return False
+        return not tools or bool(cache or RESPONSE_CACHE_TOOL_CALLS)
+
+    @staticmethod
+    def _is_cacheable_result(response):
+        return bool(response) and not response.startswith(("Error:", "Quota reached", "No text returned."))
+
+    async def generate_response(self, prompt, system_instruction=None, retries=3, tools=None, cache=None,
+                                request_class=INTERACTIVE, priority=None, user_id=None, deadline=None):
+        """Generate a response, serving exact repeats from the response cache.
+
+        cache=None caches tool-free requests only, True forces caching, False bypasses the cache.
+        request_class ('interactive' or 'heartbeat') decides how the router ranks models.
+        priority ('interactive', 'proactive', 'background'; derived from request_class if None),
+        user_id and deadline decide when the scheduler admits the request.
+        Concurrent identical requests share a single model call and its result.
+        """
         if not self.client and not self.gca_transport:
             self.initialize()
-        
-        if self._consecutive_failures >= len(self.MODEL_HIERARCHY):
-            print("CIRCUIT BREAKER: API exhaustion. Sleeping 5 mins...")
-            self._consecutive_failures = 0
-            await asyncio.sleep(300) 
-            return "Error: System-wide API exhaustion. Pausing for 5 minutes."
-
-        await self._throttle()
-        self._current_model = os.getenv("GEMINI_MODEL", self._current_model)
         
         # Tools decision: None means use registry, empty list means no tools
         final_tools = self.registry.get_tool_schemas() if tools is None else tools
 
-        for attempt in range(retries):
-            if self._current_model in self._cooldowns:
-                if time.time() < self._cooldowns[self._current_model]:
-                    if self._fallback_model():
-                        continue
-                    else:
-                        break
+        fingerprint = request_fingerprint(self.router.preferred(), prompt, system_instruction, final_tools)
+        cache_key = fingerprint if self._should_cache(final_tools, cache) else None
+        if cache_key:
+            cached = await self.response_cache.get(cache_key)
+            RESPONSE_CACHE.inc(result="miss" if cached is None else "hit")
+            if cached is not None:
+                print("Response cache hit.")
+                return cached
+
+        if priority is None:
+            priority = PROACTIVE if request_class == HEARTBEAT else INTERACTIVE
 
+        async def generate():
             try:
-                if self.client:
-                    config = {"tools": final_tools} if final_tools else {}
-                    if system_instruction:
-                        config["system_instruction"] = system_instruction
+                async with self.scheduler.slot(priority, user_id, deadline):
+                    response = await self._generate(prompt, system_instruction, retries, final_tools, request_class)
+            except JobShed as e:
+                print(f"Scheduler shed a {priority} request: {e}")
+                return f"Error: The agent is overloaded. {e}"
+            if cache_key and self._is_cacheable_result(response):
+                await self.response_cache.set(cache_key, response)
+            return response
+
+        if (request_class, fingerprint) in self._flights:
+            print("Joining an identical in-flight request.")
+        return await self._flights.do((request_class, fingerprint), generate)
+
+    async def _call_model(self, model, prompt, system_instruction, final_tools):
+        """Run one full request (including tool turns) on `model`, feeding the router's stats."""
+        started = time.monotonic()
+        try:
+            if self.client:
+                config = await self._client_config(model, system_instruction, final_tools)
+                reserve = estimate_tokens(system_instruction, final_tools)
+                contents = self.packer.pack(prompt, model, reserve=reserve)
+                await self.limiter.acquire(model, reserve + estimate_tokens(contents))
+                with MODEL_TURN_SECONDS.time(model=model), span("generate_content", model=model):
                     response = await self.client.aio.models.generate_content(
-                        model=self._current_model, contents=prompt, config=config
+                        model=model, contents=contents, config=config
                     )
-                    self._consecutive_failures = 0
-                    
-                    # NEW SDK HANDLING: Access the first candidate's content
-                    if not response.candidates:
-                        return "Error: No candidates in response."
-                    
-                    candidate = response.candidates[0]
-                    content = candidate.content
+                
+                # NEW SDK HANDLING: Access the first candidate's content
+                if not response.candidates:
+                    result = "Error: No candidates in response."
+                else:
+                    content = response.candidates[0].content
                     
                     # Handle tool calls if they exist in the response
                     parts = content.parts
                     tool_calls = [p.function_call for p in parts if p.function_call]
                     
                     if tool_calls:
-                        # Recursive tool execution (simplified for this context)
-                        # The client handles most of this if we use a Chat session, 
-                        # but here we are using generate_content directly.
-                        # For now, let's extract the text and execute tools if needed.
-                        # Or ideally, use the same logic as GCA transport for consistency.
-                        return await self._handle_client_tool_calls(prompt, system_instruction, final_tools, content)
-                    
-                    # Return concatenated text from all text parts
-                    text_parts = [p.text for p in parts if p.text]
-                    return "".join(text_parts) if text_parts else "No text returned."
-                else:
-                    result = await self.gca_transport.generate_content(
-                        model=self._current_model, prompt=prompt, system_instruction=system_instruction, tools=final_tools
-                    )
-                    self._consecutive_failures = 0
-                    return result
+                        result = await self._handle_client_tool_calls(
+                            model, prompt, system_instruction, final_tools, content
+                        )
+                    else:
+                        # Return concatenated text from all text parts
+                        text_parts = [p.text for p in parts if p.text]
+                        result = "".join(text_parts) if text_parts else "No text returned."
+            else:
+                result = await self.gca_transport.generate_content(
+                    model=model, prompt=prompt, system_instruction=system_instruction, tools=final_tools
+                )
+        except asyncio.CancelledError:
+            # Lost a hedge race: the model was at least this slow
+            self.router.record_latency(model, time.monotonic() - started)
+            raise
+        except Exception as e:
+            error = classify_error(e)
+            self.router.record_failure(model, time.monotonic() - started, error)
+            MODEL_REQUEST_SECONDS.observe(time.monotonic() - started, model=model, outcome="error")
+            MODEL_ERRORS.inc(model=model, kind=error.kind)
+            raise ModelCallError(model, e) from e
+        self.router.record_success(model, time.monotonic() - started)
+        MODEL_REQUEST_SECONDS.observe(time.monotonic() - started, model=model, outcome="ok")
+        return result
+
+    async def _hedged_call(self, model, prompt, system_instruction, final_tools, request_class=INTERACTIVE):
+        """Call `model`; if it is slower than hedge_after, race the runner-up and take the first answer.
+
+        Only tool-free requests are hedged, since a duplicate tool loop could repeat side effects.
+        """
+        hedge_after = self.router.hedge_after
+        if not hedge_after or final_tools:
+            return await self._call_model(model, prompt, system_instruction, final_tools)
+
+        primary = asyncio.create_task(self._call_model(model, prompt, system_instruction, final_tools))
+        pending = {primary}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=hedge_after)
+            if done:
+                return primary.result()
+
+            runner_up = self.router.acquire(request_class, exclude={model})
+            if runner_up:
+                print(f"Hedging: {model} slower than {hedge_after}s, also asking {runner_up}...")
+                pending.add(asyncio.create_task(
+                    self._call_model(runner_up, prompt, system_instruction, final_tools)
+                ))
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # Cancel the losing (or abandoned) request
+            for task in pending:
+                task.cancel()
+
+    async def _generate(self, prompt, system_instruction, retries, final_tools, request_class=INTERACTIVE):
+        """Generate a response, falling back across models whose circuit breakers are closed.
+
+        Failing models are skipped by their breakers instead of sleeping in the request path, so
+        when every model is down the caller gets an immediate error with the expected retry time.
+        """
+        error = None
+        for attempt in range(retries):
+            model = self.router.acquire(request_class)
+            if not model:
+                retry_in = self.router.retry_in()
+                print(f"No model available; first breaker half-opens in {retry_in:.0f}s.")
+                if error and error.kind == QUOTA:
+                    return f"Quota reached. (Error: {error})"
+                return f"Error: All models are temporarily unavailable. Retry in {retry_in:.0f}s."
+            self._current_model = model
+
+            try:
+                return await self._hedged_call(model, prompt, system_instruction, final_tools, request_class)
             except Exception as e:
-                error_msg = str(e)
-                self._consecutive_failures += 1
+                error = classify_error(e)
+                model = e.model if isinstance(e, ModelCallError) else model
                 
-                if "429" in error_msg or "RESOURCE_EXHAUSTED" in error_msg:
-                    print(f"Model {self._current_model} exhausted (429).")
-                    self._cooldowns[self._current_model] = time.time() + 60 
-                    wait_time = 5.0 
-                    match = re.search(r"quotaResetDelay\": \"([\d.]+)s", error_msg)
-                    if match:
-                        wait_time = float(match.group(1)) + 1.0
-                        print(f"Waiting {wait_time}s...")
+                if error.kind == CACHE:
+                    # The server dropped our cached prompt; re-register it on the next attempt
+                    print(f"Context cache for {model} is gone. Re-creating...")
+                    if self.context_cache:
+                        self.context_cache.invalidate(model)
+                    continue
+
+                if error.kind == QUOTA:
+                    print(f"Model {model} exhausted (429).")
+                    wait_time = error.retry_after + 1.0 if error.retry_after is not None else 5.0
+                    # Hold this model back in the shared limiter instead of sleeping in the request path
+                    self.limiter.penalize(model, wait_time)
                     if attempt < retries - 1:
-                        await asyncio.sleep(wait_time)
-                        if self._fallback_model():
-                            continue
-                    else:
-                        return f"Quota reached. (Error: {error_msg})"
-                
-                if "404" in error_msg or "400" in error_msg:
-                    print(f"Model {self._current_model} rejected by server. Error: {error_msg[:100]}...")
-                    self._cooldowns[self._current_model] = time.time() + 7200 
-                    if self._fallback_model():
                         continue
-                    break
+                    return f"Quota reached. (Error: {error})"
+                
+                if error.kind == INVALID:
+                    # Every model would refuse the same request, so don't burn the fallbacks on it
+                    print(f"Request rejected by {model} as invalid: {str(error)[:100]}")
+                    return f"Error: The model rejected the request. ({error})"
+
+                if error.kind == REJECTED:
+                    print(f"Model {model} rejected by server. Error: {str(error)[:100]}...")
+                    continue
 
-                if "Network error" in error_msg or "hostname" in error_msg:
-                    print(f"Connection issue: {error_msg}. Retrying in 10s...")
-                    await asyncio.sleep(10)
+                if error.kind == NETWORK:
+                    print(f"Connection issue: {error}. Retrying...")
+                    await asyncio.sleep(1)
                     continue
 
-                print(f"Model error: {error_msg}. Retrying...")
-                await asyncio.sleep(2)
+                print(f"Model error: {error}. Retrying...")
+                await asyncio.sleep(0.5)
         
         return "Error: Failed to generate response after model scaling."
 
-    def _fallback_model(self):
-        """Switch to the next model in the hierarchy."""
-        try:
-            current_index = self.MODEL_HIERARCHY.index(self._current_model)
-            if current_index + 1 < len(self.MODEL_HIERARCHY):
-                self._current_model = self.MODEL_HIERARCHY[current_index + 1]
-                os.environ["GEMINI_MODEL"] = self._current_model
-                print(f"Switched to fallback model: {self._current_model}")
-                return True
-        except ValueError:
-            self._current_model = self.MODEL_HIERARCHY[0]
-            os.environ["GEMINI_MODEL"] = self._current_model
-            return True
-        return False
-
-    async def _handle_client_tool_calls(self, prompt, system_instruction, tools, initial_content):
+    async def _handle_client_tool_calls(self, model, prompt, system_instruction, tools, initial_content):
         """Handle recursive tool calling for the native Gemini Client."""
         if isinstance(prompt, list):
             messages = list(prompt)
@@ -357,36 +595,18 @@ class GeminiBrain:
                 return "".join(text_parts) if text_parts else "No text returned."
 
             # Execute tools
-            responses_parts = []
-            for tc in tool_calls:
-                name = tc.name if hasattr(tc, "name") else tc.get("name")
-                args = tc.args if hasattr(tc, "args") else tc.get("args", {})
-                print(f"Executing tool: {name}({args})")
-                try:
-                    result = await self.registry.execute(name, args)
-                except Exception as te:
-                    result = f"Tool Error: {str(te)}"
-                
-                responses_parts.append({
-                    "function_response": {
-                        "name": name,
-                        "response": {"result": str(result)[:3000]}
-                    }
-                })
-            
+            responses_parts = await self._execute_client_tool_calls(tool_calls)
             messages.append({"role": "tool", "parts": responses_parts})
             
             # Send back to Gemini
-            config = {"tools": tools} if tools else {}
-            if system_instruction:
-                config["system_instruction"] = system_instruction
-            
-            # Quota delay
-            await asyncio.sleep(10.0)
-            
-            response = await self.client.aio.models.generate_content(
-                model=self._current_model, contents=messages, config=config
-            )
+            config = await self._client_config(model, system_instruction, tools)
+            reserve = estimate_tokens(system_instruction, tools)
+            messages = self.packer.pack(messages, model, reserve=reserve)
+            await self.limiter.acquire(model, reserve + sum(self.packer.count(m) for m in messages))
+            with MODEL_TURN_SECONDS.time(model=model), span("generate_content", model=model):
+                response = await self.client.aio.models.generate_content(
+                    model=model, contents=messages, config=config
+                )
             
             if not response.candidates:
                 return "Error: No candidates in tool-call follow-up."
@@ -394,3 +614,135 @@ class GeminiBrain:
             messages.append(response.candidates[0].content)
 
         return "Error: Maximum tool-call recursion reached."
+
+    async def _execute_client_tool_calls(self, tool_calls):
+        """Run function calls from the native Gemini Client (reads concurrently, writes in order)."""
+        calls = []
+        for tc in tool_calls:
+            name = tc.name if hasattr(tc, "name") else tc.get("name")
+            args = tc.args if hasattr(tc, "args") else tc.get("args", {})
+            print(f"Executing tool: {name}({args})")
+            calls.append((name, args))
+        results = await self.registry.execute_many(calls, report_cache=True)
+        
+        return [
+            {
+                "function_response": {
+                    "name": name,
+                    "response": tool_response(result, cached)
+                }
+            }
+            for (name, _), (result, cached) in zip(calls, results)
+        ]
+
+    async def _stream_client(self, model, prompt, system_instruction, tools):
+        """Stream text deltas from the native Gemini Client, running tool calls between turns."""
+        if isinstance(prompt, list):
+            messages = list(prompt)
+        else:
+            messages = [{"role": "user", "parts": [{"text": prompt}]}]
+        
+        config = await self._client_config(model, system_instruction, tools)
+
+        reserve = estimate_tokens(system_instruction, tools)
+        tools_ran = False
+        try:
+            for turn in range(10):
+                messages = self.packer.pack(messages, model, reserve=reserve)
+                await self.limiter.acquire(model, reserve + sum(self.packer.count(m) for m in messages))
+                with MODEL_TURN_SECONDS.time(model=model), span("generate_content", model=model):
+                    stream = await self.client.aio.models.generate_content_stream(
+                        model=model, contents=messages, config=config
+                    )
+                    text = ""
+                    call_parts = []
+                    async for chunk in stream:
+                        if not chunk.candidates or not chunk.candidates[0].content:
+                            continue
+                        for part in chunk.candidates[0].content.parts or []:
+                            if part.function_call:
+                                # Keep the original Part so thought signatures are echoed back intact
+                                call_parts.append(part)
+                            elif part.text:
+                                text += part.text
+                                yield part.text
+
+                model_parts = ([types.Part(text=text)] if text else []) + call_parts
+                messages.append(types.Content(role="model", parts=model_parts))
+                if not call_parts:
+                    return
+
+                if not tools:
+                    yield "Error: AI attempted tool call but tools are disabled."
+                    return
+
+                responses_parts = await self._execute_client_tool_calls([p.function_call for p in call_parts])
+                tools_ran = True
+                messages.append({"role": "tool", "parts": responses_parts})
+        except Exception as e:
+            if tools_ran:
+                raise ToolTurnError(e) from e
+            raise
+
+        yield "Error: Maximum tool-call recursion reached."
+
+    async def stream_response(self, prompt, system_instruction=None, tools=None, user_id=None, deadline=None):
+        """Yield response text deltas as they arrive from the model.
+
+        Falls back to a single full-length chunk from generate_response if the stream
+        fails before any text was produced or any tool ran, so retries and model fallback
+        still apply.
+        """
+        if not self.client and not self.gca_transport:
+            self.initialize()
+        
+        final_tools = self.registry.get_tool_schemas() if tools is None else tools
+
+        try:
+            async with self.scheduler.slot(INTERACTIVE, user_id, deadline):
+                model = self.router.acquire(INTERACTIVE)
+                started = False
+                if model:
+                    self._current_model = model
+                    began = time.monotonic()
+                    try:
+                        if self.client:
+                            deltas = self._stream_client(model, prompt, system_instruction, final_tools)
+                        else:
+                            deltas = self.gca_transport.stream_content(
+                                model=model, prompt=prompt, system_instruction=system_instruction, tools=final_tools
+                            )
+                        async for delta in deltas:
+                            started = True
+                            yield delta
+                        self.router.record_success(model)
+                        MODEL_REQUEST_SECONDS.observe(time.monotonic() - began, model=model, outcome="ok")
+                        return
+                    except (asyncio.CancelledError, GeneratorExit):
+                        # The reader went away mid-stream; no verdict on the model
+                        self.router.record_latency(model, time.monotonic() - began)
+                        raise
+                    except Exception as e:
+                        error = classify_error(e)
+                        self.router.record_failure(model, time.monotonic() - began, error)
+                        MODEL_REQUEST_SECONDS.observe(time.monotonic() - began, model=model, outcome="error")
+                        MODEL_ERRORS.inc(model=model, kind=error.kind)
+                        if started:
+                            raise
+                        if isinstance(e, ToolTurnError):
+                            # Falling back would replay tool calls that already ran
+                            yield f"Error: The response failed after running tools. ({error})"
+                            return
+                        if error.kind == INVALID:
+                            yield f"Error: The model rejected the request. ({error})"
+                            return
+                        print(f"Streaming failed ({str(e)[:100]}). Falling back to a full response...")
+        except JobShed as e:
+            print(f"Scheduler shed a streaming request: {e}")
+            yield f"Error: The agent is overloaded. {e}"
+            return
+
+        # Outside the slot: generate_response queues for its own
+        yield await self.generate_response(
+            prompt, system_instruction=system_instruction, tools=tools, user_id=user_id, deadline=deadline
+        )
@@ -10,7 +10,10 @@ if project_root not in sys.path:
 from src.llm import GeminiBrain  # noqa: E402
 from src.memory.manager import SoulManager  # noqa: E402
 from src.heartbeat import HeartbeatManager  # noqa: E402
+from src.compaction import CompactionManager  # noqa: E402
 from src.adapters.telegram_adapter import TelegramAdapter  # noqa: E402
+from src.config.settings import METRICS_ENABLED, SEMANTIC_RECALL, SUMMARY_ENABLED  # noqa: E402
+from src.metrics import MetricsServer, watch_scheduler  # noqa: E402
 
 async def main():
     print("Starting Jovibe Agent...")
@@ -18,19 +21,40 @@ async def main():
     # Initialize components
     brain = GeminiBrain()
     brain.initialize()
+    await brain.start()
+
+    metrics_server = None
+    if METRICS_ENABLED:
+        watch_scheduler(brain.scheduler)
+        metrics_server = MetricsServer()
+        await metrics_server.start()
     
     soul = SoulManager()
+
+    memory = None
+    if SEMANTIC_RECALL:
+        from src.memory.semantic import get_semantic_memory
+        memory = get_semantic_memory()
+        await memory.start()
     
     heartbeat = HeartbeatManager(brain, soul)
-    telegram = TelegramAdapter(brain, soul)
+    telegram = TelegramAdapter(brain, soul, memory=memory)
+    services = [heartbeat.start(), telegram.run()]
+    if SUMMARY_ENABLED:
+        services.append(CompactionManager(brain, soul).start())
     
     # Run all components concurrently
     print("Launching core services...")
-    await asyncio.gather(
-        heartbeat.start(),
-        telegram.run(),
-        # discord.run(),
-    )
+    try:
+        # discord.run() can be appended to services once the adapter exists
+        await asyncio.gather(*services)
+    finally:
+        if metrics_server:
+            await metrics_server.close()
+        if memory:
+            await memory.close()
+        await brain.close()
+        await soul.close()
 
 def run():
     try:
@@ -0,0 +1,172 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from sqlalchemy import func, text
+from sqlalchemy.orm import sessionmaker
+from src.memory import fts
+from src.memory.db import ConversationSummary, Interaction, engine as default_engine
+
+class Database:
+    """Runs SQLAlchemy work off the event loop, on one dedicated database thread.
+
+    Each call gets its own short-lived session, committed on success and rolled back on
+    error, so concurrent handlers never share session state. One thread also serializes
+    writers, which is all SQLite allows anyway, so callers never queue on the file lock.
+    Query functions must return plain data: ORM objects are detached once their session closes.
+    """
+
+    def __init__(self, engine=None):
+        self.engine = engine or default_engine
+        self.session_factory = sessionmaker(bind=self.engine)
+        self._executor = None
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="jovibe-db")
+        return self._executor
+
+    def run_sync(self, func, *args, **kwargs):
+        """Call func(session, *args, **kwargs) in a fresh session on the current thread."""
+        session = self.session_factory()
+        try:
+            result = func(session, *args, **kwargs)
+            session.commit()
+            return result
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    async def run(self, func, *args, **kwargs):
+        """Call func(session, *args, **kwargs) on the database thread without blocking the loop."""
+        loop = asyncio.get_running_loop()
+        call = functools.partial(self.run_sync, func, *args, **kwargs)
+        return await loop.run_in_executor(self._get_executor(), call)
+
+    async def close(self):
+        """Wait for queued work to finish, then stop the database thread."""
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            await asyncio.to_thread(executor.shutdown, wait=True)
+
+_shared_database = None
+
+def get_database():
+    """Return the process-wide database shared by the soul manager and memory skills."""
+    global _shared_database
+    if _shared_database is None:
+        _shared_database = Database()
+    return _shared_database
+
+# Query functions: run them through Database.run / run_sync
+
+def add_interaction(session, channel, user_id, prompt, response):
+    session.add(Interaction(channel=channel, user_id=user_id, prompt=prompt, response=response))
+
+def add_interactions(session, records):
+    """Insert many interaction dicts (channel, user_id, prompt, response, timestamp) at once."""
+    columns = ("channel", "user_id", "prompt", "response", "timestamp")
+    session.execute(Interaction.__table__.insert(), [{c: r[c] for c in columns} for r in records])
+
+def recent_interactions(session, user_id, limit):
+    """(prompt, response) pairs for the user's latest interactions, oldest first."""
+    rows = (
+        session.query(Interaction.prompt, Interaction.response)
+        .filter_by(user_id=user_id)
+        .order_by(Interaction.timestamp.desc())
+        .limit(limit)
+        .all()
+    )
+    return [(row.prompt, row.response) for row in reversed(rows)]
+
+def search_interactions(session, query, limit, user_id=None, channel=None, since=None, until=None):
+    """(timestamp, channel, prompt, response) rows matching `query`, best match first.
+
+    Uses the FTS5 index with BM25 ranking; matched words in prompt and response snippets
+    are wrapped in [brackets]. Falls back to a LIKE scan, newest first, without FTS5.
+    """
+    if fts.has_index(session.connection()):
+        return _search_fts(session, query, limit, user_id, channel, since, until)
+    return _search_like(session, query, limit, user_id, channel, since, until)
+
+def _search_fts(session, query, limit, user_id, channel, since, until):
+    match = fts.match_query(query)
+    if not match:
+        return []
+    params = {"match": match, "limit": limit}
+    where = ""
+    for name, condition, value in (("user_id", "i.user_id = :user_id", user_id),
+                                   ("channel", "i.channel = :channel", channel),
+                                   ("since", "i.timestamp >= :since", since),
+                                   ("until", "i.timestamp < :until", until)):
+        if value:
+            where += f" AND {condition}"
+            params[name] = str(value) # Timestamps are stored as 'YYYY-MM-DD HH:MM:SS.ffffff'
+    rows = session.execute(text(f"""
+        SELECT i.timestamp, i.channel,
+               snippet({fts.FTS_TABLE}, 0, '[', ']', '...', 16),
+               snippet({fts.FTS_TABLE}, 1, '[', ']', '...', 24)
+        FROM {fts.FTS_TABLE} JOIN interactions AS i ON i.id = {fts.FTS_TABLE}.rowid
+        WHERE {fts.FTS_TABLE} MATCH :match{where}
+        ORDER BY bm25({fts.FTS_TABLE}) LIMIT :limit
+    """), params)
+    return [tuple(row) for row in rows]
+
+def _search_like(session, query, limit, user_id, channel, since, until):
+    q = session.query(Interaction.timestamp, Interaction.channel, Interaction.prompt, Interaction.response)
+    q = q.filter(Interaction.prompt.like(f"%{query}%") | Interaction.response.like(f"%{query}%"))
+    if user_id:
+        q = q.filter(Interaction.user_id == user_id)
+    if channel:
+        q = q.filter(Interaction.channel == channel)
+    if since:
+        q = q.filter(Interaction.timestamp >= since)
+    if until:
+        q = q.filter(Interaction.timestamp < until)
+    return [tuple(row) for row in q.order_by(Interaction.timestamp.desc()).limit(limit).all()]
+
+def get_summary(session, user_id):
+    """(summary, last_interaction_id) for the user, or ("", 0) if nothing was compacted yet."""
+    row = session.query(ConversationSummary.summary, ConversationSummary.last_interaction_id).filter_by(
+        user_id=user_id
+    ).first()
+    return (row.summary or "", row.last_interaction_id or 0) if row else ("", 0)
+
+def save_summary(session, user_id, summary, last_interaction_id):
+    row = session.query(ConversationSummary).filter_by(user_id=user_id).first()
+    if row is None:
+        row = ConversationSummary(user_id=user_id)
+        session.add(row)
+    row.summary = summary
+    row.last_interaction_id = last_interaction_id
+    row.updated_at = datetime.utcnow()
+
+def users_to_compact(session, keep_recent, min_batch, exclude_channels=("heartbeat",)):
+    """Users with at least `min_batch` uncompacted interactions beyond their recent window."""
+    done = session.query(ConversationSummary.user_id, ConversationSummary.last_interaction_id).subquery()
+    rows = (
+        session.query(Interaction.user_id)
+        .outerjoin(done, done.c.user_id == Interaction.user_id)
+        .filter(Interaction.id > func.coalesce(done.c.last_interaction_id, 0))
+        .filter(Interaction.channel.notin_(exclude_channels))
+        .group_by(Interaction.user_id)
+        .having(func.count(Interaction.id) >= keep_recent + min_batch)
+    )
+    return [row.user_id for row in rows]
+
+def interactions_to_compact(session, user_id, after_id, keep_recent, limit):
+    """(id, prompt, response) rows after `after_id` that are older than the user's recent window."""
+    query = session.query(Interaction.id, Interaction.prompt, Interaction.response).filter(
+        Interaction.user_id == user_id, Interaction.id > after_id
+    )
+    if keep_recent:
+        recent = (
+            session.query(Interaction.id).filter_by(user_id=user_id)
+            .order_by(Interaction.id.desc()).limit(keep_recent).all()
+        )
+        if len(recent) < keep_recent:
+            return []
+        query = query.filter(Interaction.id < recent[-1].id)
+    return [tuple(row) for row in query.order_by(Interaction.id).limit(limit)]
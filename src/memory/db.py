@@ -1,8 +1,8 @@
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Text
+from sqlalchemy import create_engine, event, Column, Integer, String, DateTime, Text, Index, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
-from src.config.settings import DB_FILE
+from src.config.settings import DB_FILE, SQLITE_CACHE_MB, SQLITE_MMAP_MB
 
 Base = declarative_base()
 
@@ -15,14 +15,30 @@ class Interaction(Base):
     response = Column(Text)
     timestamp = Column(DateTime, default=datetime.utcnow)
 
+    # Serves the per-user "latest N turns" lookup without scanning or sorting the table
+    __table_args__ = (Index("ix_interactions_user_timestamp", "user_id", "timestamp"),)
+
+class ConversationSummary(Base):
+    __tablename__ = 'conversation_summaries'
+    id = Column(Integer, primary_key=True)
+    user_id = Column(String(100), unique=True)
+    summary = Column(Text)
+    last_interaction_id = Column(Integer, default=0) # Newest interaction folded into the summary
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
 class MemoryChunk(Base):
     __tablename__ = 'memory_chunks'
     id = Column(Integer, primary_key=True)
-    file_path = Column(String(255))
+    file_path = Column(String(255)) # Markdown file path, or "interaction:<id>"
+    chunk_index = Column(Integer, default=0)
+    user_id = Column(String(100)) # Owner of interaction chunks; None for shared files
     content = Column(Text)
-    embedding = Column(Text) # JSON string or binary representation if using vectors
+    content_hash = Column(String(64)) # Of embedder, dtype and content: a change means re-embed
+    embedding = Column(LargeBinary) # float16/float32 vector bytes
     last_updated = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (Index("ix_memory_chunks_file_path", "file_path", "chunk_index"),)
+
 class UserProfile(Base):
     __tablename__ = 'user_profiles'
     id = Column(Integer, primary_key=True)
@@ -30,8 +46,28 @@ class UserProfile(Base):
     preferences = Column(Text) # JSON blob
     last_seen = Column(DateTime, default=datetime.utcnow)
 
-engine = create_engine(f"sqlite:///{DB_FILE}")
+def _apply_pragmas(dbapi_connection, connection_record):
+    """Tune every new SQLite connection: WAL lets readers run alongside the writer."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL") # Durable at checkpoints; safe with WAL
+    cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_MB * 1024}") # Negative means KiB
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_MB * 1024 * 1024}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
+
+def make_engine(path=DB_FILE):
+    engine = create_engine(f"sqlite:///{path}")
+    event.listen(engine, "connect", _apply_pragmas)
+    return engine
+
+engine = make_engine()
 Session = sessionmaker(bind=engine)
 
-def init_db():
-    Base.metadata.create_all(engine)
+def init_db(target=None):
+    """Create missing tables, then upgrade existing databases in place."""
+    from src.memory.migrations import migrate
+    target = target or engine
+    Base.metadata.create_all(target)
+    migrate(target)
@@ -0,0 +1,80 @@
+import argparse
+import re
+from sqlalchemy import text
+
+# External-content FTS5 index over interactions(prompt, response); rowid is interactions.id
+FTS_TABLE = "interactions_fts"
+
+_SCHEMA = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        prompt, response, content='interactions', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS interactions_fts_insert AFTER INSERT ON interactions BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, prompt, response) VALUES (new.id, new.prompt, new.response);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS interactions_fts_delete AFTER DELETE ON interactions BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, prompt, response) VALUES ('delete', old.id, old.prompt, old.response);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS interactions_fts_update AFTER UPDATE ON interactions BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, prompt, response) VALUES ('delete', old.id, old.prompt, old.response);
+        INSERT INTO {FTS_TABLE}(rowid, prompt, response) VALUES (new.id, new.prompt, new.response);
+    END""",
+]
+
+def fts5_available(conn):
+    return bool(conn.execute(text("SELECT sqlite_compileoption_used('ENABLE_FTS5')")).scalar()) or _probe(conn)
+
+def _probe(conn):
+    # Some builds load FTS5 without advertising the compile option
+    try:
+        conn.execute(text("CREATE VIRTUAL TABLE temp._fts5_probe USING fts5(x)"))
+        conn.execute(text("DROP TABLE temp._fts5_probe"))
+        return True
+    except Exception:
+        return False
+
+def has_index(conn):
+    row = conn.execute(text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": FTS_TABLE})
+    return row.first() is not None
+
+def create_index(conn):
+    """Create the FTS table and its sync triggers, then index every existing row."""
+    if not fts5_available(conn):
+        print("Warning: this SQLite build has no FTS5; memory search will use slower LIKE scans.")
+        return
+    for statement in _SCHEMA:
+        conn.execute(text(statement))
+    rebuild(conn)
+
+def rebuild(conn):
+    """Re-index the whole interactions table (backfill, or repair after manual edits)."""
+    conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+
+def optimize(conn):
+    """Merge the index b-trees into one, which keeps queries fast after many small inserts."""
+    conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')"))
+
+def match_query(query):
+    """Turn free text into a safe FTS5 query: every word must match, as a prefix."""
+    words = re.findall(r"\w+", query or "")
+    return " ".join('"%s"*' % word for word in words)
+
+def main(argv=None):
+    from src.memory.db import engine, init_db
+
+    parser = argparse.ArgumentParser(description="Maintain the full-text index over the interaction log.")
+    parser.add_argument("action", choices=["rebuild", "optimize"])
+    args = parser.parse_args(argv)
+
+    init_db()
+    with engine.begin() as conn:
+        if not has_index(conn):
+            print("No full-text index in this database (SQLite built without FTS5).")
+            return 1
+        rebuild(conn) if args.action == "rebuild" else optimize(conn)
+    print(f"Full-text index: {args.action} done.")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,44 @@
+from collections import deque
+from src.config.settings import HISTORY_CACHE_USERS, HISTORY_CACHE_WINDOW
+from src.utils.lru import LRUCache
+
+class HistoryCache:
+    """Per-user ring buffers of the latest (prompt, response) pairs, LRU-evicted across users.
+
+    A user's window is loaded from the database on first use and then kept current by
+    `append`, so later reads need no database round trip. A window holding fewer pairs than
+    its capacity holds the user's whole history.
+    """
+
+    def __init__(self, users=HISTORY_CACHE_USERS, window=HISTORY_CACHE_WINDOW):
+        self.window = window
+        self._windows = LRUCache(maxsize=users)
+        self._loading = {} # user_id -> True once an append raced the load
+
+    def get(self, user_id, limit):
+        """The latest `limit` pairs, oldest first, or None if the database must be asked."""
+        window = self._windows.get(user_id)
+        if window is None or (limit > self.window and len(window) == self.window):
+            return None
+        return list(window)[-limit:]
+
+    def begin_load(self, user_id):
+        self._loading[user_id] = False
+
+    def load(self, user_id, pairs):
+        """Install pairs read from the database, unless an append happened during the read."""
+        if not self._loading.pop(user_id, True):
+            self._windows.set(user_id, deque(pairs[-self.window:], maxlen=self.window))
+
+    def cancel_load(self, user_id):
+        self._loading.pop(user_id, None)
+
+    def append(self, user_id, prompt, response):
+        if user_id in self._loading:
+            self._loading[user_id] = True
+        window = self._windows.get(user_id)
+        if window is not None:
+            window.append((prompt, response))
+
+    def clear(self):
+        self._windows.clear()
@@ -1,31 +1,61 @@
 import os
-from src.memory.db import Session, Interaction, init_db
+from src.config.settings import HISTORY_CACHE_USERS
+from src.memory.dal import get_database, get_summary, recent_interactions, save_summary
+from src.memory.db import init_db
+from src.memory.history import HistoryCache
+from src.memory.prompt import FileCache, SystemPrompt, file_stamp
+from src.memory.writer import InteractionWriter
+from src.utils.lru import LRUCache
 
 class SoulManager:
-    def __init__(self):
-        init_db()
-        self.session = Session()
+    def __init__(self, db=None):
+        self.db = db or get_database()
+        init_db(self.db.engine)
+        self.writer = InteractionWriter(self.db)
+        self.history = HistoryCache()
+        self._summaries = LRUCache(maxsize=HISTORY_CACHE_USERS) # user_id -> summary text
+        self._files = FileCache()
+        self._prompts = {} # minimal -> (source stamps, SystemPrompt)
+
+    def _prompt_files(self, base_dir, minimal):
+        if minimal:
+            # Essential files only for lower token usage
+            return ["soul.md", "capabilities.md"]
+        # Full context: all markdown files in root
+        return [f for f in self._files.listdir(base_dir) if f.endswith(".md")]
 
     def get_system_prompt(self, minimal=False):
-        """Combine markdown files and runtime info into a robust system prompt."""
+        """Combine markdown files and runtime info into a robust system prompt.
+
+        The assembled prompt is memoized per mode and rebuilt only when one of its files
+        changes (by mtime and size), or a file is added to or removed from BASE_DIR.
+        """
         from src.config.settings import BASE_DIR
+
+        names = self._prompt_files(BASE_DIR, minimal)
+        stamps = (str(BASE_DIR),) + tuple((name, file_stamp(BASE_DIR / name)) for name in names)
+        cached = self._prompts.get(minimal)
+        if cached and cached[0] == stamps:
+            return cached[1]
+
+        prompt = SystemPrompt(self._build_system_prompt(BASE_DIR, names))
+        self._prompts[minimal] = (stamps, prompt)
+        return prompt
+
+    def system_prompt_hash(self, minimal=False):
+        """SHA-256 of the current system prompt, for keying downstream caches."""
+        return self.get_system_prompt(minimal).content_hash
+
+    def _build_system_prompt(self, base_dir, names):
         import platform
         import sys
-        
+
         # 1. Gather markdown files
         md_files = []
-        if minimal:
-            # Essential files only for lower token usage
-            for essential in ["soul.md", "capabilities.md"]:
-                path = BASE_DIR / essential
-                if path.exists():
-                    md_files.append(f"## {essential}\n\n{self._read_file(path)}")
-        else:
-            # Full context: scan all markdown files in root
-            for file in os.listdir(BASE_DIR):
-                if file.endswith(".md") and os.path.isfile(BASE_DIR / file):
-                    content = self._read_file(BASE_DIR / file)
-                    md_files.append(f"## {file}\n\n{content}")
+        for name in names:
+            path = base_dir / name
+            if os.path.isfile(path):
+                md_files.append(f"## {name}\n\n{self._read_file(path)}")
         
         project_context = "\n\n".join(md_files)
         
@@ -33,7 +63,7 @@ class SoulManager:
         runtime_info = {
             "os": platform.system(),
             "python": sys.version.split()[0],
-            "cwd": str(BASE_DIR),
+            "cwd": str(base_dir),
         }
         
         runtime_line = " | ".join([f"{k}={v}" for k, v in runtime_info.items()])
@@ -57,54 +87,61 @@ Runtime: {runtime_line}
         return system_prompt
 
     def _read_file(self, path, default=""):
-        if os.path.exists(path):
-            with open(path, "r") as f:
-                return f.read()
-        return default
-
-    def log_interaction(self, channel, user_id, prompt, response):
-        """Log the interaction and ensure the session is properly committed or rolled back."""
-        try:
-            interaction = Interaction(
-                channel=channel,
-                user_id=user_id,
-                prompt=prompt,
-                response=response or "[Empty response]"
-            )
-            self.session.add(interaction)
-            self.session.commit()
-        except Exception as e:
-            print(f"Error logging interaction: {str(e)}")
-            self.session.rollback()
-
-    def get_recent_history_turns(self, user_id, limit=5):
-        """Get recent history as a list of message dictionaries for native Gemini turns."""
-        try:
-            # Ensure we are getting fresh data
-            self.session.expire_all()
-            history = self.session.query(Interaction).filter_by(user_id=user_id).order_by(Interaction.timestamp.desc()).limit(limit).all()
-            
-            turns = []
-            for i in reversed(history):
-                turns.append({"role": "user", "parts": [{"text": i.prompt}]})
-                turns.append({"role": "model", "parts": [{"text": i.response}]})
-            return turns
-        except Exception as e:
-            print(f"Error retrieving history turns: {str(e)}")
-            return []
-
-    def get_recent_history(self, user_id, limit=5, max_chars=2000):
-        """Get recent history and ensure it doesn't exceed a token/char limit."""
-        history = self.session.query(Interaction).filter_by(user_id=user_id).order_by(Interaction.timestamp.desc()).limit(limit).all()
-        
-        formatted = []
-        current_len = 0
-        for i in reversed(history):
-            line = f"User: {i.prompt}\nAI: {i.response}"
-            if current_len + len(line) > max_chars:
-                # Truncate oldest items if total history is too long
-                break
-            formatted.append(line)
-            current_len += len(line)
-            
-        return "\n".join(formatted)
+        return self._files.read(path, default)
+
+    async def log_interaction(self, channel, user_id, prompt, response):
+        """Queue the interaction for the next batched write; returns without touching the disk."""
+        response = response or "[Empty response]"
+        self.writer.add(channel, user_id, prompt, response)
+        self.history.append(user_id, prompt, response)
+
+    def _recent(self, session, user_id, limit):
+        # Runs on the database thread: committed rows plus anything still queued in the writer
+        history = recent_interactions(session, user_id, limit)
+        history += [(r["prompt"], r["response"]) for r in self.writer.pending(user_id)]
+        return history[-limit:]
+
+    async def get_recent_history_turns(self, user_id, limit=5):
+        """Get recent history as a list of message dictionaries for native Gemini turns.
+
+        Served from the in-memory window; the database is only read on a user's first request
+        (or when more turns are asked for than the window keeps).
+        """
+        history = self.history.get(user_id, limit)
+        if history is None:
+            self.history.begin_load(user_id)
+            try:
+                history = await self.db.run(self._recent, user_id, max(limit, self.history.window))
+            except Exception as e:
+                print(f"Error retrieving history turns: {str(e)}")
+                self.history.cancel_load(user_id)
+                return []
+            self.history.load(user_id, history)
+            history = history[-limit:]
+
+        turns = []
+        for prompt, response in history:
+            turns.append({"role": "user", "parts": [{"text": prompt}]})
+            turns.append({"role": "model", "parts": [{"text": response}]})
+        return turns
+
+    async def get_conversation_summary(self, user_id):
+        """The compacted summary of the user's older conversation, or "" if there is none."""
+        summary = self._summaries.get(user_id)
+        if summary is None:
+            try:
+                summary, _ = await self.db.run(get_summary, user_id)
+            except Exception as e:
+                print(f"Error retrieving conversation summary: {str(e)}")
+                return ""
+            self._summaries.set(user_id, summary)
+        return summary
+
+    async def save_conversation_summary(self, user_id, summary, last_interaction_id):
+        await self.db.run(save_summary, user_id, summary, last_interaction_id)
+        self._summaries.set(user_id, summary)
+
+    async def close(self):
+        """Flush queued interactions, then stop the database thread."""
+        await self.writer.close()
+        await self.db.close()
@@ -0,0 +1,50 @@
+from sqlalchemy import text
+from src.memory import fts
+
+def _add_interactions_user_timestamp_index(conn):
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_interactions_user_timestamp ON interactions (user_id, timestamp)"
+    ))
+
+def _add_interactions_fts(conn):
+    fts.create_index(conn)
+
+def _add_memory_chunk_columns(conn):
+    # memory_chunks existed from the start but was never written, so plain ALTERs are enough
+    columns = {row[1] for row in conn.execute(text("PRAGMA table_info(memory_chunks)"))}
+    for name, ddl in (("chunk_index", "INTEGER DEFAULT 0"), ("user_id", "VARCHAR(100)"),
+                      ("content_hash", "VARCHAR(64)")):
+        if name not in columns:
+            conn.execute(text(f"ALTER TABLE memory_chunks ADD COLUMN {name} {ddl}"))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_memory_chunks_file_path ON memory_chunks (file_path, chunk_index)"
+    ))
+
+# (version, description, upgrade). Append new steps; never edit or reorder released ones.
+MIGRATIONS = [
+    (1, "index interactions by (user_id, timestamp)", _add_interactions_user_timestamp_index),
+    (2, "full-text index over interaction prompts and responses", _add_interactions_fts),
+    (3, "chunk, owner and content-hash columns for semantic memory", _add_memory_chunk_columns),
+]
+
+def schema_version(conn):
+    return conn.execute(text("PRAGMA user_version")).scalar() or 0
+
+def schema_version_of(engine):
+    with engine.connect() as conn:
+        return schema_version(conn)
+
+def migrate(engine):
+    """Apply pending migrations in order, recording progress in SQLite's user_version."""
+    with engine.begin() as conn:
+        current = schema_version(conn)
+    pending = [m for m in MIGRATIONS if m[0] > current]
+    for version, description, upgrade in pending:
+        print(f"Migrating memory database to v{version}: {description}...")
+        with engine.begin() as conn:
+            upgrade(conn)
+            conn.execute(text(f"PRAGMA user_version = {int(version)}"))
+    if pending:
+        with engine.begin() as conn:
+            conn.execute(text("ANALYZE")) # Refresh planner statistics for the new indexes
+    return schema_version_of(engine)
@@ -0,0 +1,50 @@
+import hashlib
+import os
+
+class SystemPrompt(str):
+    """A prompt string that carries its SHA-256, so downstream caches need not rehash it."""
+
+    def __new__(cls, text):
+        prompt = super().__new__(cls, text)
+        prompt.content_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return prompt
+
+def file_stamp(path):
+    """(mtime_ns, size) of a file, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+class FileCache:
+    """Reads text files, going back to disk only when a file's (mtime_ns, size) changes."""
+
+    def __init__(self):
+        self._files = {} # path -> (stamp, content)
+        self._dirs = {} # directory -> (stamp, sorted names)
+
+    def read(self, path, default=""):
+        path = str(path)
+        stamp = file_stamp(path)
+        if stamp is None:
+            self._files.pop(path, None)
+            return default
+        cached = self._files.get(path)
+        if cached and cached[0] == stamp:
+            return cached[1]
+        with open(path, "r") as f:
+            content = f.read()
+        self._files[path] = (stamp, content)
+        return content
+
+    def listdir(self, directory):
+        """Sorted directory entries; re-listed only when the directory's mtime changes."""
+        directory = str(directory)
+        stamp = file_stamp(directory)
+        cached = self._dirs.get(directory)
+        if cached and cached[0] == stamp:
+            return cached[1]
+        names = sorted(os.listdir(directory))
+        self._dirs[directory] = (stamp, names)
+        return names
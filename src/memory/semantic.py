@@ -0,0 +1,440 @@
+import asyncio
+import hashlib
+import itertools
+import os
+import re
+from datetime import datetime
+import numpy as np
+from src.config.settings import (
+    SEMANTIC_CHUNK_CHARS, SEMANTIC_CHUNK_OVERLAP, SEMANTIC_DIM, SEMANTIC_DTYPE, SEMANTIC_IVF_PROBES,
+    SEMANTIC_IVF_THRESHOLD, SEMANTIC_RECALL_K, SEMANTIC_RECALL_MIN_SCORE, SEMANTIC_SYNC_INTERVAL,
+)
+from src.memory.dal import get_database
+from src.memory.db import Interaction, MemoryChunk
+
+INTERACTION_PREFIX = "interaction:"
+
+def normalize(matrix):
+    """Scale each row to unit length so a dot product is the cosine similarity."""
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+def chunk_text(text, max_chars=SEMANTIC_CHUNK_CHARS, overlap=SEMANTIC_CHUNK_OVERLAP):
+    """Split on blank lines and pack paragraphs up to max_chars; longer paragraphs are cut with overlap."""
+    chunks, current = [], ""
+    for paragraph in re.split(r"\n\s*\n", text or ""):
+        paragraph = paragraph.strip()
+        while len(paragraph) > max_chars:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(paragraph[:max_chars])
+            paragraph = paragraph[max_chars - overlap:]
+        if not paragraph:
+            continue
+        if current and len(current) + 2 + len(paragraph) > max_chars:
+            chunks.append(current)
+            current = paragraph
+        else:
+            current = f"{current}\n\n{paragraph}" if current else paragraph
+    if current:
+        chunks.append(current)
+    return chunks
+
+class HashingEmbedder:
+    """Deterministic offline embedder: signed feature hashing of words and word pairs.
+
+    It only captures lexical overlap, but needs no model, network or quota. Any object with
+    `name`, `dim` and `embed(texts) -> float32 array of shape (len(texts), dim)` can replace it.
+    """
+
+    def __init__(self, dim=SEMANTIC_DIM):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def embed(self, texts):
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = re.findall(r"\w+", text.lower())
+            for feature in itertools.chain(words, (f"{a} {b}" for a, b in zip(words, words[1:]))):
+                h = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+                vectors[row, h % self.dim] += 1.0 if h >> 63 else -1.0
+        return normalize(vectors)
+
+class VectorIndex:
+    """In-memory matrix of unit vectors for batched cosine top-k, with tombstoned deletes.
+
+    Once it holds `ivf_threshold` vectors, an IVF coarse index (spherical k-means centroids)
+    limits each query to the `probes` nearest clusters instead of scanning every row. The
+    clustering is retrained whenever the index has doubled since the last training.
+    """
+
+    def __init__(self, dim, ivf_threshold=SEMANTIC_IVF_THRESHOLD, probes=SEMANTIC_IVF_PROBES):
+        self.dim = dim
+        self.ivf_threshold = ivf_threshold
+        self.probes = probes
+        self._vectors = np.zeros((64, dim), dtype=np.float32)
+        self._alive = np.zeros(64, dtype=bool)
+        self._owner_codes = np.zeros(64, dtype=np.int32) # 0 means shared (no owner)
+        self._owners = {None: 0}
+        self._keys = [] # position -> key
+        self._positions = {} # key -> position
+        self._size = 0
+        self._dead = 0
+        self._centroids = None
+        self._lists = None # cluster -> positions
+        self._trained_at = 0
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __contains__(self, key):
+        return key in self._positions
+
+    def _owner_code(self, owner):
+        return self._owners.setdefault(owner, len(self._owners))
+
+    def add(self, key, vector, owner=None):
+        """Insert or replace the vector stored under `key`."""
+        self.add_many([key], [vector], [owner])
+
+    def add_many(self, keys, vectors, owners=None):
+        """Insert or replace a batch of vectors with one matrix copy instead of a row at a time."""
+        if not len(keys):
+            return
+        for key in keys:
+            self.remove(key)
+        start, end = self._size, self._size + len(keys)
+        capacity = len(self._vectors)
+        while capacity < end:
+            capacity *= 2
+        if capacity != len(self._vectors):
+            self._resize(capacity)
+        self._vectors[start:end] = np.asarray(vectors, dtype=np.float32).reshape(len(keys), self.dim)
+        self._alive[start:end] = True
+        self._owner_codes[start:end] = [self._owner_code(owner) for owner in owners or [None] * len(keys)]
+        for position, key in enumerate(keys, start):
+            self._keys.append(key)
+            self._positions[key] = position
+        self._size = end
+        if self._centroids is not None:
+            clusters = np.argmax(self._vectors[start:end] @ self._centroids.T, axis=1)
+            for position, cluster in enumerate(clusters, start):
+                self._lists[cluster].append(position)
+
+    def remove(self, key):
+        position = self._positions.pop(key, None)
+        if position is None:
+            return
+        self._alive[position] = False
+        self._dead += 1
+        if self._dead > 1024 and self._dead > self._size // 4:
+            self._compact()
+
+    def _resize(self, capacity):
+        for name in ("_vectors", "_alive", "_owner_codes"):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+
+    def _compact(self):
+        keep = np.flatnonzero(self._alive[:self._size])
+        self._vectors[:len(keep)] = self._vectors[keep]
+        self._owner_codes[:len(keep)] = self._owner_codes[keep]
+        self._alive[:] = False
+        self._alive[:len(keep)] = True
+        self._keys = [self._keys[p] for p in keep]
+        self._positions = {key: p for p, key in enumerate(self._keys)}
+        self._size, self._dead = len(keep), 0
+        if self._centroids is not None:
+            self._assign(np.arange(self._size))
+
+    def _assign(self, positions):
+        self._lists = [[] for _ in range(len(self._centroids))]
+        for start in range(0, len(positions), 65536):
+            batch = positions[start:start + 65536]
+            for position, cluster in zip(batch, np.argmax(self._vectors[batch] @ self._centroids.T, axis=1)):
+                self._lists[cluster].append(int(position))
+
+    def _train(self, iterations=10):
+        positions = np.flatnonzero(self._alive[:self._size])
+        nlist = max(1, int(np.sqrt(len(positions))))
+        rng = np.random.default_rng(0)
+        sample = self._vectors[rng.choice(positions, min(len(positions), 40 * nlist), replace=False)]
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            filled = np.bincount(assignment, minlength=nlist) > 0
+            centroids[filled] = normalize(sums[filled]) # Empty clusters keep their old centroid
+        self._centroids = centroids
+        self._trained_at = len(positions)
+        self._assign(positions)
+
+    def _maybe_train(self):
+        if len(self) < self.ivf_threshold:
+            self._centroids = self._lists = None
+        elif self._centroids is None or len(self) >= 2 * self._trained_at:
+            self._train()
+
+    def search(self, query, k=5, owners=None):
+        """Top-k (key, score) by cosine similarity; `owners` restricts results to rows owned by them."""
+        if not self._positions:
+            return []
+        self._maybe_train()
+        query = normalize(np.asarray(query, dtype=np.float32).reshape(-1))
+        if self._centroids is not None:
+            probe = np.argsort(self._centroids @ query)[-self.probes:]
+            candidates = np.fromiter(itertools.chain.from_iterable(self._lists[c] for c in probe), dtype=np.int64)
+        else:
+            candidates = np.arange(self._size)
+        mask = self._alive[candidates]
+        if owners is not None:
+            codes = [self._owners[o] for o in owners if o in self._owners]
+            mask &= np.isin(self._owner_codes[candidates], codes)
+        candidates = candidates[mask]
+        if not len(candidates):
+            return []
+        scores = self._vectors[candidates] @ query
+        top = min(k, len(scores))
+        best = np.argpartition(-scores, top - 1)[:top]
+        best = best[np.argsort(-scores[best])]
+        return [(self._keys[candidates[i]], float(scores[i])) for i in best]
+
+class SemanticMemory:
+    """Embedded, searchable chunks of the markdown memory files and the interaction log.
+
+    Vectors are stored as BLOBs in memory_chunks and mirrored in a VectorIndex. Syncing is
+    incremental: chunks are keyed by (file path, chunk index), and only chunks whose content
+    hash changed are re-embedded. Interactions are picked up by id, so each is embedded once.
+    """
+
+    BATCH = 500
+
+    def __init__(self, db=None, embedder=None, dtype=SEMANTIC_DTYPE, base_dir=None):
+        self.db = db or get_database()
+        self.embedder = embedder or HashingEmbedder()
+        self.dtype = np.dtype(dtype)
+        self.base_dir = base_dir
+        self.index = VectorIndex(self.embedder.dim)
+        self._sources = {} # file_path -> {chunk_index: (chunk id, content hash)}
+        self._last_interaction_id = 0
+        self._loaded = False
+        self._lock = asyncio.Lock()
+        self._task = None
+
+    def _hash(self, content):
+        key = f"{self.embedder.name}|{self.dtype.name}|{content}"
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    async def ready(self):
+        """Load stored vectors into memory on first use."""
+        if self._loaded:
+            return
+        async with self._lock:
+            if not self._loaded:
+                rows = await self.db.run(_load_chunks)
+                # Nothing else touches the index until _loaded is set, so build it off the loop
+                await asyncio.to_thread(self._load, rows)
+                self._loaded = True
+
+    def _load(self, rows):
+        stale_interactions = []
+        last_id = 0
+        keys, vectors, owners = [], [], []
+        for chunk_id, file_path, chunk_index, user_id, content, content_hash, blob in rows:
+            current = content_hash == self._hash(content or "")
+            self._sources.setdefault(file_path, {})[chunk_index] = (chunk_id, content_hash if current else None)
+            if current and blob:
+                vector = np.frombuffer(blob, dtype=self.dtype)
+                if len(vector) == self.index.dim:
+                    keys.append(chunk_id)
+                    vectors.append(vector)
+                    owners.append(user_id)
+            if file_path.startswith(INTERACTION_PREFIX):
+                interaction_id = int(file_path[len(INTERACTION_PREFIX):])
+                last_id = max(last_id, interaction_id)
+                if not current:
+                    stale_interactions.append(interaction_id)
+        if keys:
+            self.index.add_many(keys, np.stack(vectors), owners)
+        # Re-read from the oldest interaction embedded with a different embedder or dtype
+        self._last_interaction_id = min(stale_interactions) - 1 if stale_interactions else last_id
+
+    async def sync(self, include_files=True):
+        """Embed new or changed chunks and drop chunks whose source disappeared. Returns chunks written."""
+        await self.ready()
+        async with self._lock:
+            written = 0
+            if include_files:
+                files = await asyncio.to_thread(self._read_files)
+                removed = [p for p in self._sources if not p.startswith(INTERACTION_PREFIX) and p not in files]
+                written += await self._apply({path: (chunk_text(text), None) for path, text in files.items()}, removed)
+            while True:
+                rows = await self.db.run(_interactions_after, self._last_interaction_id, self.BATCH)
+                if not rows:
+                    break
+                sources = {
+                    f"{INTERACTION_PREFIX}{interaction_id}": (chunk_text(f"User: {prompt}\nAI: {response}"), user_id)
+                    for interaction_id, user_id, prompt, response in rows
+                }
+                written += await self._apply(sources)
+                self._last_interaction_id = rows[-1][0]
+            return written
+
+    def _read_files(self):
+        from src.config.settings import BASE_DIR
+        base_dir = self.base_dir or BASE_DIR
+        files = {}
+        for name in sorted(os.listdir(base_dir)):
+            path = os.path.join(base_dir, name)
+            if name.endswith(".md") and os.path.isfile(path):
+                with open(path, "r", encoding="utf-8", errors="replace") as f:
+                    files[str(path)] = f.read()
+        return files
+
+    async def _apply(self, sources, removed=()):
+        todo = [] # (existing chunk id or None, file_path, chunk_index, user_id, content, content_hash)
+        stale = []
+        for path, (chunks, owner) in sources.items():
+            existing = self._sources.get(path, {})
+            for index, content in enumerate(chunks):
+                digest = self._hash(content)
+                chunk_id, current = existing.get(index, (None, None))
+                if current != digest:
+                    todo.append((chunk_id, path, index, owner, content, digest))
+            stale += [chunk_id for index, (chunk_id, _) in existing.items() if index >= len(chunks)]
+        for path in removed:
+            stale += [chunk_id for chunk_id, _ in self._sources.get(path, {}).values()]
+        if not todo and not stale:
+            return 0
+
+        vectors = await asyncio.to_thread(self.embedder.embed, [item[4] for item in todo]) if todo else []
+        # Once the rows are written the index must follow, even if our caller is cancelled
+        await asyncio.shield(self._store(sources, removed, todo, vectors, stale))
+        return len(todo)
+
+    async def _store(self, sources, removed, todo, vectors, stale):
+        blobs = [np.asarray(vector, dtype=self.dtype).tobytes() for vector in vectors]
+        ids = await self.db.run(_upsert_chunks, todo, blobs, stale)
+
+        for chunk_id in stale:
+            self.index.remove(chunk_id)
+        for path in removed:
+            self._sources.pop(path, None)
+        for path, (chunks, _) in sources.items():
+            entries = self._sources.get(path, {})
+            for index in [i for i in entries if i >= len(chunks)]:
+                del entries[index]
+        for chunk_id, (_, path, index, _, _, digest) in zip(ids, todo):
+            self._sources.setdefault(path, {})[index] = (chunk_id, digest)
+        if todo:
+            self.index.add_many(ids, vectors, [item[3] for item in todo])
+
+    async def search(self, query, k=5, user_id=None):
+        """Most similar chunks as dicts (source, content, score). With user_id, only that user's
+        interactions (plus shared files) are considered."""
+        await self.ready()
+        if not query or not query.strip():
+            return []
+        vector = (await asyncio.to_thread(self.embedder.embed, [query]))[0]
+        owners = None if user_id is None else {None, user_id}
+        hits = self.index.search(vector, k, owners=owners)
+        if not hits:
+            return []
+        contents = await self.db.run(_chunks_by_id, [chunk_id for chunk_id, _ in hits])
+        return [
+            {"source": contents[chunk_id][0], "content": contents[chunk_id][1], "score": score}
+            for chunk_id, score in hits if chunk_id in contents
+        ]
+
+    async def recall(self, user_id, text, k=SEMANTIC_RECALL_K, min_score=SEMANTIC_RECALL_MIN_SCORE):
+        """A prompt block of memories related to `text`, or "" when nothing is close enough."""
+        try:
+            hits = [hit for hit in await self.search(text, k, user_id=user_id) if hit["score"] >= min_score]
+        except Exception as e:
+            print(f"Semantic recall failed: {str(e)}")
+            return ""
+        if not hits:
+            return ""
+        lines = [f"- ({os.path.basename(hit['source'])}) {hit['content'][:500]}" for hit in hits]
+        return "Possibly relevant memories (retrieved automatically, may be outdated):\n" + "\n".join(lines)
+
+    async def start(self, interval=SEMANTIC_SYNC_INTERVAL):
+        """Index everything once, then keep syncing in the background."""
+        await self.sync()
+        self.watch(interval, delay=interval)
+
+    def watch(self, interval=SEMANTIC_SYNC_INTERVAL, delay=0):
+        """Keep syncing in a background task (once per process), starting after `delay` seconds."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._sync_loop(interval, delay))
+
+    async def _sync_loop(self, interval, delay=0):
+        await asyncio.sleep(delay)
+        while True:
+            try:
+                await self.sync()
+            except Exception as e:
+                print(f"Semantic memory sync failed: {str(e)}")
+            await asyncio.sleep(interval)
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+_shared_memory = None
+
+def get_semantic_memory():
+    """Return the process-wide semantic memory shared by the adapters and the search skill."""
+    global _shared_memory
+    if _shared_memory is None:
+        _shared_memory = SemanticMemory()
+    return _shared_memory
+
+# Query functions: run them through Database.run
+
+def _load_chunks(session):
+    return [tuple(row) for row in session.query(
+        MemoryChunk.id, MemoryChunk.file_path, MemoryChunk.chunk_index, MemoryChunk.user_id,
+        MemoryChunk.content, MemoryChunk.content_hash, MemoryChunk.embedding,
+    )]
+
+def _interactions_after(session, interaction_id, limit):
+    return [tuple(row) for row in session.query(
+        Interaction.id, Interaction.user_id, Interaction.prompt, Interaction.response,
+    ).filter(Interaction.id > interaction_id).order_by(Interaction.id).limit(limit)]
+
+def _upsert_chunks(session, todo, blobs, stale):
+    if stale:
+        session.query(MemoryChunk).filter(MemoryChunk.id.in_(stale)).delete(synchronize_session=False)
+    now = datetime.utcnow()
+    chunks = []
+    for (chunk_id, path, index, owner, content, digest), blob in zip(todo, blobs):
+        chunk = session.get(MemoryChunk, chunk_id) if chunk_id else None
+        if chunk is None:
+            # A write whose bookkeeping never ran (e.g. a crash) left the row behind: reuse it
+            chunk = session.query(MemoryChunk).filter_by(file_path=path, chunk_index=index).first()
+        if chunk is None:
+            chunk = MemoryChunk(file_path=path, chunk_index=index)
+            session.add(chunk)
+        chunk.user_id = owner
+        chunk.content = content
+        chunk.content_hash = digest
+        chunk.embedding = blob
+        chunk.last_updated = now
+        chunks.append(chunk)
+    session.flush()
+    return [chunk.id for chunk in chunks]
+
+def _chunks_by_id(session, ids):
+    rows = session.query(MemoryChunk.id, MemoryChunk.file_path, MemoryChunk.content).filter(MemoryChunk.id.in_(ids))
+    return {row.id: (row.file_path, row.content) for row in rows}
@@ -0,0 +1,95 @@
+import asyncio
+from datetime import datetime
+from src.config.settings import INTERACTION_BATCH_SIZE, INTERACTION_FLUSH_INTERVAL, INTERACTION_MAX_PENDING
+from src.memory.dal import add_interactions
+
+class InteractionWriter:
+    """Write-behind buffer for the interaction log.
+
+    `add` returns immediately; records are written in one transaction per batch, when
+    `batch_size` are queued or `flush_interval` seconds after the first one arrives.
+    Until a record is committed it stays visible through `pending`, so history reads see
+    their own writes. Written flags are set on the database thread right after the commit,
+    and readers that run there too see each record exactly once.
+    """
+
+    def __init__(self, db, batch_size=INTERACTION_BATCH_SIZE, flush_interval=INTERACTION_FLUSH_INTERVAL,
+                 max_pending=INTERACTION_MAX_PENDING):
+        self.db = db
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._queue = [] # Records not yet committed, oldest first
+        self._lock = asyncio.Lock()
+        self._timer = None
+        self._tasks = set()
+        self.dropped = 0
+
+    def add(self, channel, user_id, prompt, response):
+        """Queue one interaction; its timestamp is taken now, not at flush time."""
+        self._queue.append({
+            "channel": channel,
+            "user_id": user_id,
+            "prompt": prompt,
+            "response": response,
+            "timestamp": datetime.utcnow(),
+            "written": False,
+        })
+        if len(self._queue) > self.max_pending:
+            overflow = len(self._queue) - self.max_pending
+            del self._queue[:overflow]
+            self.dropped += overflow
+            print(f"Warning: interaction log backlog full, dropped {overflow} oldest record(s).")
+
+        if len(self._queue) >= self.batch_size:
+            self._spawn(self.flush())
+        elif self._timer is None:
+            self._timer = self._spawn(self._flush_later())
+
+    def pending(self, user_id=None):
+        """Uncommitted records (optionally for one user), oldest first."""
+        return [r for r in list(self._queue) if not r["written"] and (user_id is None or r["user_id"] == user_id)]
+
+    def _spawn(self, coro):
+        task = asyncio.get_running_loop().create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _flush_later(self):
+        try:
+            await asyncio.sleep(self.flush_interval)
+        finally:
+            self._timer = None
+        await self.flush()
+
+    async def flush(self):
+        """Write everything queued so far in one transaction; on failure it stays queued."""
+        async with self._lock:
+            batch = self.pending()
+            if not batch:
+                return 0
+            try:
+                await self.db.run(_write_batch, batch)
+            except Exception as e:
+                print(f"Error logging interactions, will retry: {str(e)}")
+                if self._timer is None:
+                    self._timer = self._spawn(self._flush_later())
+                return 0
+            self._queue = [r for r in self._queue if not r["written"]]
+            return len(batch)
+
+    async def close(self):
+        """Stop the timer and flush whatever is still queued."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        await asyncio.gather(*list(self._tasks), return_exceptions=True)
+        await self.flush()
+
+def _write_batch(session, batch):
+    add_interactions(session, batch)
+    session.commit()
+    # Flip the flags on the database thread, so readers there never see a record twice
+    for record in batch:
+        record["written"] = True
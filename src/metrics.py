@@ -0,0 +1,213 @@
+import time
+from contextlib import contextmanager
+from aiohttp import web
+from src.config.settings import METRICS_HOST, METRICS_PORT
+
+# Latency buckets in seconds, from cache hits up to multi-minute tool loops
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labels):
+            raise ValueError(f"Metric {self.name} expects labels {self.labels}, got {tuple(labels)}.")
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for key, value in sorted(self._values.items()):
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+    def _render_sample(self, key, value):
+        return [f"{self.name}{_format_labels(self.labels, key)} {value}"]
+
+class Counter(_Metric):
+    """A monotonically increasing count."""
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+class Gauge(_Metric):
+    """A value that can go up and down (set at collection time for queue depths etc.)."""
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        self._values[self._key(labels)] = value
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+class Histogram(_Metric):
+    """Bucketed observations (e.g. latencies) with a running sum and count."""
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        entry = self._values.get(key)
+        if entry is None:
+            entry = self._values[key] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                entry["buckets"][i] += 1
+        entry["sum"] += value
+        entry["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall-clock duration of the block (works around awaits too)."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels):
+        entry = self._values.get(self._key(labels))
+        return entry["count"] if entry else 0
+
+    def _render_sample(self, key, entry):
+        lines = []
+        for bound, cumulative in zip(self.buckets, entry["buckets"]):
+            le = 'le="%s"' % bound
+            lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+        le = 'le="+Inf"'
+        lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {entry['count']}")
+        lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {entry['sum']}")
+        lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {entry['count']}")
+        return lines
+
+class MetricsRegistry:
+    """Holds every metric and renders them in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+
+    def _get(self, cls, name, help_text, labels, **kwargs):
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = cls(name, help_text, labels, **kwargs)
+        return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self._get(Counter, name, help_text, labels)
+
+    def gauge(self, name, help_text, labels=()):
+        return self._get(Gauge, name, help_text, labels)
+
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._get(Histogram, name, help_text, labels, buckets=buckets)
+
+    def on_collect(self, callback):
+        """Run `callback()` before each render, e.g. to copy queue depths into gauges."""
+        self._collectors.append(callback)
+
+    def render(self):
+        for callback in self._collectors:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Metrics collector failed: {str(e)}")
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = MetricsRegistry()
+
+# Request pipeline, from message receipt to reply sent
+MESSAGES = REGISTRY.counter("jovibe_messages_total", "Messages received.", ["channel"])
+REQUEST_SECONDS = REGISTRY.histogram(
+    "jovibe_request_seconds", "Time from receiving a message to the reply being sent.", ["channel"]
+)
+STAGE_SECONDS = REGISTRY.histogram(
+    "jovibe_stage_seconds", "Time spent in each stage of handling a message.", ["stage", "channel"]
+)
+FIRST_DELTA_SECONDS = REGISTRY.histogram(
+    "jovibe_first_delta_seconds", "Time from starting a streamed reply to its first text.", ["channel"]
+)
+
+# Model calls
+MODEL_REQUEST_SECONDS = REGISTRY.histogram(
+    "jovibe_model_request_seconds", "Full model requests, including tool turns.", ["model", "outcome"]
+)
+MODEL_TURN_SECONDS = REGISTRY.histogram(
+    "jovibe_model_turn_seconds", "Single model round-trips (one HTTP request).", ["model"]
+)
+MODEL_ERRORS = REGISTRY.counter("jovibe_model_errors_total", "Failed model requests.", ["model", "kind"])
+RESPONSE_CACHE = REGISTRY.counter("jovibe_response_cache_total", "Response cache lookups.", ["result"])
+
+# Tools
+TOOL_SECONDS = REGISTRY.histogram("jovibe_tool_seconds", "Skill executions.", ["skill", "cached"])
+TOOL_ERRORS = REGISTRY.counter("jovibe_tool_errors_total", "Skill executions that failed or timed out.", ["skill"])
+
+# Scheduler
+QUEUE_DEPTH = REGISTRY.gauge("jovibe_scheduler_queue_depth", "Jobs waiting for a worker slot.", ["priority"])
+RUNNING_JOBS = REGISTRY.gauge("jovibe_scheduler_running", "Jobs holding a worker slot.")
+SHED_JOBS = REGISTRY.gauge("jovibe_scheduler_shed", "Jobs shed at their deadline since startup.", ["priority"])
+
+def watch_scheduler(scheduler, registry=REGISTRY):
+    """Copy the scheduler's queue depths into gauges whenever metrics are scraped."""
+    running = registry.gauge(RUNNING_JOBS.name, RUNNING_JOBS.help)
+    queued = registry.gauge(QUEUE_DEPTH.name, QUEUE_DEPTH.help, QUEUE_DEPTH.labels)
+    shed = registry.gauge(SHED_JOBS.name, SHED_JOBS.help, SHED_JOBS.labels)
+
+    def collect():
+        snapshot = scheduler.snapshot()
+        running.set(snapshot["running"])
+        for priority, depth in snapshot["queued"].items():
+            queued.set(depth, priority=priority)
+            shed.set(snapshot["classes"][priority]["shed"], priority=priority)
+    registry.on_collect(collect)
+
+class MetricsServer:
+    """Serves REGISTRY at /metrics on a local port for Prometheus (or curl) to scrape."""
+
+    def __init__(self, registry=REGISTRY, host=METRICS_HOST, port=METRICS_PORT):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._runner = None
+
+    async def _handle(self, request):
+        return web.Response(text=self.registry.render(), content_type="text/plain", charset="utf-8")
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/metrics", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        print(f"Metrics available at http://{self.host}:{self.port}/metrics")
+
+    async def close(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
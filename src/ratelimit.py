@@ -0,0 +1,140 @@
+import asyncio
+import re
+import time
+from collections import deque
+from src.config.settings import GEMINI_RPM, GEMINI_TPM
+
+def estimate_tokens(*items):
+    """Roughly estimate the token count of prompts, turns and SDK content objects (~4 chars/token)."""
+    chars = 0
+    stack = list(items)
+    while stack:
+        item = stack.pop()
+        if item is None:
+            continue
+        if isinstance(item, str):
+            chars += len(item)
+        elif isinstance(item, dict):
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple)):
+            stack.extend(item)
+        elif hasattr(item, "parts"):
+            stack.append(item.parts)
+        elif hasattr(item, "text") or hasattr(item, "function_call"):
+            stack.append(getattr(item, "text", None))
+            call = getattr(item, "function_call", None)
+            if call:
+                stack.append(str(call.args))
+        else:
+            chars += len(str(item))
+    return chars // 4 + 1
+
+def parse_retry_delay(text):
+    """Extract the server-suggested wait (seconds) from a 429 error body, if any."""
+    match = re.search(r"(?:quotaResetDelay|retryDelay)['\"]?\s*[:=]\s*['\"]([\d.]+)s", text or "")
+    return float(match.group(1)) if match else None
+
+class ModelRateLimit:
+    """Sliding-window request and token accounting for a single model."""
+
+    def __init__(self, rpm, tpm, window=60.0):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.window = window
+        self.requests = deque()
+        self.tokens = deque() # (timestamp, count)
+        self.token_total = 0
+        self.blocked_until = 0.0
+        self.lock = asyncio.Lock()
+
+    def _expire(self, now):
+        horizon = now - self.window
+        while self.requests and self.requests[0] <= horizon:
+            self.requests.popleft()
+        while self.tokens and self.tokens[0][0] <= horizon:
+            self.token_total -= self.tokens.popleft()[1]
+
+    def delay(self, tokens=0, now=None):
+        """Seconds to wait before a request of `tokens` fits inside both windows."""
+        now = now or time.monotonic()
+        self._expire(now)
+        wait = max(0.0, self.blocked_until - now)
+        if self.rpm and len(self.requests) >= self.rpm:
+            wait = max(wait, self.requests[0] + self.window - now)
+        if self.tpm and self.tokens and self.token_total + tokens > self.tpm:
+            # Wait until enough old tokens slide out of the window to make room
+            excess = self.token_total + tokens - self.tpm
+            for ts, count in self.tokens:
+                excess -= count
+                if excess <= 0:
+                    wait = max(wait, ts + self.window - now)
+                    break
+        return wait
+
+    def record(self, tokens=0, now=None):
+        now = now or time.monotonic()
+        self.requests.append(now)
+        if tokens:
+            self.tokens.append((now, tokens))
+            self.token_total += tokens
+
+class RateLimiter:
+    """Per-model RPM/TPM limiter shared by every caller of the brain.
+
+    Callers await acquire() before each model round-trip, so requests go out as fast as the
+    quota allows instead of on a fixed schedule. Server feedback (rate-limit headers and
+    quotaResetDelay on 429s) pushes the next allowed time out via penalize().
+    """
+
+    def __init__(self, rpm=GEMINI_RPM, tpm=GEMINI_TPM, limits=None):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.limits = limits or {} # model -> (rpm, tpm) overrides
+        self._models = {}
+
+    def _model(self, model):
+        if model not in self._models:
+            rpm, tpm = self.limits.get(model, (self.rpm, self.tpm))
+            self._models[model] = ModelRateLimit(rpm, tpm)
+        return self._models[model]
+
+    async def acquire(self, model, tokens=0):
+        """Wait until `model` has room for one request of `tokens`, then reserve it."""
+        bucket = self._model(model)
+        # The lock keeps waiters in FIFO order so a burst is released at the quota rate
+        async with bucket.lock:
+            while True:
+                wait = bucket.delay(tokens)
+                if wait <= 0:
+                    bucket.record(tokens)
+                    return
+                print(f"Rate limit: waiting {wait:.1f}s for {model}...")
+                await asyncio.sleep(wait)
+
+    def delay(self, model, tokens=0):
+        """Seconds until `model` could accept a request, without reserving anything."""
+        return self._model(model).delay(tokens)
+
+    def penalize(self, model, seconds):
+        """Block `model` for `seconds` (e.g. from quotaResetDelay)."""
+        bucket = self._model(model)
+        bucket.blocked_until = max(bucket.blocked_until, time.monotonic() + seconds)
+
+    def update_from_headers(self, model, headers):
+        """Honour Retry-After and x-ratelimit-* response headers when the server sends them."""
+        if not headers:
+            return
+        retry_after = headers.get("Retry-After") or headers.get("retry-after")
+        if retry_after:
+            try:
+                self.penalize(model, float(retry_after))
+            except ValueError:
+                pass
+        remaining = headers.get("x-ratelimit-remaining-requests")
+        reset = headers.get("x-ratelimit-reset-requests")
+        if remaining is not None and reset:
+            try:
+                if int(remaining) <= 0:
+                    self.penalize(model, float(str(reset).rstrip("s")))
+            except ValueError:
+                pass
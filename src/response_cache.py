@@ -0,0 +1,121 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from src.config.settings import (
+    RESPONSE_CACHE_FILE, RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL
+)
+from src.utils.lru import LRUCache
+
+def _to_jsonable(obj):
+    """Serialize SDK content objects (pydantic models) the same way every time."""
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(exclude_none=True, mode="json")
+    return str(obj)
+
+def text_hash(text):
+    if getattr(text, "content_hash", None): # SystemPrompt hashes itself once
+        return text.content_hash
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+def request_fingerprint(model, prompt, system_instruction=None, tools=None):
+    """Content-address an LLM request: model, system instruction hash, contents and tool schemas."""
+    key = {
+        "model": model,
+        "system": text_hash(system_instruction),
+        "contents": prompt,
+        "tools": tools or [],
+    }
+    blob = json.dumps(key, sort_keys=True, default=_to_jsonable, ensure_ascii=False)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+class ResponseCache:
+    """Two-tier exact-match cache for model responses.
+
+    Tier 1 is an in-memory LRU; tier 2 is a small SQLite file under STORAGE_DIR so cached
+    answers survive restarts. Disk access runs in a worker thread to keep the event loop free.
+    """
+
+    def __init__(self, path=RESPONSE_CACHE_FILE, maxsize=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL):
+        self.ttl = ttl
+        self.memory = LRUCache(maxsize=maxsize, ttl=ttl)
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        if path:
+            try:
+                self._conn = sqlite3.connect(str(path), check_same_thread=False)
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS response_cache "
+                    "(key TEXT PRIMARY KEY, response TEXT NOT NULL, expires_at REAL NOT NULL)"
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                print(f"Response cache disk tier disabled: {str(e)}")
+                self._conn = None
+
+    def _disk_get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, expires_at FROM response_cache WHERE key = ? AND expires_at > ?",
+                (key, time.time())
+            ).fetchone()
+        return row
+
+    def _disk_set(self, key, response, expires_at):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO response_cache (key, response, expires_at) VALUES (?, ?, ?)",
+                (key, response, expires_at)
+            )
+            self._writes += 1
+            # Prune expired rows now and then so the file does not grow without bound
+            if self._writes % 100 == 0:
+                self._conn.execute("DELETE FROM response_cache WHERE expires_at <= ?", (time.time(),))
+            self._conn.commit()
+
+    async def get(self, key):
+        """Return the cached response for `key`, or None on a miss."""
+        value = self.memory.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        if self._conn is not None:
+            row = await asyncio.to_thread(self._disk_get, key)
+            if row:
+                self.hits += 1
+                self.disk_hits += 1
+                self.memory.set(key, row[0], expires_at=row[1])
+                return row[0]
+        self.misses += 1
+        return None
+
+    async def set(self, key, response):
+        expires_at = time.time() + self.ttl
+        self.memory.set(key, response, expires_at=expires_at)
+        if self._conn is not None:
+            try:
+                await asyncio.to_thread(self._disk_set, key, response, expires_at)
+            except sqlite3.Error as e:
+                print(f"Response cache write failed: {str(e)}")
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self.memory),
+        }
+
+    def close(self):
+        if self._conn is not None:
+            with self._lock:
+                self._conn.close()
+            self._conn = None
@@ -0,0 +1,166 @@
+import os
+from collections import deque
+from src.breaker import CircuitBreaker
+from src.config.settings import GEMINI_MODEL, HEDGE_AFTER
+from src.errors import INVALID
+
+# Request classes the router knows how to rank models for
+INTERACTIVE = "interactive"
+HEARTBEAT = "heartbeat"
+
+class ModelCallError(RuntimeError):
+    """Wraps a failed model call so the caller knows which model produced the error."""
+
+    def __init__(self, model, error):
+        super().__init__(str(error))
+        self.model = model
+        self.error = error
+
+class ModelStats:
+    """Rolling latency and outcome samples for one model."""
+
+    MIN_SAMPLES = 4
+
+    def __init__(self, window=50):
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window) # True for success, False for failure
+
+    def record(self, latency=None, ok=None):
+        if latency is not None:
+            self.latencies.append(latency)
+        if ok is not None:
+            self.outcomes.append(ok)
+
+    def percentile(self, pct):
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    @property
+    def p50(self):
+        return self.percentile(50)
+
+    @property
+    def p95(self):
+        return self.percentile(95)
+
+    @property
+    def error_rate(self):
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    @property
+    def unhealthy(self):
+        return len(self.outcomes) >= self.MIN_SAMPLES and self.error_rate > 0.5
+
+class ModelRouter:
+    """Chooses which model serves each request.
+
+    Models are ranked per request class: interactive requests follow the preferred model and
+    the hierarchy, heartbeat requests favour the cheapest 'lite'/'flash' models. Models
+    with an open circuit breaker are skipped, and unhealthy, rate-limited or unusually slow
+    models are demoted. Nothing is mutated globally, so the preferred model is used again as
+    soon as its breaker lets a probe through and the probe succeeds.
+    """
+
+    def __init__(self, hierarchy, limiter=None, hedge_after=HEDGE_AFTER):
+        self.hierarchy = list(hierarchy)
+        self.limiter = limiter
+        self.hedge_after = hedge_after
+        self.stats = {}
+        self.breakers = {}
+
+    def preferred(self):
+        """The user's chosen model (GEMINI_MODEL, also set by the switch_model skill)."""
+        return os.getenv("GEMINI_MODEL", GEMINI_MODEL)
+
+    def _stats(self, model):
+        if model not in self.stats:
+            self.stats[model] = ModelStats()
+        return self.stats[model]
+
+    def _base_order(self, request_class):
+        if request_class == HEARTBEAT:
+            # Cheapest first: background work should not spend premium quota
+            def cost(model):
+                return 0 if "lite" in model else 1 if "flash" in model else 2
+            return sorted(self.hierarchy, key=cost)
+        order = [self.preferred()] + self.hierarchy
+        return list(dict.fromkeys(order))
+
+    def breaker(self, model):
+        if model not in self.breakers:
+            self.breakers[model] = CircuitBreaker()
+        return self.breakers[model]
+
+    def is_available(self, model):
+        return self.breaker(model).available()
+
+    def candidates(self, request_class=INTERACTIVE):
+        """Available models for this request class, best first."""
+        available = [m for m in self._base_order(request_class) if self.is_available(m)]
+        p95s = [self._stats(m).p95 for m in available if self._stats(m).p95 is not None]
+        best_p95 = min(p95s) if p95s else None
+
+        def score(item):
+            position, model = item
+            stats = self._stats(model)
+            penalty = 0
+            if stats.unhealthy:
+                penalty += 10
+            if self.limiter and self.limiter.delay(model) > 0:
+                penalty += 3 # Another model with quota headroom answers sooner than waiting
+            if request_class == INTERACTIVE and best_p95 and stats.p95 and stats.p95 > 2 * best_p95:
+                penalty += 2
+            return position + penalty
+
+        return [model for _, model in sorted(enumerate(available), key=score)]
+
+    def select(self, request_class=INTERACTIVE):
+        """Best available model, without claiming it (use acquire() to actually send a request)."""
+        ranked = self.candidates(request_class)
+        return ranked[0] if ranked else None
+
+    def acquire(self, request_class=INTERACTIVE, exclude=()):
+        """Claim the best model whose breaker admits a request, or None if every breaker is open."""
+        for model in self.candidates(request_class):
+            if model not in exclude and self.breaker(model).allow():
+                return model
+        return None
+
+    def retry_in(self):
+        """Seconds until the first open breaker lets a probe through."""
+        return min((b.retry_in() for b in self.breakers.values()), default=0.0)
+
+    def record_success(self, model, latency=None):
+        self._stats(model).record(latency, True)
+        self.breaker(model).record_success()
+
+    def record_failure(self, model, latency=None, error=None):
+        if getattr(error, "kind", None) == INVALID:
+            # The caller's bad request says nothing about the model's health
+            self.record_latency(model, latency)
+            return
+        self._stats(model).record(latency, False)
+        self.breaker(model).record_failure(error)
+
+    def record_latency(self, model, latency):
+        """Record a latency sample with no outcome (e.g. a hedged request that was cancelled)."""
+        self._stats(model).record(latency)
+        self.breaker(model).release()
+
+    def snapshot(self):
+        """Per-model health summary for logging and metrics."""
+        return {
+            model: {
+                "p50": stats.p50,
+                "p95": stats.p95,
+                "error_rate": stats.error_rate,
+                "breaker": self.breaker(model).state,
+                "available": self.is_available(model),
+            }
+            for model, stats in self.stats.items()
+        }
@@ -0,0 +1,132 @@
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from src.config.settings import LLM_CONCURRENCY, SCHEDULER_MAX_WAIT
+from src.router import INTERACTIVE
+from src.tracing import span
+
+# Priority classes, highest first. Interactive is a user waiting on a reply; proactive is
+# agent-initiated outreach such as the heartbeat; background is housekeeping nobody waits on.
+PROACTIVE = "proactive"
+BACKGROUND = "background"
+PRIORITIES = (INTERACTIVE, PROACTIVE, BACKGROUND)
+
+class JobShed(RuntimeError):
+    """Raised when a queued job's deadline passes before a worker slot frees up."""
+
+class Scheduler:
+    """Admits LLM jobs into a bounded number of worker slots.
+
+    Waiting jobs are served strictly by priority class. Within a class, users are interleaved
+    by start-time fair queuing: each job is tagged with its user's virtual finish time, so one
+    user with ten queued requests cannot hold back another user's single request. A job that
+    is still queued at its deadline is shed with JobShed instead of running late.
+    """
+
+    def __init__(self, concurrency=LLM_CONCURRENCY, max_wait=None, weights=None):
+        self.concurrency = concurrency
+        self.max_wait = SCHEDULER_MAX_WAIT if max_wait is None else max_wait
+        self.weights = weights or {} # user_id -> share (default 1)
+        self.running = 0
+        self._queues = {p: [] for p in PRIORITIES} # heap of (tag, seq, enqueued_at, future)
+        self._virtual = {p: 0.0 for p in PRIORITIES}
+        self._finish = {} # (priority, user_id) -> tag of that user's last queued job
+        self._seq = itertools.count()
+        self.stats = {p: {"dispatched": 0, "shed": 0, "wait_total": 0.0, "wait_max": 0.0} for p in PRIORITIES}
+
+    def depth(self, priority=None):
+        """Number of jobs waiting for a slot (in one class, or overall)."""
+        classes = [priority] if priority else PRIORITIES
+        return sum(1 for p in classes for entry in self._queues[p] if not entry[3].done())
+
+    def _record(self, priority, waited):
+        stats = self.stats[priority]
+        stats["dispatched"] += 1
+        stats["wait_total"] += waited
+        stats["wait_max"] = max(stats["wait_max"], waited)
+
+    async def acquire(self, priority=INTERACTIVE, user_id=None, deadline=None):
+        """Wait for a worker slot. `deadline` is a time.monotonic() value; None uses the class default."""
+        if priority not in self._queues:
+            raise ValueError(f"Unknown priority class '{priority}'.")
+        now = time.monotonic()
+        if deadline is None and self.max_wait.get(priority):
+            deadline = now + self.max_wait[priority]
+
+        if self.running < self.concurrency and not self.depth():
+            self.running += 1
+            self._record(priority, 0.0)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        key = (priority, user_id)
+        tag = max(self._virtual[priority], self._finish.get(key, 0.0)) + 1.0 / self.weights.get(user_id, 1)
+        self._finish[key] = tag
+        heapq.heappush(self._queues[priority], (tag, next(self._seq), now, future))
+
+        timeout = None if deadline is None else max(0.0, deadline - now)
+        try:
+            done, _ = await asyncio.wait({future}, timeout=timeout)
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release() # Granted a slot just as the caller gave up
+            future.cancel()
+            raise
+        if not done:
+            future.cancel()
+            self.stats[priority]["shed"] += 1
+            raise JobShed(f"Request dropped after waiting {time.monotonic() - now:.0f}s in the {priority} queue.")
+
+    def release(self):
+        self.running -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        while self.running < self.concurrency:
+            entry = self._next()
+            if entry is None:
+                return
+            priority, (tag, _, enqueued_at, future) = entry
+            self._virtual[priority] = tag
+            self.running += 1
+            self._record(priority, time.monotonic() - enqueued_at)
+            future.set_result(None)
+
+    def _next(self):
+        """Pop the next live waiter from the highest non-empty priority class."""
+        for priority in PRIORITIES:
+            queue = self._queues[priority]
+            while queue:
+                entry = heapq.heappop(queue)
+                if not entry[3].done(): # Skip shed or cancelled waiters
+                    if not queue:
+                        self._forget(priority)
+                    return priority, entry
+            self._forget(priority)
+        return None
+
+    def _forget(self, priority):
+        # An empty class has no backlog to be fair about; drop its per-user finish tags
+        for key in [k for k in self._finish if k[0] == priority]:
+            del self._finish[key]
+
+    @asynccontextmanager
+    async def slot(self, priority=INTERACTIVE, user_id=None, deadline=None):
+        """Hold a worker slot for the duration of the block."""
+        with span("scheduler_wait", priority=priority):
+            await self.acquire(priority, user_id, deadline)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def snapshot(self):
+        """Queue depths and wait statistics for logging and metrics."""
+        return {
+            "running": self.running,
+            "concurrency": self.concurrency,
+            "queued": {p: self.depth(p) for p in PRIORITIES},
+            "classes": {p: dict(stats) for p, stats in self.stats.items()},
+        }
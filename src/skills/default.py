@@ -3,13 +3,15 @@ import subprocess
 import aiohttp
 from datetime import datetime
 from src.skills.registry import SkillRegistry
-from src.config.settings import BASE_DIR, STORAGE_DIR, USER_FILE
-from src.memory.db import Session, Interaction
+from src.config.settings import BASE_DIR, STORAGE_DIR, TOOL_TIMEOUT, USER_FILE
+from src.memory.dal import get_database, search_interactions
+from src.utils.http_pool import get_http_pool
 
 import re
 import glob
 
-@SkillRegistry.register("glob_files")
+# Not result-cached: edits anywhere below BASE_DIR must show up at once, not after a TTL
+@SkillRegistry.register("glob_files", idempotent=True)
 def glob_files(pattern: str):
     """Finds files matching a glob pattern (e.g., 'src/**/*.py')."""
     try:
@@ -20,7 +22,7 @@ def glob_files(pattern: str):
     except Exception as e:
         return f"Error globbing files: {str(e)}"
 
-@SkillRegistry.register("grep_search")
+@SkillRegistry.register("grep_search", idempotent=True)
 def grep_search(pattern: str, file_pattern: str = "**/*.*"):
     """Searches for a regex pattern within files matching the file_pattern."""
     results = []
@@ -82,7 +84,7 @@ def termux_take_photo(camera_id: int = 0, filename: str = "photo.jpg"):
     save_path = STORAGE_DIR / filename
     command = f"termux-camera-photo -c {camera_id} {save_path}"
     try:
-        result = subprocess.run(command, shell=True, capture_output=True, text=True)
+        result = subprocess.run(command, shell=True, capture_output=True, text=True, timeout=TOOL_TIMEOUT)
         if result.returncode == 0:
             return f"Photo saved to {save_path}"
         else:
@@ -95,7 +97,7 @@ def termux_send_notification(title: str, message: str):
     """Sends a system notification on the device (Termux only)."""
     command = f'termux-notification --title "{title}" --content "{message}"'
     try:
-        subprocess.run(command, shell=True)
+        subprocess.run(command, shell=True, timeout=TOOL_TIMEOUT)
         return "Notification sent."
     except Exception as e:
         return f"Error sending notification: {str(e)}"
@@ -153,7 +155,7 @@ def write_project_file(file_path: str, content: str):
     except Exception as e:
         return f"Error writing file: {str(e)}"
 
-@SkillRegistry.register("get_system_info")
+@SkillRegistry.register("get_system_info", cache_ttl=60)
 def get_system_info():
     """Returns basic information about the system (OS, CPU, etc.)."""
     try:
@@ -191,45 +193,47 @@ def append_to_heartbeat(task_description: str):
     except Exception as e:
         return f"Error appending task: {str(e)}"
 
-@SkillRegistry.register("fetch_web_page")
+@SkillRegistry.register("fetch_web_page", cache_ttl=300, cache_key=lambda url: url.strip().split("#")[0])
 async def fetch_web_page(url: str):
     """Fetches and cleans the text content of a web page given its URL."""
     try:
         headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
         }
-        async with aiohttp.ClientSession(headers=headers) as session:
-            async with session.get(url, timeout=15) as response:
-                if response.status == 200:
-                    html = await response.text()
-                    
-                    # Use BeautifulSoup to clean the HTML
-                    from bs4 import BeautifulSoup
-                    soup = BeautifulSoup(html, "html.parser")
-                    
-                    # Remove script and style elements
-                    for script_or_style in soup(["script", "style", "header", "footer", "nav"]):
-                        script_or_style.decompose()
-                    
-                    # Get text and clean up whitespace
-                    text = soup.get_text(separator=" ")
-                    lines = (line.strip() for line in text.splitlines())
-                    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-                    clean_text = "\n".join(chunk for chunk in chunks if chunk)
-                    
-                    # Return first 6000 characters (slightly increased limit)
-                    return clean_text[:6000]
-                else:
-                    return f"Error: Received status code {response.status}"
+        session = get_http_pool().session()
+        async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=15)) as response:
+            if response.status == 200:
+                html = await response.text()
+                
+                # Use BeautifulSoup to clean the HTML
+                from bs4 import BeautifulSoup
+                soup = BeautifulSoup(html, "html.parser")
+                
+                # Remove script and style elements
+                for script_or_style in soup(["script", "style", "header", "footer", "nav"]):
+                    script_or_style.decompose()
+                
+                # Get text and clean up whitespace
+                text = soup.get_text(separator=" ")
+                lines = (line.strip() for line in text.splitlines())
+                chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+                clean_text = "\n".join(chunk for chunk in chunks if chunk)
+                
+                # Return first 6000 characters (slightly increased limit)
+                return clean_text[:6000]
+            else:
+                return f"Error: Received status code {response.status}"
     except Exception as e:
         return f"Error fetching URL: {str(e)}"
 
-@SkillRegistry.register("get_current_time")
+@SkillRegistry.register("get_current_time", idempotent=True)
 def get_current_time():
     """Returns the current date and time in ISO format."""
     return datetime.now().isoformat()
 
-@SkillRegistry.register("read_project_file")
+@SkillRegistry.register(
+    "read_project_file", cache_ttl=300, watch_paths=lambda file_path: [BASE_DIR / file_path]
+)
 def read_project_file(file_path: str):
     """Reads the content of a file within the project directory."""
     full_path = BASE_DIR / file_path
@@ -242,7 +246,9 @@ def read_project_file(file_path: str):
     except Exception as e:
         return f"Error reading file: {str(e)}"
 
-@SkillRegistry.register("list_project_files")
+@SkillRegistry.register(
+    "list_project_files", cache_ttl=300, watch_paths=lambda directory=".": [BASE_DIR / directory]
+)
 def list_project_files(directory: str = "."):
     """Lists all files and folders in a specific project directory."""
     full_path = BASE_DIR / directory
@@ -255,25 +261,37 @@ def list_project_files(directory: str = "."):
     except Exception as e:
         return f"Error listing directory: {str(e)}"
 
-@SkillRegistry.register("search_memory")
-def search_memory(query: str, limit: int = 5):
-    """Searches through the agent's interaction history for a keyword."""
-    session = Session()
+@SkillRegistry.register("search_memory", idempotent=True)
+async def search_memory(query: str, limit: int = 5, user_id: str = "", channel: str = "",
+                        since: str = "", until: str = ""):
+    """Full-text search of the agent's interaction history, best matches first.
+    Optionally filter by user_id, channel, and an ISO date/time range (since inclusive, until exclusive)."""
     try:
-        results = session.query(Interaction).filter(
-            (Interaction.prompt.like(f"%{query}%")) | 
-            (Interaction.response.like(f"%{query}%"))
-        ).order_by(Interaction.timestamp.desc()).limit(limit).all()
-        
-        if not results:
-            return "No matching interactions found in memory."
-            
-        formatted = []
-        for r in results:
-            formatted.append(f"[{r.timestamp}] {r.channel} - User: {r.prompt} | AI: {r.response[:100]}...")
-        return "\n".join(formatted)
-    finally:
-        session.close()
+        since_dt = datetime.fromisoformat(since) if since else None
+        until_dt = datetime.fromisoformat(until) if until else None
+    except ValueError as e:
+        return f"Error: invalid date filter: {str(e)}"
+    results = await get_database().run(
+        search_interactions, query, limit, user_id=user_id, channel=channel, since=since_dt, until=until_dt
+    )
+    if not results:
+        return "No matching interactions found in memory."
+
+    formatted = []
+    for timestamp, channel, prompt, response in results:
+        formatted.append(f"[{timestamp}] {channel} - User: {prompt} | AI: {response[:100]}...")
+    return "\n".join(formatted)
+
+@SkillRegistry.register("semantic_search_memory", idempotent=True)
+async def semantic_search_memory(query: str, limit: int = 5):
+    """Finds memories (interactions and markdown notes) related in meaning to the query, not just by keyword."""
+    from src.memory.semantic import get_semantic_memory
+    memory = get_semantic_memory()
+    memory.watch() # Indexing runs in the background, never inside this call's timeout
+    hits = await memory.search(query, limit)
+    if not hits:
+        return "No related memories found."
+    return "\n".join(f"[{hit['score']:.2f}] {hit['source']}: {hit['content'][:300]}" for hit in hits)
 
 @SkillRegistry.register("git_ops")
 def git_ops(action: str, repo_url: str = "", message: str = "", branch: str = "main"):
@@ -292,13 +310,13 @@ def git_ops(action: str, repo_url: str = "", message: str = "", branch: str = "m
         else:
             return "Invalid action. Use 'clone', 'pull', 'push', 'commit_all', or 'status'."
         
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True, cwd=BASE_DIR)
+        result = subprocess.run(cmd, shell=True, capture_output=True, text=True, cwd=BASE_DIR, timeout=TOOL_TIMEOUT)
         output = result.stdout if result.returncode == 0 else result.stderr
         return f"Git {action} result:\n{output}"
     except Exception as e:
         return f"Error during git {action}: {str(e)}"
 
-@SkillRegistry.register("investigate_codebase")
+@SkillRegistry.register("investigate_codebase", idempotent=True)
 def investigate_codebase(directory: str = "."):
     """Provides a high-level architectural overview of a codebase."""
     full_path = BASE_DIR / directory
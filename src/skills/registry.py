@@ -1,9 +1,25 @@
+import asyncio
+import functools
 import inspect
-from typing import Any, Callable, Dict, List, Optional
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from src.config.settings import SKILL_CACHE_SIZE, TOOL_TIMEOUT, TOOL_WORKERS
+from src.metrics import TOOL_ERRORS, TOOL_SECONDS
+from src.tracing import span
+from src.utils.lru import LRUCache
+from src.utils.singleflight import SingleFlight
 
 class SkillRegistry:
     _instance = None
     _skills: Dict[str, Callable] = {}
+    _skill_meta: Dict[str, Dict[str, Any]] = {}
+    _executor: Optional[ThreadPoolExecutor] = None
+    _side_effect_executor: Optional[ThreadPoolExecutor] = None
+    _flights = SingleFlight()
+    _results = LRUCache(maxsize=SKILL_CACHE_SIZE) # (name, key) -> (result, file stamp)
 
     def __new__(cls):
         if cls._instance is None:
@@ -11,11 +27,24 @@ class SkillRegistry:
         return cls._instance
 
     @classmethod
-    def register(cls, name: Optional[str] = None):
-        """Decorator to register a function as a skill."""
+    def register(cls, name: Optional[str] = None, idempotent: bool = False, cache_ttl: Optional[float] = None,
+                 cache_key: Optional[Callable] = None, watch_paths: Optional[Callable] = None):
+        """Decorator to register a function as a skill.
+
+        Mark read-only skills `idempotent=True` so concurrent identical calls share one execution.
+        `cache_ttl` (implies idempotent) also keeps successful results for that many seconds.
+        `cache_key(**arguments)` normalizes arguments into the cache key (default: the arguments
+        themselves), and `watch_paths(**arguments)` lists files whose mtime invalidates the entry.
+        """
         def decorator(func: Callable):
             skill_name = name or func.__name__
             cls._skills[skill_name] = func
+            cls._skill_meta[skill_name] = {
+                "idempotent": idempotent or cache_ttl is not None,
+                "cache_ttl": cache_ttl,
+                "cache_key": cache_key,
+                "watch_paths": watch_paths,
+            }
             return func
         return decorator
 
@@ -68,13 +97,132 @@ class SkillRegistry:
             })
         return schemas
 
-    async def execute(self, name: str, arguments: Dict[str, Any]) -> Any:
-        """Execute a skill by name."""
+    @classmethod
+    def _get_executor(cls, idempotent: bool = True) -> ThreadPoolExecutor:
+        """Bounded thread pools so synchronous skills never block the event loop.
+
+        Side-effecting skills (shell, git, device commands) get their own pool, so their
+        timed-out calls, whose threads keep running, cannot starve the read-only skills.
+        """
+        if idempotent:
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(max_workers=TOOL_WORKERS, thread_name_prefix="skill")
+            return cls._executor
+        if cls._side_effect_executor is None:
+            cls._side_effect_executor = ThreadPoolExecutor(max_workers=TOOL_WORKERS, thread_name_prefix="skill-write")
+        return cls._side_effect_executor
+
+    @classmethod
+    def is_idempotent(cls, name: str) -> bool:
+        return cls._skill_meta.get(name, {}).get("idempotent", False)
+
+    async def execute(self, name: str, arguments: Dict[str, Any], timeout: Optional[float] = TOOL_TIMEOUT) -> Any:
+        """Execute a skill by name.
+
+        Coroutine skills run on the event loop; plain functions run on the skill thread pool.
+        Raises asyncio.TimeoutError if the skill takes longer than `timeout` seconds (a timed-out
+        thread cannot be interrupted, but its result is discarded).
+        """
+        result, _ = await self.execute_cached(name, arguments, timeout)
+        return result
+
+    async def execute_cached(self, name: str, arguments: Dict[str, Any],
+                             timeout: Optional[float] = TOOL_TIMEOUT) -> Tuple[Any, bool]:
+        """Like execute(), but returns (result, served_from_cache)."""
         if name not in self._skills:
             raise ValueError(f"Skill '{name}' not found.")
         
+        meta = self._skill_meta.get(name, {})
+        if not meta.get("idempotent"):
+            return await self._run(name, arguments, timeout), False
+
+        key = self._cache_key(name, arguments)
+        stamp = None
+        if meta.get("cache_ttl") is not None:
+            stamp = self._file_stamp(meta, arguments)
+            entry = self._results.get(key)
+            if entry is not None and entry[1] == stamp:
+                return entry[0], True
+
+        # Identical concurrent calls (e.g. the same web_search from parallel chats) run once
+        result = await self._flights.do(key + (timeout,), lambda: self._run(name, arguments, timeout))
+        if meta.get("cache_ttl") is not None and not str(result).startswith(("Error", "Tool Error")):
+            self._results.set(key, (result, stamp), ttl=meta["cache_ttl"])
+        return result, False
+
+    def _cache_key(self, name: str, arguments: Dict[str, Any]) -> Tuple[str, Any]:
+        key_func = self._skill_meta.get(name, {}).get("cache_key")
+        if key_func:
+            return (name, key_func(**arguments))
+        return (name, json.dumps(arguments, sort_keys=True, default=str))
+
+    @staticmethod
+    def _file_stamp(meta: Dict[str, Any], arguments: Dict[str, Any]) -> Optional[Tuple]:
+        """(mtime, size) of each watched path, so edits on disk invalidate cached results."""
+        if not meta.get("watch_paths"):
+            return None
+        stamp = []
+        for path in meta["watch_paths"](**arguments):
+            try:
+                st = os.stat(path)
+                stamp.append((str(path), st.st_mtime_ns, st.st_size))
+            except OSError:
+                stamp.append((str(path), None, None))
+        return tuple(stamp)
+
+    @classmethod
+    def clear_cache(cls):
+        cls._results.clear()
+
+    async def _run(self, name: str, arguments: Dict[str, Any], timeout: Optional[float]) -> Any:
         func = self._skills[name]
         if inspect.iscoroutinefunction(func):
-            return await func(**arguments)
+            call = func(**arguments)
         else:
-            return func(**arguments)
+            loop = asyncio.get_running_loop()
+            executor = self._get_executor(self.is_idempotent(name))
+            call = loop.run_in_executor(executor, functools.partial(func, **arguments))
+        return await asyncio.wait_for(call, timeout)
+
+    async def execute_many(self, calls: List[Tuple[str, Dict[str, Any]]], timeout: Optional[float] = TOOL_TIMEOUT,
+                           report_cache: bool = False) -> List[Any]:
+        """Execute skill calls, returning results in call order.
+
+        Consecutive idempotent calls run concurrently. A call to a side-effecting skill runs
+        alone, after the calls issued before it finish and before the ones after it start, so
+        writes keep the model's order and reads never race them. Failures and timeouts are returned as 'Tool Error: ...' strings so one bad call
+        does not discard the others. Cancelling the caller cancels every pending call.
+        With report_cache=True each item is a (result, served_from_cache) pair.
+        """
+        async def _run(name, arguments):
+            started = time.perf_counter()
+            with span("execute", skill=name) as current:
+                try:
+                    result, cached = await self.execute_cached(name, arguments or {}, timeout=timeout)
+                except asyncio.TimeoutError:
+                    result, cached = f"Tool Error: '{name}' timed out after {timeout}s", False
+                except Exception as e:
+                    result, cached = f"Tool Error: {str(e)}", False
+                if current:
+                    current.set(cached=cached)
+            TOOL_SECONDS.observe(time.perf_counter() - started, skill=name, cached=cached)
+            if str(result).startswith("Tool Error"):
+                TOOL_ERRORS.inc(skill=name)
+            return result, cached
+
+        results = [None] * len(calls)
+        batch = []
+
+        async def _flush():
+            for i, result in zip(batch, await asyncio.gather(*(_run(*calls[i]) for i in batch))):
+                results[i] = result
+            batch.clear()
+
+        for i, (name, _) in enumerate(calls):
+            if self.is_idempotent(name):
+                batch.append(i)
+                continue
+            await _flush()
+            results[i] = await _run(*calls[i])
+        await _flush()
+        return results if report_cache else [result for result, _ in results]
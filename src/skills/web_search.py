@@ -2,7 +2,10 @@ import requests
 from bs4 import BeautifulSoup
 from src.skills.registry import SkillRegistry
 
-@SkillRegistry.register("web_search")
+@SkillRegistry.register(
+    "web_search", cache_ttl=600,
+    cache_key=lambda query, num_results=5: (" ".join(query.lower().split()), num_results)
+)
 def web_search(query: str, num_results: int = 5):
     """
     Searches the web for a query and returns the top results (titles and URLs).
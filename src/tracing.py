@@ -0,0 +1,179 @@
+import argparse
+import contextvars
+import json
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from src.config.settings import TRACE_FILE, TRACING_ENABLED
+
+class Span:
+    """One timed operation inside a trace."""
+
+    __slots__ = ("trace", "span_id", "parent_id", "name", "attrs", "start", "duration", "error")
+
+    def __init__(self, trace, parent_id, name, attrs):
+        self.trace = trace
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.name = name
+        self.attrs = attrs
+        self.start = time.time()
+        self.duration = None
+        self.error = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def to_dict(self):
+        return {
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "duration": self.duration,
+            "attrs": self.attrs,
+            "error": self.error,
+        }
+
+class _Trace:
+    def __init__(self):
+        self.trace_id = uuid.uuid4().hex
+        self.spans = []
+
+class JsonlExporter:
+    """Appends each finished trace as one JSON line."""
+
+    def __init__(self, path=TRACE_FILE):
+        self.path = path
+
+    def export(self, root, spans):
+        record = {
+            "trace_id": root.trace.trace_id,
+            "name": root.name,
+            "start": root.start,
+            "duration": root.duration,
+            "spans": [s.to_dict() for s in spans],
+        }
+        try:
+            with open(self.path, "a") as f:
+                f.write(json.dumps(record, default=str) + "\n")
+        except OSError as e:
+            print(f"Could not write trace: {str(e)}")
+
+class Tracer:
+    """Context-propagated spans: nested `with span(...)` blocks (including across awaits and
+    tasks created inside them) form one trace, exported when its root span ends.
+
+    When disabled, span() yields None without allocating anything.
+    """
+
+    def __init__(self, enabled=TRACING_ENABLED, exporter=None):
+        self.enabled = enabled
+        self.exporter = exporter or JsonlExporter()
+        self._current = contextvars.ContextVar("jovibe_span", default=None)
+
+    def current(self):
+        return self._current.get()
+
+    @contextmanager
+    def span(self, name, **attrs):
+        if not self.enabled:
+            yield None
+            return
+        parent = self._current.get()
+        trace = parent.trace if parent else _Trace()
+        current = Span(trace, parent.span_id if parent else None, name, attrs)
+        trace.spans.append(current)
+        token = self._current.set(current)
+        started = time.perf_counter()
+        try:
+            yield current
+        except BaseException as e:
+            current.error = f"{type(e).__name__}: {str(e)[:200]}"
+            raise
+        finally:
+            current.duration = time.perf_counter() - started
+            self._current.reset(token)
+            if parent is None:
+                # Children still running (e.g. abandoned tasks) are exported without a duration
+                self.exporter.export(current, trace.spans)
+
+_tracer = Tracer()
+
+def get_tracer():
+    return _tracer
+
+def span(name, **attrs):
+    """Shortcut for get_tracer().span(...)."""
+    return _tracer.span(name, **attrs)
+
+def configure(enabled=None, path=None):
+    """Turn tracing on/off or redirect its output (used by tests and tools)."""
+    if enabled is not None:
+        _tracer.enabled = enabled
+    if path is not None:
+        _tracer.exporter = JsonlExporter(path)
+
+def load_traces(path=TRACE_FILE):
+    traces = []
+    if not os.path.exists(path):
+        return traces
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                traces.append(json.loads(line))
+            except ValueError:
+                continue # Partially written last line
+    return traces
+
+def render_trace(trace, width=40):
+    """Render one trace as an indented waterfall with a timing bar per span."""
+    total = trace["duration"] or 0.0
+    children = {}
+    for s in trace["spans"]:
+        children.setdefault(s["parent_id"], []).append(s)
+
+    lines = [f"{trace['name']}  {total:.3f}s  trace={trace['trace_id']}"]
+
+    def walk(parent_id, depth):
+        for s in sorted(children.get(parent_id, []), key=lambda s: s["start"]):
+            offset = s["start"] - trace["start"]
+            duration = s["duration"]
+            if total > 0 and duration is not None:
+                left = int(width * offset / total)
+                size = max(1, int(width * duration / total))
+                bar = " " * min(left, width - 1) + "#" * min(size, width - min(left, width - 1))
+            else:
+                bar = ""
+            label = ("  " * depth + s["name"])[:40]
+            attrs = " ".join(f"{k}={v}" for k, v in (s.get("attrs") or {}).items())
+            timing = f"{duration:8.3f}s" if duration is not None else "  (open)"
+            error = f"  ERROR {s['error']}" if s.get("error") else ""
+            lines.append(f"  {label:<40} {timing} +{offset:7.3f}s |{bar:<{width}}| {attrs}{error}")
+            walk(s["span_id"], depth + 1)
+
+    walk(None, 0)
+    return "\n".join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show the slowest recorded request traces.")
+    parser.add_argument("-n", "--limit", type=int, default=5, help="number of traces to show")
+    parser.add_argument("--name", help="only traces whose root span has this name")
+    parser.add_argument("--file", default=str(TRACE_FILE), help="trace JSONL file")
+    args = parser.parse_args(argv)
+
+    traces = [t for t in load_traces(args.file) if not args.name or t["name"] == args.name]
+    if not traces:
+        print(f"No traces found in {args.file}. Set TRACING_ENABLED=true to record them.")
+        return
+    traces.sort(key=lambda t: t["duration"] or 0.0, reverse=True)
+    for trace in traces[:args.limit]:
+        print(render_trace(trace))
+        print()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import asyncio
+import aiohttp
+
+class HttpPool:
+    """A long-lived aiohttp session with keep-alive connection pooling.
+
+    Opening a new ClientSession per request pays a fresh TCP+TLS handshake every time.
+    This pool keeps one session (and its connector) alive for the lifetime of the agent,
+    so repeated requests to the same host reuse warm connections.
+
+    The session has no total deadline, since model generations and SSE streams can run
+    for minutes. It only bounds connecting and each wait for data; callers that want an
+    overall limit pass their own `timeout=` per request.
+    """
+
+    def __init__(self, limit=32, limit_per_host=8, dns_ttl=300, keepalive_timeout=75,
+                 connect_timeout=15, read_timeout=300):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_ttl = dns_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self._session = None
+        self._loop = None
+
+    def _create_session(self):
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            ttl_dns_cache=self.dns_ttl,
+            keepalive_timeout=self.keepalive_timeout,
+        )
+        return aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(
+                total=None, sock_connect=self.connect_timeout, sock_read=self.read_timeout
+            ),
+        )
+
+    def session(self):
+        """Return the shared session, creating it on first use in the running loop."""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            self._discard_session()
+            self._session = self._create_session()
+            self._loop = loop
+        return self._session
+
+    def _discard_session(self):
+        """Close a session left behind by a previous event loop so its connections are not leaked."""
+        session, loop = self._session, self._loop
+        self._session = None
+        self._loop = None
+        if session is None or session.closed:
+            return
+        if loop is not None and loop.is_running() and not loop.is_closed():
+            # Still alive in another thread: close the session on its own loop
+            asyncio.run_coroutine_threadsafe(session.close(), loop)
+            return
+        # Its loop is gone, so nothing can await close(); drop the sockets synchronously
+        connector = session.connector
+        session.detach()
+        if connector is not None:
+            connector._close()
+
+    async def warm(self, urls):
+        """Pre-open connections (DNS + TCP + TLS) so the first real request is fast."""
+        session = self.session()
+
+        async def _touch(url):
+            try:
+                async with session.head(url, timeout=aiohttp.ClientTimeout(total=10)) as resp:
+                    await resp.read()
+            except Exception as e:
+                print(f"HTTP pre-warm failed for {url}: {str(e)}")
+
+        await asyncio.gather(*(_touch(url) for url in urls))
+
+    async def close(self):
+        """Close the session and release all pooled connections."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._loop = None
+
+_shared_pool = None
+
+def get_http_pool():
+    """Return the process-wide HTTP pool shared by the brain and web skills."""
+    global _shared_pool
+    if _shared_pool is None:
+        _shared_pool = HttpPool()
+    return _shared_pool
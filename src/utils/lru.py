@@ -0,0 +1,45 @@
+import time
+from collections import OrderedDict
+
+class LRUCache:
+    """A bounded mapping that evicts the least recently used entry, with optional per-entry expiry."""
+
+    def __init__(self, maxsize=256, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict() # key -> (value, expires_at or None)
+
+    def get(self, key, default=None):
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        value, expires_at = entry
+        if expires_at is not None and time.time() >= expires_at:
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key, value, ttl=None, expires_at=None):
+        ttl = self.ttl if ttl is None else ttl
+        if expires_at is None and ttl is not None:
+            expires_at = time.time() + ttl
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        entry = self._data.pop(key, None)
+        return default if entry is None else entry[0]
+
+    def clear(self):
+        self._data.clear()
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self):
+        return len(self._data)
+
+_MISSING = object()
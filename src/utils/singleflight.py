@@ -0,0 +1,42 @@
+import asyncio
+
+class SingleFlight:
+    """Coalesces concurrent identical calls into one underlying task.
+
+    The first caller for a key starts the work; callers arriving while it is in flight await
+    the same task and receive the same result (or exception). Nothing is remembered after
+    completion, so this never serves stale results; it only removes duplicate concurrent work.
+    """
+
+    def __init__(self):
+        self._inflight = {} # key -> [task, waiter count]
+        self.shared = 0 # Calls that joined an in-flight task instead of starting one
+
+    def __contains__(self, key):
+        return key in self._inflight
+
+    async def do(self, key, factory):
+        """Await `factory()` for `key`, sharing it with any concurrent caller using the same key."""
+        entry = self._inflight.get(key)
+        if entry is None:
+            task = asyncio.ensure_future(factory())
+            entry = [task, 0]
+            self._inflight[key] = entry
+            task.add_done_callback(lambda _, key=key, entry=entry: self._forget(key, entry))
+        else:
+            self.shared += 1
+
+        entry[1] += 1
+        try:
+            # Shield so one caller giving up does not cancel the work for the others
+            return await asyncio.shield(entry[0])
+        except asyncio.CancelledError:
+            if entry[1] == 1 and not entry[0].done():
+                entry[0].cancel() # Last waiter left; nobody needs the result
+            raise
+        finally:
+            entry[1] -= 1
+
+    def _forget(self, key, entry):
+        if self._inflight.get(key) is entry:
+            del self._inflight[key]
@@ -0,0 +1,5 @@
+import os
+import tempfile
+
+# Settings create and read JOVIBE_HOME at import time; keep test runs out of the real one
+os.environ["JOVIBE_HOME"] = tempfile.mkdtemp(prefix="jovibe-tests-")
@@ -0,0 +1,106 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from src.adapters.base import BaseAdapter
+from src.context_packer import ContextPacker
+
+class FakeStreamingAdapter(BaseAdapter):
+    supports_streaming = True
+
+    def __init__(self, brain, soul):
+        super().__init__(brain, soul)
+        self.sent = []
+        self.edits = []
+
+    async def run(self):
+        pass
+
+    async def send_message(self, user_id, text):
+        self.sent.append(text)
+        return len(self.sent) - 1
+
+    async def edit_message(self, handle, text, final=True):
+        self.edits.append((handle, text, final))
+
+def make_adapter(deltas):
+    brain = MagicMock()
+
+    async def stream_response(messages, system_instruction=None, user_id=None):
+        for delta in deltas:
+            yield delta
+
+    brain.stream_response = stream_response
+    brain.packer = ContextPacker()
+    soul = MagicMock()
+    soul.get_system_prompt.return_value = "system"
+    soul.get_recent_history_turns = AsyncMock(return_value=[])
+    soul.log_interaction = AsyncMock()
+    soul.get_conversation_summary = AsyncMock(return_value="")
+    return FakeStreamingAdapter(brain, soul)
+
+@pytest.mark.asyncio
+async def test_handle_message_streams_into_one_message():
+    adapter = make_adapter(["Hel", "lo ", "there"])
+    adapter.stream_edit_interval = 0
+
+    await adapter.handle_message("test", "42", "hi")
+
+    # One message is sent, then edited in place; the last edit is final and cursor-free
+    assert len(adapter.sent) == 1
+    assert adapter.edits[-1] == (0, "Hello there", True)
+    assert all(final is False for _, _, final in adapter.edits[:-1])
+    adapter.soul.log_interaction.assert_awaited_once_with("test", "42", "hi", "Hello there")
+
+@pytest.mark.asyncio
+async def test_handle_message_bounds_edit_rate():
+    adapter = make_adapter(["a"] * 50)
+    adapter.stream_edit_interval = 3600
+
+    await adapter.handle_message("test", "42", "hi")
+
+    # Only the initial send and the final edit happen inside one edit interval
+    assert len(adapter.sent) == 1
+    assert adapter.edits == [(0, "a" * 50, True)]
+
+@pytest.mark.asyncio
+async def test_handle_message_adds_recalled_memories_to_the_question():
+    adapter = make_adapter(["ok"])
+    seen = []
+
+    async def stream_response(messages, system_instruction=None, user_id=None):
+        seen.append(messages)
+        yield "ok"
+
+    adapter.brain.stream_response = stream_response
+    adapter.memory = MagicMock()
+    adapter.memory.recall = AsyncMock(return_value="Possibly relevant memories:\n- cat is Miso")
+
+    await adapter.handle_message("test", "42", "what's my cat called?")
+
+    adapter.memory.recall.assert_awaited_once_with("42", "what's my cat called?")
+    assert seen[0][-1]["parts"] == [{"text": "Possibly relevant memories:\n- cat is Miso"}, {"text": "what's my cat called?"}]
+    # Only the user's own words are logged
+    adapter.soul.log_interaction.assert_awaited_once_with("test", "42", "what's my cat called?", "ok")
+
+@pytest.mark.asyncio
+async def test_handle_message_includes_the_conversation_summary():
+    adapter = make_adapter(["ok"])
+    seen = []
+
+    async def stream_response(messages, system_instruction=None, user_id=None):
+        seen.append(messages)
+        yield "ok"
+
+    adapter.brain.stream_response = stream_response
+    adapter.soul.get_conversation_summary.return_value = "- Likes green tea"
+    adapter.soul.get_recent_history_turns.return_value = [
+        {"role": "user", "parts": [{"text": "hello"}]},
+        {"role": "model", "parts": [{"text": "hi!"}]},
+    ]
+
+    await adapter.handle_message("test", "42", "what should I drink?")
+
+    # The summary covers older turns, so it comes first, as its own exchange
+    assert seen[0][0] == {"role": "user", "parts": [{"text": "Summary of our earlier conversation:\n- Likes green tea"}]}
+    assert [m["role"] for m in seen[0]] == ["user", "model", "user", "model", "user"]
+    assert seen[0][2]["parts"] == [{"text": "hello"}]
+    assert seen[0][-1]["parts"] == [{"text": "what should I drink?"}]
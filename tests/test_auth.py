@@ -0,0 +1,71 @@
+import asyncio
+import json
+import time
+import pytest
+from datetime import datetime, timedelta, timezone
+from src.auth import TokenManager, write_atomic
+from src.llm import CodeAssistTransport
+
+class FakeCreds:
+    def __init__(self, expires_in):
+        self.token = "old"
+        self.expiry = self._utcnow() + timedelta(seconds=expires_in)
+        self.refreshes = 0
+
+    @staticmethod
+    def _utcnow():
+        return datetime.now(timezone.utc).replace(tzinfo=None)
+
+    @property
+    def valid(self):
+        return self.expiry > self._utcnow()
+
+    def refresh(self, request):
+        time.sleep(0.05) # Blocking HTTP round-trip
+        self.refreshes += 1
+        self.token = f"new-{self.refreshes}"
+        self.expiry = self._utcnow() + timedelta(hours=1)
+
+class FakeAuthManager:
+    def __init__(self, creds):
+        self.credentials = creds
+        self.saved = 0
+
+    def get_credentials(self):
+        return self.credentials
+
+    def save(self):
+        self.saved += 1
+
+@pytest.mark.asyncio
+async def test_token_refresh_is_single_flight_and_ahead_of_expiry():
+    creds = FakeCreds(expires_in=60) # Still valid, but inside the refresh margin
+    manager = TokenManager(FakeAuthManager(creds), refresh_margin=300)
+
+    tokens = await asyncio.gather(*(manager.token() for _ in range(5)))
+
+    assert tokens == ["new-1"] * 5
+    assert creds.refreshes == 1
+    assert manager.auth_manager.saved == 1
+
+@pytest.mark.asyncio
+async def test_background_refresh_runs_before_expiry():
+    creds = FakeCreds(expires_in=0.1)
+    manager = TokenManager(FakeAuthManager(creds), refresh_margin=0)
+    await manager.start()
+    await asyncio.sleep(0.4)
+    await manager.close()
+
+    assert creds.refreshes == 1
+    assert creds.valid
+
+def test_project_id_is_cached_on_disk(tmp_path, mocker, monkeypatch):
+    monkeypatch.delenv("GOOGLE_CLOUD_PROJECT", raising=False)
+    monkeypatch.delenv("GOOGLE_CLOUD_PROJECT_ID", raising=False)
+    project_file = tmp_path / "gca_project.json"
+    mocker.patch("src.llm.GCA_PROJECT_FILE", project_file)
+
+    assert CodeAssistTransport(FakeAuthManager(None)).project_id is None
+    write_atomic(project_file, json.dumps({"cloudaicompanionProject": "proj-123"}))
+    assert CodeAssistTransport(FakeAuthManager(None)).project_id == "proj-123"
+    assert not (tmp_path / "gca_project.json.tmp").exists()
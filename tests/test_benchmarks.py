@@ -0,0 +1,40 @@
+import json
+import pytest
+from benchmarks.loadtest import loadtest
+from benchmarks.replay import load_conversations, replay
+from src.memory.dal import Database
+from src.memory.db import make_engine
+
+@pytest.mark.asyncio
+async def test_replay_drives_brain_through_fake_server(tmp_path):
+    path = tmp_path / "conversations.jsonl"
+    path.write_text("\n".join([
+        json.dumps({"id": "a", "turns": ["hello", "what time is it?"]}),
+        json.dumps({"request_id": "b", "body": "single question"}),
+    ]))
+    conversations = load_conversations(path)
+    assert [c[0] for c in conversations] == ["a", "b"]
+
+    report = await replay(conversations, concurrency=2, latency=0.01, seed=1)
+    assert report["requests"] == 3
+    assert report["errors"] == 0
+    assert report["tool_turns"] == 1 # "time" triggers the scripted get_current_time call
+    assert report["model_round_trips"] == 4
+    assert report["tokens_sent"] > 0
+
+@pytest.mark.asyncio
+async def test_replay_streams_and_survives_injected_quota_errors(tmp_path):
+    conversations = [(str(i), [{"role": "user", "parts": [{"text": f"q{i}"}]}], True) for i in range(4)]
+    report = await replay(conversations, concurrency=4, stream=True, tools=[], latency=0.0, rate_429=0.3, seed=3)
+    assert report["requests"] == 4
+    assert report["injected_429"] > 0
+    assert report["errors"] == 0
+
+@pytest.mark.asyncio
+async def test_loadtest_delivers_every_reply_through_real_adapter(tmp_path):
+    db = Database(make_engine(tmp_path / "loadtest.sqlite"))
+    report = await loadtest(users=3, messages=2, rate=0, latency=0.01, workers=2, timeout=20, db=db)
+    assert report["messages_sent"] == 6
+    assert report["replies_completed"] == 6
+    assert report["telegram_sends"] >= 6
+    assert report["db_locked_errors"] == 0
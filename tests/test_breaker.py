@@ -0,0 +1,55 @@
+from src.breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from src.errors import CACHE, INVALID, NETWORK, QUOTA, REJECTED, SERVER, LLMError, classify_error
+
+def test_breaker_opens_after_threshold_and_probes_once():
+    breaker = CircuitBreaker(failure_threshold=2, base_open=30)
+    breaker.record_failure(LLMError("boom", status=500))
+    assert breaker.state == CLOSED
+    breaker.record_failure(LLMError("boom", status=500))
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+    breaker.open_until = 0
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow() # Only one probe at a time
+
+    breaker.record_failure(LLMError("boom", status=503))
+    assert breaker.state == OPEN
+    assert 50 < breaker.retry_in() <= 60 # Backoff doubled
+
+    breaker.open_until = 0
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.allow()
+
+def test_breaker_uses_error_kind():
+    breaker = CircuitBreaker()
+    breaker.record_failure(LLMError("cache gone", kind=CACHE))
+    assert breaker.state == CLOSED
+
+    breaker.record_failure(LLMError("quota", status=429, retry_after=12))
+    assert breaker.state == OPEN
+    assert 10 < breaker.retry_in() <= 12
+
+    rejected = CircuitBreaker()
+    rejected.record_failure(LLMError("not found", status=404))
+    assert rejected.retry_in() > 3600
+
+    invalid = CircuitBreaker(failure_threshold=1)
+    invalid.record_failure(LLMError("bad argument", status=400))
+    assert invalid.state == CLOSED
+
+def test_error_classification_reads_retry_hints():
+    body = '{"error": {"code": 429, "status": "RESOURCE_EXHAUSTED", "details": [{"retryDelay": "17s"}]}}'
+    error = LLMError.from_response(429, body)
+    assert error.kind == QUOTA
+    assert error.retry_after == 17.0
+
+    assert LLMError.from_response(404, "not found").kind == REJECTED
+    assert LLMError.from_response(403, "Permission denied on model big-pro").kind == REJECTED
+    invalid_body = '{"error": {"code": 400, "status": "INVALID_ARGUMENT", "message": "bad schema"}}'
+    assert LLMError.from_response(400, invalid_body).kind == INVALID
+    assert LLMError.from_response(502, "bad gateway").kind == SERVER
+    assert classify_error(ConnectionError("reset")).kind == NETWORK
+    assert classify_error(RuntimeError("CachedContent not found")).kind == CACHE
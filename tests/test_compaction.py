@@ -0,0 +1,71 @@
+import time
+import pytest
+import pytest_asyncio
+from unittest.mock import AsyncMock, MagicMock
+from src.compaction import CompactionManager
+from src.memory.dal import Database, get_summary
+from src.memory.db import make_engine
+from src.memory.manager import SoulManager
+from src.scheduler import BACKGROUND
+
+def make_brain(reply="- Likes green tea"):
+    brain = MagicMock()
+    brain.router.select.return_value = "gemini-2.5-flash-lite"
+    brain.limiter.delay.return_value = 0
+    brain.generate_response = AsyncMock(return_value=reply)
+    return brain
+
+@pytest_asyncio.fixture
+async def soul(tmp_path):
+    soul = SoulManager(db=Database(make_engine(tmp_path / "memory.sqlite")))
+    for i in range(15):
+        await soul.log_interaction("telegram", "42", f"question {i}", f"answer {i}")
+    await soul.log_interaction("heartbeat", "system", "TASK_CHECK", "nothing")
+    await soul.writer.flush()
+    yield soul
+    await soul.close()
+
+@pytest.mark.asyncio
+async def test_aged_out_turns_are_folded_into_the_summary(soul):
+    brain = make_brain()
+    compactor = CompactionManager(brain, soul, keep_recent=3, min_batch=5)
+
+    assert await compactor.compact() == 1
+    prompt = brain.generate_response.await_args.args[0]
+    assert "question 11" in prompt and "question 12" not in prompt # The recent window stays verbatim
+    assert brain.generate_response.await_args.kwargs["priority"] == BACKGROUND
+    assert await soul.db.run(get_summary, "42") == ("- Likes green tea", 12)
+    assert await soul.get_conversation_summary("42") == "- Likes green tea"
+
+    # Nothing new aged out, so the next pass does not call the model
+    assert await compactor.compact() == 0
+    assert brain.generate_response.await_count == 1
+
+@pytest.mark.asyncio
+async def test_compaction_waits_for_spare_quota_and_keeps_summary_on_error(soul):
+    brain = make_brain()
+    brain.limiter.delay.return_value = 30
+    compactor = CompactionManager(brain, soul, keep_recent=3, min_batch=5)
+    assert await compactor.compact() == 0
+    brain.generate_response.assert_not_awaited()
+
+    brain.limiter.delay.return_value = 0
+    brain.generate_response.return_value = "Error: The agent is overloaded. Please try again shortly."
+    assert await compactor.compact() == 0
+    assert await soul.get_conversation_summary("42") == ""
+
+@pytest.mark.asyncio
+async def test_compaction_is_submitted_with_a_deadline_and_stops_after_being_shed(soul):
+    for i in range(15):
+        await soul.log_interaction("telegram", "7", f"other {i}", f"reply {i}")
+    await soul.writer.flush()
+    brain = make_brain("Error: The agent is overloaded. Please try again shortly.")
+    compactor = CompactionManager(brain, soul, keep_recent=3, min_batch=5, max_wait=5)
+
+    started = time.monotonic()
+    assert await compactor.compact() == 0
+
+    # A finite deadline lets the scheduler shed the job; the rest of the pass is deferred
+    deadline = brain.generate_response.await_args.kwargs["deadline"]
+    assert started < deadline <= time.monotonic() + 5
+    assert brain.generate_response.await_count == 1
@@ -0,0 +1,89 @@
+import pytest
+from unittest.mock import MagicMock, AsyncMock
+from src.context_cache import ContextCacheManager
+from src.llm import GeminiBrain
+
+class FakeCaches:
+    """Local stand-in for client.aio.caches that records calls."""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.created = []
+        self.deleted = []
+        self.updated = []
+
+    async def create(self, model, config):
+        if self.fail:
+            raise RuntimeError("400 Cached content is too small")
+        self.created.append((model, config))
+        cached = MagicMock()
+        cached.name = f"cachedContents/{len(self.created)}"
+        return cached
+
+    async def update(self, name, config):
+        self.updated.append(name)
+
+    async def delete(self, name):
+        self.deleted.append(name)
+
+def make_client(caches):
+    client = MagicMock()
+    client.aio.caches = caches
+    return client
+
+LONG_PROMPT = "You are Jovibe Agent. " * 500
+
+@pytest.mark.asyncio
+async def test_cache_created_once_and_replaced_on_change():
+    caches = FakeCaches()
+    manager = ContextCacheManager(make_client(caches), ttl=3600, min_tokens=100)
+
+    first = await manager.get("model-a", LONG_PROMPT)
+    again = await manager.get("model-a", LONG_PROMPT)
+    assert first == again == "cachedContents/1"
+    assert len(caches.created) == 1
+
+    changed = await manager.get("model-a", LONG_PROMPT + "New fact.")
+    assert changed == "cachedContents/2"
+    assert caches.deleted == ["cachedContents/1"]
+
+    await manager.close()
+    assert caches.deleted == ["cachedContents/1", "cachedContents/2"]
+
+@pytest.mark.asyncio
+async def test_small_or_failing_prompts_fall_back_to_inline():
+    manager = ContextCacheManager(make_client(FakeCaches()), min_tokens=100)
+    assert await manager.get("model-a", "short prompt") is None
+
+    failing = FakeCaches(fail=True)
+    manager = ContextCacheManager(make_client(failing), min_tokens=100)
+    assert await manager.get("model-a", LONG_PROMPT) is None
+    # The failure is remembered instead of retried on every request
+    assert await manager.get("model-a", LONG_PROMPT) is None
+    assert failing.created == []
+
+@pytest.mark.asyncio
+async def test_brain_sends_cached_content_reference(mocker):
+    mock_client = mocker.patch("src.llm.genai.Client").return_value
+    caches = FakeCaches()
+    mock_client.aio.caches = caches
+
+    mock_part = MagicMock()
+    mock_part.text = "Hi!"
+    mock_part.function_call = None
+    mock_response = MagicMock()
+    mock_response.candidates = [MagicMock()]
+    mock_response.candidates[0].content.parts = [mock_part]
+    mock_client.aio.models.generate_content = AsyncMock(return_value=mock_response)
+
+    mocker.patch.dict("os.environ", {"GEMINI_API_KEY": "dummy_key"})
+    brain = GeminiBrain()
+    brain.initialize()
+    brain.response_cache = None
+    brain.context_cache.min_tokens = 100
+
+    await brain.generate_response("Hello", system_instruction=LONG_PROMPT)
+
+    config = mock_client.aio.models.generate_content.call_args.kwargs["config"]
+    assert config == {"cached_content": "cachedContents/1"}
+    assert caches.created[0][1]["system_instruction"] == LONG_PROMPT
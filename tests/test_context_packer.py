@@ -0,0 +1,52 @@
+from src.context_packer import ContextPacker
+
+def text(role, body):
+    return {"role": role, "parts": [{"text": body}]}
+
+def call(name, url):
+    return {"role": "model", "parts": [{"functionCall": {"name": name, "args": {"url": url}}}]}
+
+def response(name, body):
+    return {"role": "function", "parts": [{"functionResponse": {"name": name, "response": {"result": body}}}]}
+
+def test_pack_keeps_newest_messages_within_budget():
+    packer = ContextPacker(budget=60, budgets={})
+    messages = []
+    for i in range(10):
+        messages += [text("user", f"question {i} " + "x" * 40), text("model", f"answer {i} " + "y" * 40)]
+    messages.append(text("user", "latest question"))
+
+    packed = packer.pack(messages)
+
+    assert packed[-1] == messages[-1]
+    assert packed[0]["role"] == "user"
+    assert sum(packer.count(m) for m in packed) <= 60
+    assert len(packed) < len(messages)
+
+def test_pack_never_splits_call_and_response():
+    packer = ContextPacker(budget=1000, budgets={})
+    messages = [
+        text("user", "old " + "z" * 400),
+        text("model", "old answer"),
+        text("user", "fetch three pages"),
+        call("fetch_web_page", "https://a.example"),
+        response("fetch_web_page", "p" * 5000),
+        call("fetch_web_page", "https://b.example"),
+        response("fetch_web_page", "short page"),
+    ]
+
+    packed = packer.pack(messages)
+
+    # The large response group does not fit, so its call is dropped with it
+    assert messages[3] not in packed and messages[4] not in packed
+    assert packed[-2:] == messages[-2:]
+    # The user's question is always kept
+    assert messages[2] in packed
+
+def test_pack_respects_reserve_and_model_budgets():
+    packer = ContextPacker(budget=1000, budgets={"small-model": 30})
+    messages = [text("user", "a" * 200), text("model", "b" * 200), text("user", "now")]
+
+    assert packer.pack(messages, "big-model") == messages
+    assert packer.pack(messages, "small-model") == [messages[-1]]
+    assert packer.pack(messages, "big-model", reserve=990) == [messages[-1]]
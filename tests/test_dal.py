@@ -0,0 +1,46 @@
+import asyncio
+import threading
+import pytest
+from src.memory.dal import Database, add_interaction, recent_interactions, search_interactions
+from src.memory.db import init_db, make_engine
+
+@pytest.fixture
+def database(tmp_path):
+    engine = make_engine(tmp_path / "memory.sqlite")
+    init_db(engine)
+    return Database(engine)
+
+@pytest.mark.asyncio
+async def test_queries_run_on_the_database_thread(database):
+    loop_thread = threading.get_ident()
+
+    def which_thread(session):
+        return threading.get_ident()
+
+    assert await database.run(which_thread) != loop_thread
+    await database.close()
+
+@pytest.mark.asyncio
+async def test_concurrent_writers_each_get_their_own_session(database):
+    await asyncio.gather(*(
+        database.run(add_interaction, "test", f"user{i % 3}", f"question {i}", f"answer {i}") for i in range(30)
+    ))
+
+    history = await database.run(recent_interactions, "user0", 3)
+    hits = await database.run(search_interactions, "question 2", 50)
+    await database.close()
+
+    assert len(history) == 3
+    assert all(prompt.startswith("question") for prompt, _ in history)
+    assert {prompt for _, _, prompt, _ in hits} >= {"[question] [2]", "[question] [20]", "[question] [29]"}
+
+@pytest.mark.asyncio
+async def test_failed_call_rolls_back(database):
+    def add_then_fail(session):
+        add_interaction(session, "test", "u", "lost", "lost")
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        await database.run(add_then_fail)
+    assert await database.run(recent_interactions, "u", 5) == []
+    await database.close()
@@ -0,0 +1,81 @@
+import sqlite3
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import text
+from src.memory import fts
+from src.memory.dal import Database, add_interactions, search_interactions
+from src.memory.db import init_db, make_engine
+
+def record(prompt, response, user_id="42", channel="telegram", timestamp=None):
+    return {"channel": channel, "user_id": user_id, "prompt": prompt, "response": response,
+            "timestamp": timestamp or datetime.utcnow()}
+
+@pytest.fixture
+def database(tmp_path):
+    engine = make_engine(tmp_path / "memory.sqlite")
+    init_db(engine)
+    return Database(engine)
+
+def test_match_query_is_safe_for_free_text():
+    assert fts.match_query('what is "NEAR" (foo) AND bar*') == '"what"* "is"* "NEAR"* "foo"* "AND"* "bar"*'
+    assert fts.match_query("?!") == ""
+
+def test_results_are_ranked_and_highlighted(database):
+    database.run_sync(add_interactions, [
+        record("weather today?", "Sunny. Python is unrelated."),
+        record("Tell me about python", "Python python python is a language."),
+        record("deploy the app", "Done."),
+    ])
+
+    hits = database.run_sync(search_interactions, "python", 5)
+
+    assert len(hits) == 2
+    assert hits[0][2] == "Tell me about [python]" # The denser match ranks first
+    assert "[Python]" in hits[0][3]
+
+def test_filters_by_user_channel_and_time(database):
+    now = datetime.utcnow()
+    database.run_sync(add_interactions, [
+        record("backup the db", "ok", user_id="1", timestamp=now - timedelta(days=3)),
+        record("backup photos", "ok", user_id="1", channel="discord", timestamp=now),
+        record("backup logs", "ok", user_id="2", timestamp=now),
+    ])
+
+    def prompts(**filters):
+        return {hit[2] for hit in database.run_sync(search_interactions, "backup", 10, **filters)}
+
+    assert prompts(user_id="1") == {"[backup] the db", "[backup] photos"}
+    assert prompts(channel="discord") == {"[backup] photos"}
+    assert prompts(since=now - timedelta(days=1)) == {"[backup] photos", "[backup] logs"}
+    assert prompts(until=now - timedelta(days=1)) == {"[backup] the db"}
+
+def test_triggers_follow_updates_and_deletes(database):
+    database.run_sync(add_interactions, [record("old words", "reply")])
+
+    def edit(session):
+        session.execute(text("UPDATE interactions SET prompt = 'new words'"))
+
+    database.run_sync(edit)
+    assert database.run_sync(search_interactions, "old", 5) == []
+    assert len(database.run_sync(search_interactions, "new", 5)) == 1
+
+    database.run_sync(lambda session: session.execute(text("DELETE FROM interactions")))
+    assert database.run_sync(search_interactions, "new", 5) == []
+
+def test_existing_rows_are_backfilled_by_the_migration(tmp_path):
+    path = tmp_path / "old.sqlite"
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE interactions (id INTEGER PRIMARY KEY, channel VARCHAR(50), user_id VARCHAR(100), "
+        "prompt TEXT, response TEXT, timestamp DATETIME)"
+    )
+    conn.execute("INSERT INTO interactions (user_id, prompt, response) VALUES ('u', 'remember the milk', 'ok')")
+    conn.execute("PRAGMA user_version = 1")
+    conn.commit()
+    conn.close()
+
+    engine = make_engine(path)
+    init_db(engine)
+
+    hits = Database(engine).run_sync(search_interactions, "milk", 5)
+    assert [hit[2] for hit in hits] == ["remember the [milk]"]
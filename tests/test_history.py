@@ -0,0 +1,59 @@
+import pytest
+from src.memory.dal import Database
+from src.memory.db import make_engine
+from src.memory.history import HistoryCache
+from src.memory.manager import SoulManager
+
+class CountingDatabase(Database):
+    def __init__(self, engine):
+        super().__init__(engine)
+        self.calls = 0
+
+    async def run(self, func, *args, **kwargs):
+        self.calls += 1
+        return await super().run(func, *args, **kwargs)
+
+def test_window_is_bounded_and_users_are_lru_evicted():
+    cache = HistoryCache(users=2, window=3)
+    for user in ("a", "b"):
+        cache.begin_load(user)
+        cache.load(user, [])
+    for i in range(5):
+        cache.append("a", f"q{i}", f"a{i}")
+
+    assert cache.get("a", 2) == [("q3", "a3"), ("q4", "a4")]
+    assert cache.get("a", 10) is None # Full window: older turns may exist only in the database
+    assert cache.get("b", 10) == [] # Short window: that is the whole history
+
+    cache.begin_load("c")
+    cache.load("c", [])
+    assert cache.get("a", 1) is None # Least recently used
+
+def test_append_during_load_keeps_the_stale_read_out():
+    cache = HistoryCache()
+    cache.begin_load("a")
+    cache.append("a", "new", "turn") # Logged while the database read was in flight
+    cache.load("a", [("old", "turn")])
+    assert cache.get("a", 5) is None
+
+@pytest.mark.asyncio
+async def test_soul_reads_the_database_once_per_user(tmp_path):
+    db = CountingDatabase(make_engine(tmp_path / "memory.sqlite"))
+    soul = SoulManager(db=db)
+    soul.writer.flush_interval = 3600
+
+    assert await soul.get_recent_history_turns("42") == []
+    await soul.log_interaction("test", "42", "hi", "Hello")
+    turns = await soul.get_recent_history_turns("42")
+    await soul.get_recent_history_turns("42", limit=1)
+
+    assert db.calls == 1
+    assert turns == [
+        {"role": "user", "parts": [{"text": "hi"}]},
+        {"role": "model", "parts": [{"text": "Hello"}]},
+    ]
+
+    # A fresh process (cold cache) sees the same window from the database
+    await soul.writer.flush()
+    assert await SoulManager(db=db).get_recent_history_turns("42") == turns
+    await soul.close()
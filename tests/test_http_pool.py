@@ -0,0 +1,50 @@
+import asyncio
+import gc
+import warnings
+import pytest
+from src.utils.http_pool import HttpPool
+
+@pytest.mark.asyncio
+async def test_http_pool_reuses_session():
+    pool = HttpPool(limit=4, limit_per_host=2)
+    first = pool.session()
+    second = pool.session()
+
+    assert first is second
+    assert first.connector.limit == 4
+    assert first.connector.limit_per_host == 2
+
+    await pool.close()
+    assert first.closed
+
+    # A new session is created transparently after shutdown
+    third = pool.session()
+    assert third is not first
+    await pool.close()
+
+def test_http_pool_closes_the_session_of_a_finished_loop():
+    pool = HttpPool()
+
+    async def open_session():
+        return pool.session()
+
+    first = asyncio.run(open_session())
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        second = asyncio.run(open_session())
+        assert second is not first
+        assert first.closed
+        asyncio.run(pool.close())
+        del first
+        gc.collect()
+    assert not [w for w in caught if "Unclosed" in str(w.message)]
+
+@pytest.mark.asyncio
+async def test_http_pool_has_no_total_deadline():
+    pool = HttpPool(connect_timeout=5, read_timeout=60)
+    timeout = pool.session().timeout
+
+    assert timeout.total is None # Long generations and SSE streams must not be cut off
+    assert timeout.sock_connect == 5
+    assert timeout.sock_read == 60
+    await pool.close()
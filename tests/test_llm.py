@@ -1,6 +1,9 @@
 import pytest
 from unittest.mock import MagicMock, AsyncMock
+from google.genai import types
 from src.llm import GeminiBrain
+from src.metrics import MODEL_TURN_SECONDS
+from src.tracing import JsonlExporter, Tracer, load_traces
 
 @pytest.mark.asyncio
 async def test_brain_generate_response(mocker):
@@ -34,3 +37,91 @@ async def test_brain_generate_response(mocker):
     
     assert response == "Hello, I am Jovibe Agent!"
     mock_client.aio.models.generate_content.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_brain_stream_response(mocker):
+    mock_client_class = mocker.patch("src.llm.genai.Client")
+    mock_client = mock_client_class.return_value
+
+    def make_chunk(text):
+        part = MagicMock()
+        part.text = text
+        part.function_call = None
+        chunk = MagicMock()
+        chunk.candidates = [MagicMock()]
+        chunk.candidates[0].content.parts = [part]
+        return chunk
+
+    async def fake_stream():
+        for text in ["Hello, ", "I am ", "Jovibe!"]:
+            yield make_chunk(text)
+
+    mock_client.aio.models.generate_content_stream = AsyncMock(return_value=fake_stream())
+
+    mocker.patch.dict("os.environ", {"GEMINI_API_KEY": "dummy_key"})
+    brain = GeminiBrain()
+    brain.initialize()
+
+    deltas = [delta async for delta in brain.stream_response("Hi!")]
+
+    assert deltas == ["Hello, ", "I am ", "Jovibe!"]
+    mock_client.aio.models.generate_content_stream.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_stream_response_does_not_replay_tools_after_a_failure(mocker):
+    mock_client_class = mocker.patch("src.llm.genai.Client")
+    mock_client = mock_client_class.return_value
+
+    call_part = types.Part.from_function_call(
+        name="write_project_file", args={"path": "notes.md", "content": "hi"}
+    )
+    chunk = MagicMock()
+    chunk.candidates = [MagicMock()]
+    chunk.candidates[0].content.parts = [call_part]
+
+    async def tool_turn():
+        yield chunk
+
+    mock_client.aio.models.generate_content_stream = AsyncMock(
+        side_effect=[tool_turn(), RuntimeError("500 stream reset")]
+    )
+
+    mocker.patch.dict("os.environ", {"GEMINI_API_KEY": "dummy_key"})
+    brain = GeminiBrain()
+    brain.initialize()
+    execute_many = mocker.patch.object(
+        brain.registry, "execute_many", AsyncMock(return_value=[("Successfully wrote to 'notes.md'", False)])
+    )
+    brain.generate_response = AsyncMock(return_value="replayed")
+
+    deltas = [delta async for delta in brain.stream_response("Write my notes")]
+
+    assert len(deltas) == 1 and deltas[0].startswith("Error: The response failed after running tools.")
+    execute_many.assert_awaited_once()
+    brain.generate_response.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_stream_response_traces_and_times_each_model_turn(mocker, tmp_path):
+    tracer = Tracer(enabled=True, exporter=JsonlExporter(tmp_path / "traces.jsonl"))
+    mocker.patch("src.llm.span", tracer.span)
+    mock_client_class = mocker.patch("src.llm.genai.Client")
+    mock_client = mock_client_class.return_value
+
+    async def fake_stream():
+        yield types.GenerateContentResponse(
+            candidates=[types.Candidate(content=types.Content(role="model", parts=[types.Part(text="Hi!")]))]
+        )
+
+    mock_client.aio.models.generate_content_stream = AsyncMock(return_value=fake_stream())
+    mocker.patch.dict("os.environ", {"GEMINI_API_KEY": "dummy_key"})
+    brain = GeminiBrain()
+    brain.initialize()
+
+    turns = MODEL_TURN_SECONDS.count(model=brain._current_model)
+    with tracer.span("handle_message"):
+        assert [delta async for delta in brain.stream_response("Hi!", tools=[])] == ["Hi!"]
+    assert MODEL_TURN_SECONDS.count(model=brain._current_model) == turns + 1
+
+    [trace] = load_traces(tmp_path / "traces.jsonl")
+    [turn] = [s for s in trace["spans"] if s["name"] == "generate_content"]
+    assert turn["attrs"]["model"] == brain._current_model and turn["duration"] is not None
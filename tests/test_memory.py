@@ -1,3 +1,7 @@
+import hashlib
+import pytest
+from src.memory.dal import Database
+from src.memory.db import make_engine
 from src.memory.manager import SoulManager
 
 def test_soul_manager_system_prompt_default(tmp_path, monkeypatch):
@@ -28,3 +32,38 @@ def test_soul_manager_system_prompt_with_content(tmp_path, monkeypatch):
     assert "Custom User Context" in prompt
     assert "## soul.md" in prompt
     assert "## user.md" in prompt
+
+@pytest.mark.asyncio
+async def test_soul_manager_logs_and_reads_history(tmp_path):
+    manager = SoulManager(db=Database(make_engine(tmp_path / "memory.sqlite")))
+
+    await manager.log_interaction("test", "42", "hi", "Hello")
+    await manager.log_interaction("test", "42", "again", None)
+    turns = await manager.get_recent_history_turns("42")
+    await manager.close()
+
+    assert turns == [
+        {"role": "user", "parts": [{"text": "hi"}]},
+        {"role": "model", "parts": [{"text": "Hello"}]},
+        {"role": "user", "parts": [{"text": "again"}]},
+        {"role": "model", "parts": [{"text": "[Empty response]"}]},
+    ]
+
+def test_system_prompt_is_memoized_until_a_file_changes(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.config.settings.BASE_DIR", tmp_path)
+    soul_file = tmp_path / "soul.md"
+    soul_file.write_text("Version one")
+    manager = SoulManager()
+
+    first = manager.get_system_prompt()
+    assert manager.get_system_prompt() is first # Served from memory, no rebuild
+    assert first.content_hash == hashlib.sha256(first.encode("utf-8")).hexdigest()
+
+    soul_file.write_text("Version two, longer")
+    second = manager.get_system_prompt()
+    assert "Version two" in second and second.content_hash != first.content_hash
+
+    (tmp_path / "notes.md").write_text("New notes")
+    assert "## notes.md" in manager.get_system_prompt()
+    assert "## notes.md" not in manager.get_system_prompt(minimal=True)
+    assert manager.system_prompt_hash(minimal=True) != manager.system_prompt_hash()
@@ -0,0 +1,44 @@
+import aiohttp
+import pytest
+from src.metrics import MetricsRegistry, MetricsServer, watch_scheduler
+from src.scheduler import Scheduler
+
+def test_histogram_and_counter_render_prometheus_text():
+    registry = MetricsRegistry()
+    latency = registry.histogram("test_seconds", "Test latency.", ["model"], buckets=(0.1, 1))
+    errors = registry.counter("test_errors_total", "Test errors.", ["model"])
+    latency.observe(0.05, model="flash")
+    latency.observe(0.5, model="flash")
+    errors.inc(model='we"ird')
+
+    text = registry.render()
+    assert "# TYPE test_seconds histogram" in text
+    assert 'test_seconds_bucket{model="flash",le="0.1"} 1' in text
+    assert 'test_seconds_bucket{model="flash",le="1"} 2' in text
+    assert 'test_seconds_bucket{model="flash",le="+Inf"} 2' in text
+    assert 'test_seconds_count{model="flash"} 2' in text
+    assert 'test_errors_total{model="we\\"ird"} 1' in text
+
+    with pytest.raises(ValueError):
+        errors.inc(skill="x")
+
+def test_scheduler_depth_is_collected_on_render():
+    registry = MetricsRegistry()
+    watch_scheduler(Scheduler(concurrency=2), registry)
+    text = registry.render()
+    assert "jovibe_scheduler_running 0" in text
+    assert 'jovibe_scheduler_queue_depth{priority="interactive"} 0' in text
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_serves_registry(unused_tcp_port):
+    registry = MetricsRegistry()
+    registry.counter("test_hits_total", "Hits.").inc()
+    server = MetricsServer(registry, port=unused_tcp_port)
+    await server.start()
+    try:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"http://127.0.0.1:{unused_tcp_port}/metrics") as resp:
+                assert resp.status == 200
+                assert "test_hits_total 1" in await resp.text()
+    finally:
+        await server.close()
@@ -0,0 +1,42 @@
+import sqlite3
+from src.memory.db import init_db, make_engine
+from src.memory.migrations import MIGRATIONS, schema_version_of
+
+def test_existing_database_is_upgraded_in_place(tmp_path):
+    path = tmp_path / "old.sqlite"
+    # A database created before migrations existed: no index, user_version 0
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE interactions (id INTEGER PRIMARY KEY, channel VARCHAR(50), user_id VARCHAR(100), "
+        "prompt TEXT, response TEXT, timestamp DATETIME)"
+    )
+    conn.execute("INSERT INTO interactions (user_id, prompt, response) VALUES ('u', 'hi', 'hello')")
+    conn.commit()
+    conn.close()
+
+    engine = make_engine(path)
+    init_db(engine)
+
+    assert schema_version_of(engine) == MIGRATIONS[-1][0]
+    conn = sqlite3.connect(path)
+    indexes = [row[1] for row in conn.execute("PRAGMA index_list('interactions')")]
+    plan = " ".join(str(row) for row in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM interactions WHERE user_id = 'u' ORDER BY timestamp DESC LIMIT 5"
+    ))
+    rows = conn.execute("SELECT count(*) FROM interactions").fetchone()[0]
+    conn.close()
+    assert "ix_interactions_user_timestamp" in indexes
+    assert "ix_interactions_user_timestamp" in plan
+    assert rows == 1
+
+    # Running again is a no-op
+    init_db(engine)
+    assert schema_version_of(engine) == MIGRATIONS[-1][0]
+
+def test_connections_use_wal_and_tuned_pragmas(tmp_path):
+    engine = make_engine(tmp_path / "new.sqlite")
+    init_db(engine)
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1 # NORMAL
+        assert conn.exec_driver_sql("PRAGMA cache_size").scalar() < 0
@@ -0,0 +1,36 @@
+import pytest
+from src.ratelimit import RateLimiter, ModelRateLimit, parse_retry_delay
+
+def test_sliding_window_request_limit():
+    bucket = ModelRateLimit(rpm=2, tpm=0, window=60.0)
+    bucket.record(now=100.0)
+    bucket.record(now=110.0)
+
+    # Third request must wait for the first to slide out of the window
+    assert bucket.delay(now=120.0) == pytest.approx(40.0)
+    assert bucket.delay(now=161.0) == 0
+
+def test_sliding_window_token_limit():
+    bucket = ModelRateLimit(rpm=0, tpm=1000, window=60.0)
+    bucket.record(tokens=600, now=100.0)
+    bucket.record(tokens=300, now=130.0)
+
+    assert bucket.delay(tokens=100, now=135.0) == 0
+    # 500 more tokens only fit once the first 600 expire at t=160
+    assert bucket.delay(tokens=500, now=135.0) == pytest.approx(25.0)
+
+@pytest.mark.asyncio
+async def test_penalize_blocks_only_that_model():
+    limiter = RateLimiter(rpm=100, tpm=0)
+    limiter.penalize("model-a", 30)
+
+    assert limiter.delay("model-a") > 29
+    assert limiter.delay("model-b") == 0
+    # Acquiring on an unaffected model does not wait
+    await limiter.acquire("model-b", tokens=10)
+
+def test_parse_retry_delay():
+    body = 'GCA Error 429: {"details": [{"metadata": {"quotaResetDelay": "12.5s"}}]}'
+    assert parse_retry_delay(body) == 12.5
+    assert parse_retry_delay("{'retryDelay': '7s'}") == 7.0
+    assert parse_retry_delay("no delay here") is None
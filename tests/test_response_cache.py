@@ -0,0 +1,70 @@
+import pytest
+from unittest.mock import MagicMock, AsyncMock
+from src.llm import GeminiBrain
+from src.response_cache import ResponseCache, request_fingerprint
+from src.utils.lru import LRUCache
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert cache.get("c") == 3
+
+def test_lru_cache_expires_entries():
+    cache = LRUCache(maxsize=2, ttl=-1)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+
+def test_fingerprint_depends_on_every_input():
+    base = request_fingerprint("m", "hi", "sys", [])
+    assert base == request_fingerprint("m", "hi", "sys", [])
+    assert base != request_fingerprint("other", "hi", "sys", [])
+    assert base != request_fingerprint("m", "hello", "sys", [])
+    assert base != request_fingerprint("m", "hi", "sys2", [])
+    assert base != request_fingerprint("m", "hi", "sys", [{"function_declarations": [{"name": "x"}]}])
+
+@pytest.mark.asyncio
+async def test_disk_tier_survives_restart(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    cache = ResponseCache(path=path, maxsize=4, ttl=60)
+    await cache.set("key", "cached answer")
+    cache.close()
+
+    reopened = ResponseCache(path=path, maxsize=4, ttl=60)
+    assert await reopened.get("key") == "cached answer"
+    assert await reopened.get("missing") is None
+    assert reopened.stats()["disk_hits"] == 1
+    assert reopened.stats()["misses"] == 1
+    reopened.close()
+
+@pytest.mark.asyncio
+async def test_brain_caches_tool_free_requests_only(mocker, tmp_path):
+    mock_client = mocker.patch("src.llm.genai.Client").return_value
+    mock_part = MagicMock()
+    mock_part.text = "HEARTBEAT_OK"
+    mock_part.function_call = None
+    mock_response = MagicMock()
+    mock_response.candidates = [MagicMock()]
+    mock_response.candidates[0].content.parts = [mock_part]
+    mock_client.aio.models.generate_content = AsyncMock(return_value=mock_response)
+
+    mocker.patch.dict("os.environ", {"GEMINI_API_KEY": "dummy_key"})
+    brain = GeminiBrain()
+    brain.initialize()
+    brain.response_cache = ResponseCache(path=tmp_path / "cache.sqlite")
+
+    assert await brain.generate_response("pulse", tools=[]) == "HEARTBEAT_OK"
+    assert await brain.generate_response("pulse", tools=[]) == "HEARTBEAT_OK"
+    assert mock_client.aio.models.generate_content.call_count == 1
+    assert brain.response_cache.stats()["hits"] == 1
+
+    # Tool-enabled calls are not cached by default
+    await brain.generate_response("pulse")
+    await brain.generate_response("pulse")
+    assert mock_client.aio.models.generate_content.call_count == 3
+    brain.response_cache.close()
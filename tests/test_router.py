@@ -0,0 +1,112 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+from src.errors import LLMError
+from src.llm import GeminiBrain
+from src.router import HEARTBEAT, INTERACTIVE, ModelRouter
+
+HIERARCHY = ["fast-flash", "big-pro", "tiny-flash-lite"]
+
+def make_router(monkeypatch, hedge_after=0):
+    monkeypatch.setenv("GEMINI_MODEL", "fast-flash")
+    return ModelRouter(HIERARCHY, hedge_after=hedge_after)
+
+def test_router_orders_by_request_class(monkeypatch):
+    router = make_router(monkeypatch)
+    assert router.candidates(INTERACTIVE) == ["fast-flash", "big-pro", "tiny-flash-lite"]
+    assert router.candidates(HEARTBEAT)[0] == "tiny-flash-lite"
+
+def test_router_recovers_after_breaker_opens(monkeypatch):
+    router = make_router(monkeypatch)
+    router.record_failure("fast-flash", 1.0, LLMError("quota", status=429, retry_after=60))
+    assert router.select() == "big-pro"
+
+    router.breaker("fast-flash").open_until = 0 # Open period over: one probe may go through
+    assert router.acquire() == "fast-flash"
+    assert router.acquire() == "big-pro" # Probe already in flight
+    router.record_success("fast-flash", 1.0)
+    assert router.select() == "fast-flash"
+
+def test_router_demotes_unhealthy_and_slow_models(monkeypatch):
+    router = make_router(monkeypatch)
+    for _ in range(5):
+        router.record_failure("fast-flash", 1.0)
+    assert router.select() == "big-pro"
+
+    router = make_router(monkeypatch)
+    for _ in range(5):
+        router.record_success("fast-flash", 20.0)
+        router.record_success("big-pro", 2.0)
+    assert router.select() == "big-pro"
+    assert router.snapshot()["big-pro"]["p95"] == 2.0
+
+@pytest.mark.asyncio
+async def test_hedged_request_takes_first_answer(monkeypatch):
+    brain = GeminiBrain()
+    brain.router = make_router(monkeypatch, hedge_after=0.05)
+    calls = []
+
+    async def fake_call(model, prompt, system_instruction, final_tools):
+        calls.append(model)
+        await asyncio.sleep(1.0 if model == "fast-flash" else 0.01)
+        return f"answer from {model}"
+
+    brain._call_model = fake_call
+    result = await brain._hedged_call(brain.router.acquire(), "hi", None, [])
+
+    assert result == "answer from big-pro"
+    assert calls == ["fast-flash", "big-pro"]
+
+@pytest.mark.asyncio
+async def test_quota_error_falls_back_without_touching_env(monkeypatch):
+    brain = GeminiBrain()
+    brain.router = make_router(monkeypatch)
+
+    async def generate_content(model, contents, config):
+        if model == "fast-flash":
+            raise RuntimeError('429 RESOURCE_EXHAUSTED "quotaResetDelay": "30s"')
+        part = SimpleNamespace(text=f"answer from {model}", function_call=None)
+        return SimpleNamespace(candidates=[SimpleNamespace(content=SimpleNamespace(parts=[part]))])
+
+    brain.client = MagicMock()
+    brain.client.aio.models.generate_content = generate_content
+    result = await brain.generate_response("hi", tools=[], cache=False)
+
+    assert result == "answer from big-pro"
+    assert not brain.router.is_available("fast-flash")
+    assert brain.router.breaker("fast-flash").retry_in() > 25
+    assert brain.router.preferred() == "fast-flash"
+
+@pytest.mark.asyncio
+async def test_all_breakers_open_fails_fast(monkeypatch):
+    brain = GeminiBrain()
+    brain.client = object()
+    brain.router = make_router(monkeypatch)
+    for model in HIERARCHY:
+        brain.router.record_failure(model, 1.0, LLMError("gone", status=404))
+
+    async def fake_call(*args):
+        raise AssertionError("no model should be called")
+
+    brain._call_model = fake_call
+    result = await asyncio.wait_for(brain.generate_response("hi", tools=[], cache=False), 1)
+    assert result.startswith("Error: All models are temporarily unavailable.")
+
+@pytest.mark.asyncio
+async def test_invalid_request_is_returned_without_tripping_breakers(monkeypatch):
+    brain = GeminiBrain()
+    brain.router = make_router(monkeypatch)
+    calls = []
+
+    async def generate_content(model, contents, config):
+        calls.append(model)
+        raise LLMError("400 INVALID_ARGUMENT: bad schema", status=400, reason="INVALID_ARGUMENT")
+
+    brain.client = MagicMock()
+    brain.client.aio.models.generate_content = generate_content
+    result = await brain.generate_response("hi", tools=[], cache=False)
+
+    assert result.startswith("Error: The model rejected the request.")
+    assert calls == ["fast-flash"]
+    assert all(brain.router.is_available(model) for model in HIERARCHY)
@@ -0,0 +1,46 @@
+import asyncio
+import time
+import pytest
+from src.scheduler import BACKGROUND, INTERACTIVE, PROACTIVE, JobShed, Scheduler
+
+async def run_jobs(scheduler, jobs, order):
+    """Occupy the only slot, queue `jobs` (priority, user), then release and record dispatch order."""
+    await scheduler.acquire()
+
+    async def job(priority, user):
+        async with scheduler.slot(priority, user):
+            order.append((priority, user))
+
+    tasks = [asyncio.create_task(job(p, u)) for p, u in jobs]
+    await asyncio.sleep(0)
+    assert scheduler.depth() == len(jobs)
+    scheduler.release()
+    await asyncio.gather(*tasks)
+
+@pytest.mark.asyncio
+async def test_higher_priority_runs_first():
+    order = []
+    await run_jobs(Scheduler(concurrency=1, max_wait={}), [
+        (BACKGROUND, "a"), (PROACTIVE, "a"), (INTERACTIVE, "a"),
+    ], order)
+    assert [p for p, _ in order] == [INTERACTIVE, PROACTIVE, BACKGROUND]
+
+@pytest.mark.asyncio
+async def test_users_are_interleaved_within_a_class():
+    order = []
+    scheduler = Scheduler(concurrency=1, max_wait={})
+    await run_jobs(scheduler, [(INTERACTIVE, "chatty")] * 3 + [(INTERACTIVE, "quiet")], order)
+    assert [u for _, u in order] == ["chatty", "quiet", "chatty", "chatty"]
+    assert scheduler.snapshot()["classes"][INTERACTIVE]["dispatched"] == 5
+
+@pytest.mark.asyncio
+async def test_queued_job_is_shed_at_its_deadline():
+    scheduler = Scheduler(concurrency=1, max_wait={})
+    await scheduler.acquire()
+    with pytest.raises(JobShed):
+        await scheduler.acquire(INTERACTIVE, "u", deadline=time.monotonic() + 0.05)
+    assert scheduler.stats[INTERACTIVE]["shed"] == 1
+    assert scheduler.depth() == 0
+
+    scheduler.release()
+    assert scheduler.running == 0
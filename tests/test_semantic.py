@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+from src.memory.dal import Database
+from src.memory.db import make_engine
+from src.memory.manager import SoulManager
+from src.memory.semantic import HashingEmbedder, SemanticMemory, VectorIndex, _load_chunks, chunk_text
+
+def test_hashing_embedder_is_deterministic_and_normalized():
+    embedder = HashingEmbedder(dim=64)
+    a, b, c = embedder.embed(["backup the photos", "backup the photos", "weather in Paris"])
+    assert np.allclose(a, b)
+    assert np.isclose(np.linalg.norm(a), 1.0)
+    assert a @ b > a @ c
+
+def test_chunk_text_packs_paragraphs_and_splits_long_ones():
+    chunks = chunk_text("one\n\ntwo\n\n" + "x" * 250, max_chars=100, overlap=20)
+    assert chunks[0] == "one\n\ntwo"
+    assert [len(c) for c in chunks[1:]] == [100, 100, 90]
+
+def test_vector_index_top_k_owner_filter_and_ivf():
+    rng = np.random.default_rng(1)
+    vectors = rng.normal(size=(600, 16)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    index = VectorIndex(16, ivf_threshold=10**9)
+    for i, vector in enumerate(vectors):
+        index.add(i, vector, owner="a" if i % 2 else None)
+
+    exact = index.search(vectors[7], k=3)
+    assert exact[0][0] == 7 and exact[0][1] == pytest.approx(1.0, abs=1e-5)
+    assert all(key % 2 for key, _ in index.search(vectors[8], k=5, owners={"a"}))
+
+    index.remove(7)
+    assert 7 not in [key for key, _ in index.search(vectors[7], k=3)]
+
+    # The coarse index still finds an exact duplicate by probing its cluster
+    index.ivf_threshold = 100
+    assert index.search(vectors[11], k=1)[0][0] == 11
+    assert index._centroids is not None
+
+def test_vector_index_add_many_matches_add():
+    rng = np.random.default_rng(2)
+    vectors = rng.normal(size=(100, 8)).astype(np.float32)
+    one_by_one, batched = VectorIndex(8), VectorIndex(8)
+    for i, vector in enumerate(vectors):
+        one_by_one.add(i, vector, owner=i % 3)
+    batched.add_many(list(range(100)), vectors, [i % 3 for i in range(100)])
+    batched.add_many([5], vectors[6:7], [5 % 3]) # Replacing a key tombstones the old row
+
+    assert len(batched) == 100
+    assert batched.search(vectors[42], k=3, owners={0}) == one_by_one.search(vectors[42], k=3, owners={0})
+    assert batched.search(vectors[6], k=2)[1][0] in (5, 6)
+
+@pytest.mark.asyncio
+async def test_sync_is_incremental_and_searchable(tmp_path):
+    (tmp_path / "notes.md").write_text("The router key is taped under the desk.\n\nPlants need water on Sundays.")
+    db = Database(make_engine(tmp_path / "memory.sqlite"))
+    soul = SoulManager(db=db)
+    await soul.log_interaction("telegram", "42", "what's my cat called?", "Your cat is called Miso.")
+    await soul.writer.flush()
+
+    memory = SemanticMemory(db=db, embedder=HashingEmbedder(dim=128), base_dir=tmp_path)
+    assert await memory.sync() == 2
+    assert await memory.sync() == 0 # Nothing changed, nothing re-embedded
+
+    hits = await memory.search("where is the router key", k=1)
+    assert hits[0]["source"].endswith("notes.md") and "router key" in hits[0]["content"]
+    assert "Miso" in (await memory.search("cat name", k=1, user_id="42"))[0]["content"]
+    assert all("Miso" not in hit["content"] for hit in await memory.search("cat name", k=5, user_id="7"))
+
+    # A restart loads the stored vectors instead of embedding again
+    reloaded = SemanticMemory(db=db, embedder=HashingEmbedder(dim=128), base_dir=tmp_path)
+    assert await reloaded.sync() == 0
+    assert len(reloaded.index) == 2
+
+    # Removing the file drops its chunks
+    (tmp_path / "notes.md").unlink()
+    await reloaded.sync()
+    assert all(not hit["source"].endswith("notes.md") for hit in await reloaded.search("router key", k=5))
+    await soul.close()
+
+@pytest.mark.asyncio
+async def test_sync_after_lost_bookkeeping_reuses_rows(tmp_path):
+    (tmp_path / "notes.md").write_text("The router key is taped under the desk.")
+    db = Database(make_engine(tmp_path / "memory.sqlite"))
+    SoulManager(db=db)
+    memory = SemanticMemory(db=db, embedder=HashingEmbedder(dim=64), base_dir=tmp_path)
+    await memory.sync()
+
+    # As if a cancelled sync had committed the rows but never recorded their ids
+    memory._sources.clear()
+    assert await memory.sync() == 1
+    assert len(await db.run(_load_chunks)) == 1
+    assert len(memory.index) == 1
+    await db.close()
+
+@pytest.mark.asyncio
+async def test_recall_block_respects_min_score(tmp_path):
+    (tmp_path / "notes.md").write_text("Dentist appointment on Friday at 10am.")
+    db = Database(make_engine(tmp_path / "memory.sqlite"))
+    SoulManager(db=db)
+    memory = SemanticMemory(db=db, base_dir=tmp_path)
+    await memory.sync()
+
+    assert "Dentist" in await memory.recall("42", "when is my dentist appointment", min_score=0.1)
+    assert await memory.recall("42", "quantum chromodynamics", min_score=0.1) == ""
+    await db.close()
@@ -0,0 +1,59 @@
+import asyncio
+import pytest
+from src.llm import GeminiBrain
+from src.utils.singleflight import SingleFlight
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution():
+    flights = SingleFlight()
+    runs = []
+
+    async def work(value):
+        runs.append(value)
+        await asyncio.sleep(0.05)
+        return value * 2
+
+    results = await asyncio.gather(*(flights.do("k", lambda: work(21)) for _ in range(4)))
+    assert results == [42] * 4
+    assert runs == [21]
+    assert flights.shared == 3
+    assert "k" not in flights
+
+    # Completed flights are forgotten, so a later call runs again
+    assert await flights.do("k", lambda: work(1)) == 2
+    assert runs == [21, 1]
+
+@pytest.mark.asyncio
+async def test_one_waiter_cancelling_does_not_cancel_the_others():
+    flights = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    first = asyncio.create_task(flights.do("k", work))
+    second = asyncio.create_task(flights.do("k", work))
+    await asyncio.sleep(0.01)
+    first.cancel()
+    assert await second == "done"
+
+@pytest.mark.asyncio
+async def test_identical_generate_requests_are_coalesced():
+    brain = GeminiBrain()
+    brain.client = object() # Skip initialize()
+    brain.response_cache = None
+    calls = []
+
+    async def fake_generate(prompt, system_instruction, retries, final_tools, request_class):
+        calls.append(prompt)
+        await asyncio.sleep(0.05)
+        return f"answer to {prompt}"
+
+    brain._generate = fake_generate
+    results = await asyncio.gather(
+        brain.generate_response("same", tools=[]),
+        brain.generate_response("same", tools=[]),
+        brain.generate_response("different", tools=[]),
+    )
+    assert results == ["answer to same", "answer to same", "answer to different"]
+    assert sorted(calls) == ["different", "same"]
@@ -1,3 +1,7 @@
+import asyncio
+import threading
+import time
+import pytest
 from src.skills.registry import SkillRegistry
 
 def test_skill_registration():
@@ -31,3 +35,153 @@ def test_tool_schema_generation():
     assert func["parameters"]["properties"]["age"]["type"] == "integer"
     assert "name" in func["parameters"]["required"]
     assert "age" in func["parameters"]["required"]
+
+@pytest.mark.asyncio
+async def test_execute_many_runs_reads_concurrently_in_order():
+    registry = SkillRegistry()
+
+    @registry.register("slow_async_skill", idempotent=True)
+    async def slow_async_skill(value: str):
+        """Sleeps on the event loop."""
+        await asyncio.sleep(0.2)
+        return f"async-{value}"
+
+    @registry.register("slow_sync_skill", idempotent=True)
+    def slow_sync_skill(value: str):
+        """Blocks a worker thread."""
+        time.sleep(0.2)
+        return f"sync-{value}"
+
+    start = time.monotonic()
+    results = await registry.execute_many([
+        ("slow_sync_skill", {"value": "a"}),
+        ("slow_async_skill", {"value": "b"}),
+        ("slow_sync_skill", {"value": "c"}),
+        ("missing_skill", {}),
+    ])
+    elapsed = time.monotonic() - start
+
+    assert results[:3] == ["sync-a", "async-b", "sync-c"]
+    assert results[3].startswith("Tool Error:")
+    assert elapsed < 0.5
+
+@pytest.mark.asyncio
+async def test_execute_many_keeps_side_effects_in_order():
+    registry = SkillRegistry()
+    events = []
+
+    @registry.register("ordered_read", idempotent=True)
+    async def ordered_read(tag: str):
+        events.append(f"start {tag}")
+        await asyncio.sleep(0.05)
+        events.append(f"end {tag}")
+        return tag
+
+    @registry.register("ordered_write")
+    def ordered_write(tag: str):
+        events.append(f"write {tag} on {threading.current_thread().name.split('_')[0]}")
+        return tag
+
+    results = await registry.execute_many([
+        ("ordered_read", {"tag": "a"}),
+        ("ordered_read", {"tag": "b"}),
+        ("ordered_write", {"tag": "c"}),
+        ("ordered_write", {"tag": "d"}),
+        ("ordered_read", {"tag": "e"}),
+    ])
+
+    assert results == ["a", "b", "c", "d", "e"]
+    assert events == [
+        "start a", "start b", "end a", "end b",
+        "write c on skill-write", "write d on skill-write",
+        "start e", "end e",
+    ]
+
+@pytest.mark.asyncio
+async def test_execute_many_applies_timeout():
+    registry = SkillRegistry()
+
+    @registry.register("hanging_skill")
+    async def hanging_skill():
+        """Never finishes in time."""
+        await asyncio.sleep(10)
+
+    results = await registry.execute_many([("hanging_skill", {})], timeout=0.05)
+    assert "timed out" in results[0]
+
+@pytest.mark.asyncio
+async def test_idempotent_skill_calls_are_coalesced():
+    registry = SkillRegistry()
+    runs = []
+
+    @registry.register("shared_lookup", idempotent=True)
+    async def shared_lookup(query: str):
+        runs.append(query)
+        await asyncio.sleep(0.05)
+        return f"result for {query}"
+
+    @registry.register("side_effect_skill")
+    async def side_effect_skill(query: str):
+        runs.append(f"side:{query}")
+        await asyncio.sleep(0.01)
+        return "ok"
+
+    results = await registry.execute_many([
+        ("shared_lookup", {"query": "x"}),
+        ("shared_lookup", {"query": "x"}),
+        ("side_effect_skill", {"query": "x"}),
+        ("side_effect_skill", {"query": "x"}),
+    ])
+
+    assert results == ["result for x", "result for x", "ok", "ok"]
+    assert runs.count("x") == 1
+    assert runs.count("side:x") == 2
+
+@pytest.mark.asyncio
+async def test_cacheable_skill_results_are_reused_and_reported():
+    registry = SkillRegistry()
+    registry.clear_cache()
+    runs = []
+
+    @registry.register("cached_fetch", cache_ttl=60, cache_key=lambda url: url.rstrip("/"))
+    def cached_fetch(url: str):
+        runs.append(url)
+        return f"page {url}"
+
+    first = await registry.execute_many([("cached_fetch", {"url": "http://a/"})], report_cache=True)
+    second = await registry.execute_many([("cached_fetch", {"url": "http://a"})], report_cache=True)
+
+    assert first == [("page http://a/", False)]
+    assert second == [("page http://a/", True)]
+    assert runs == ["http://a/"]
+
+@pytest.mark.asyncio
+async def test_watched_file_change_invalidates_cached_result(tmp_path):
+    registry = SkillRegistry()
+    registry.clear_cache()
+    target = tmp_path / "notes.txt"
+    target.write_text("v1")
+
+    @registry.register("cached_read", cache_ttl=60, watch_paths=lambda path: [path])
+    def cached_read(path: str):
+        with open(path) as f:
+            return f.read()
+
+    assert await registry.execute("cached_read", {"path": str(target)}) == "v1"
+    target.write_text("version 2")
+    assert await registry.execute("cached_read", {"path": str(target)}) == "version 2"
+    assert await registry.execute_cached("cached_read", {"path": str(target)}) == ("version 2", True)
+
+@pytest.mark.asyncio
+async def test_grep_search_sees_nested_files_written_after_a_search(tmp_path, monkeypatch):
+    from src.skills import default
+    monkeypatch.setattr(default, "BASE_DIR", tmp_path)
+    registry = SkillRegistry()
+    registry.clear_cache()
+    (tmp_path / "pkg").mkdir()
+
+    assert await registry.execute("grep_search", {"pattern": "needle"}) == "No matches found."
+    await registry.execute("write_project_file", {"file_path": "pkg/nested/notes.txt", "content": "a needle here"})
+
+    assert await registry.execute("grep_search", {"pattern": "needle"}) == "pkg/nested/notes.txt:1: a needle here"
+    assert await registry.execute("glob_files", {"pattern": "**/*.txt"}) == "pkg/nested/notes.txt"
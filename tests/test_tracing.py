@@ -0,0 +1,49 @@
+import asyncio
+import pytest
+from src.tracing import JsonlExporter, Tracer, load_traces, main, render_trace
+
+@pytest.mark.asyncio
+async def test_spans_nest_across_tasks_and_export_one_trace(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    tracer = Tracer(enabled=True, exporter=JsonlExporter(path))
+
+    async def tool(name):
+        with tracer.span("execute", skill=name):
+            await asyncio.sleep(0.01)
+
+    with tracer.span("handle_message", channel="telegram"):
+        with tracer.span("generate_content", model="m"):
+            await asyncio.sleep(0.01)
+        await asyncio.gather(tool("a"), tool("b"))
+
+    assert tracer.current() is None
+    [trace] = load_traces(path)
+    spans = {s["name"]: s for s in trace["spans"]}
+    root = spans["handle_message"]
+    assert trace["name"] == "handle_message"
+    assert spans["generate_content"]["parent_id"] == root["span_id"]
+    assert [s["parent_id"] for s in trace["spans"] if s["name"] == "execute"] == [root["span_id"]] * 2
+    assert "execute" in render_trace(trace)
+
+def test_disabled_tracer_records_nothing(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    tracer = Tracer(enabled=False, exporter=JsonlExporter(path))
+    with tracer.span("handle_message") as current:
+        assert current is None
+    assert not path.exists()
+
+def test_cli_prints_slowest_trace_first(tmp_path, capsys):
+    path = tmp_path / "traces.jsonl"
+    tracer = Tracer(enabled=True, exporter=JsonlExporter(path))
+    with tracer.span("fast"):
+        pass
+    with pytest.raises(RuntimeError):
+        with tracer.span("slow"):
+            with tracer.span("step"):
+                sum(range(100000))
+            raise RuntimeError("boom")
+
+    main(["--file", str(path), "-n", "1"])
+    out = capsys.readouterr().out
+    assert out.startswith("slow")
+    assert "fast" not in out
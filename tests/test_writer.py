@@ -0,0 +1,80 @@
+import asyncio
+import pytest
+from src.memory.dal import Database, recent_interactions
+from src.memory.db import init_db, make_engine
+from src.memory.manager import SoulManager
+from src.memory.writer import InteractionWriter
+
+class CountingDatabase(Database):
+    def __init__(self, engine):
+        super().__init__(engine)
+        self.calls = 0
+
+    async def run(self, func, *args, **kwargs):
+        self.calls += 1
+        return await super().run(func, *args, **kwargs)
+
+@pytest.fixture
+def soul(tmp_path):
+    return SoulManager(db=CountingDatabase(make_engine(tmp_path / "memory.sqlite")))
+
+@pytest.mark.asyncio
+async def test_many_interactions_are_written_in_one_batch(soul):
+    soul.writer.flush_interval = 0.05
+    for i in range(10):
+        await soul.log_interaction("test", "42", f"q{i}", f"a{i}")
+    assert soul.db.calls == 0 # Nothing touched the disk on the reply path
+
+    await asyncio.sleep(0.2)
+    assert soul.db.calls == 1
+    assert len(await soul.db.run(recent_interactions, "42", 20)) == 10
+    await soul.close()
+
+@pytest.mark.asyncio
+async def test_history_reads_its_own_unflushed_writes(soul):
+    soul.writer.flush_interval = 3600
+    await soul.log_interaction("test", "42", "hi", "Hello")
+    await soul.log_interaction("test", "7", "other", "user")
+
+    turns = await soul.get_recent_history_turns("42")
+    assert turns == [
+        {"role": "user", "parts": [{"text": "hi"}]},
+        {"role": "model", "parts": [{"text": "Hello"}]},
+    ]
+
+    # After the flush the record is served from the table, not twice
+    await soul.writer.flush()
+    assert len(await soul.get_recent_history_turns("42")) == 2
+    await soul.close()
+
+@pytest.mark.asyncio
+async def test_close_flushes_and_failed_batches_stay_queued(tmp_path):
+    db = Database(make_engine(tmp_path / "memory.sqlite"))
+    init_db(db.engine)
+    writer = InteractionWriter(db, flush_interval=3600)
+    writer.add("test", "42", "hi", "Hello")
+
+    async def broken(func, *args, **kwargs):
+        raise RuntimeError("disk I/O error")
+
+    db.run, real_run = broken, db.run
+    assert await writer.flush() == 0
+    assert len(writer.pending()) == 1
+
+    db.run = real_run
+    await writer.close()
+    assert writer.pending() == []
+    assert await db.run(recent_interactions, "42", 5) == [("hi", "Hello")]
+    await db.close()
+
+@pytest.mark.asyncio
+async def test_size_threshold_triggers_an_immediate_flush(tmp_path):
+    db = Database(make_engine(tmp_path / "memory.sqlite"))
+    init_db(db.engine)
+    writer = InteractionWriter(db, batch_size=3, flush_interval=3600)
+    for i in range(3):
+        writer.add("test", "42", f"q{i}", f"a{i}")
+    await asyncio.sleep(0.1)
+    assert writer.pending() == []
+    await writer.close()
+    await db.close()